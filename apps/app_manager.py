@@ -119,6 +119,9 @@ class AppManager(object):
         app = importlib.import_module(app_import_path + '.main', package='apps')
         context = self.cm.create_context(app_path)
         context.threaded = threaded
+        if app_path in self.config.get("isolated_apps", []):
+            logger.info("App {} will be run in a separate process".format(app_path))
+            context.isolated = True
         i, o = self.cm.get_io_for_context(app_path)
         if is_class_based_module(app):
             app_class = get_zeroapp_class_in_module(app)
@@ -133,6 +136,8 @@ class AppManager(object):
         This is a function to pass context objects to apps. For now, it works
         with both class-based and module-based apps. It only passes the context
         if it detects that the app has the appropriate function to do that.
+        If the app has an ``on_suspend`` function, sets it as the context's
+        suspend hook.
         """
         if hasattr(app, "set_context") and callable(app.set_context):
             try:
@@ -141,6 +146,9 @@ class AppManager(object):
                 logger.exception("App {}: app class has 'set_context' but raised exception when passed a context".format(app_path))
             else:
                 logger.info("Passed context to app {}".format(app_path))
+        if hasattr(app, "on_suspend") and callable(app.on_suspend):
+            context.set_suspend_hook(app.on_suspend)
+            logger.info("Set suspend hook for app {}".format(app_path))
 
     def get_subdir_menu_name(self, subdir_path):
         """
@@ -76,15 +76,17 @@ def smart_scan():
     network_ip = get_network_from_ip(network_ip)
     chosen_ports = Checkbox(heuristic_ports, i, o, name="NMap: select port types", final_button_name="Run scan").activate()
     if chosen_ports is None: return None
-    chosen_port_list = [port_choice for port_choice in chosen_ports if chosen_ports[port_choice] == True]
-    port_string = ",".join(chosen_port_list)
-    #So the library I'm using is silently failing. I launch the scan from command-line and see:
+    #Port types can share ports, and the library I'm using is silently failing on duplicates.
+    #I launch the scan from command-line and see:
     #
     #WARNING: Duplicate port number(s) specified.  Are you alert enough to be using Nmap?  Have some coffee or Jolt(tm).
     #
-    #Well, thank you, but it's a script and fuck off.
-    port_string = ",".join(list(set(port_string.split(","))))
-    #De-duplicated and ready to go.
+    #So, collecting the ports into a set.
+    ports = set()
+    for port_choice, chosen in chosen_ports.items():
+        if chosen:
+            ports.update(port_choice.split(","))
+    port_string = ",".join(sorted(ports, key=int))
     print(port_string)
     Printer(ffs("Scanning {}".format(network_ip), o.cols), i, o, 0)
     nm = nmap.PortScanner()
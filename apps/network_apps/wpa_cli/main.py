@@ -9,7 +9,7 @@ from time import sleep
 from threading import Thread
 from traceback import format_exc
 
-from ui import Menu, Printer, MenuExitException, UniversalInput, Refresher, DialogBox, ellipsize
+from ui import Menu, Printer, MenuExitException, UniversalInput, Refresher, DialogBox, ellipsize, PollingDataSource
 
 import wpa_cli
 
@@ -166,7 +166,8 @@ def status_refresher_data():
 
 def status_monitor():
     keymap = {"KEY_ENTER":wireless_status, "KEY_RIGHT":lambda: scan(False), "KEY_UP":lambda: reconnect()}
-    refresher = Refresher(status_refresher_data, i, o, 0.5, keymap, "Wireless monitor")
+    source = PollingDataSource(status_refresher_data, 0.5)
+    refresher = Refresher(None, i, o, keymap=keymap, name="Wireless monitor", data_source=source)
     refresher.activate()
 
 def wireless_status():
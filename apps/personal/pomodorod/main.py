@@ -5,7 +5,7 @@ o = None
 
 from time import sleep
 
-from ui import Menu, MenuExitException, Printer, IntegerAdjustInput, Refresher, DialogBox
+from ui import Menu, MenuExitException, Printer, IntegerAdjustInput, Refresher, DialogBox, PollingDataSource
 
 from utils import RPCClient, RPCCommError
 server = RPCClient('localhost', 4515)
@@ -28,7 +28,8 @@ def status_refresher_data():
 
 def callback():
     keymap = {"KEY_ENTER":pomodoro_options_menu}
-    refresher = Refresher(status_refresher_data, i, o, 1, keymap, "Pomodoro monitor")
+    source = PollingDataSource(status_refresher_data, 1)
+    refresher = Refresher(None, i, o, keymap=keymap, name="Pomodoro monitor", data_source=source)
     refresher.activate()
 
 def start_monitoring():
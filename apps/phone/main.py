@@ -8,7 +8,7 @@ from subprocess import call as os_call
 from time import sleep
 import traceback
 
-from ui import Refresher, Menu, Printer, PrettyPrinter, DialogBox, ffs
+from ui import Refresher, Menu, Printer, PrettyPrinter, DialogBox, ffs, DataSource
 from ui.experimental import NumberKeypadInputLayer
 from helpers import BackgroundRunner, ExitHelper
 
@@ -62,7 +62,12 @@ def call_view():
     NumberKeypadInputLayer(i, o, "Call number", keymap, name="Phone call layer").activate()
 
 def status_refresher():
-    Refresher(phone_status, i, o).activate()
+    source = DataSource(phone_status())
+    phone.on_state_update = lambda key, value: source.publish(phone_status())
+    try:
+        Refresher(None, i, o, data_source=source).activate()
+    finally:
+        phone.on_state_update = None
 
 
 def init_hardware():
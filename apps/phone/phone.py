@@ -40,6 +40,7 @@ class Phone(object):
     modem = None
     modem_state = {}
     missed_calls = []
+    on_state_update = None
 
     def __init__(self):
         pass
@@ -71,6 +72,8 @@ class Phone(object):
                 callerid = self.modem.current_callerid
                 callerid["timestamp"] = datetime.now().strftime("%H:%M:%S %Y-%m-%d")
                 self.missed_calls.append(callerid)
+        if callable(self.on_state_update):
+            self.on_state_update(key, value)
 
     def get_status(self):
         return self.modem_state
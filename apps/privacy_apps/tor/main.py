@@ -3,7 +3,7 @@ menu_name = "Tor control app"
 from subprocess import call
 from time import sleep
 
-from ui import Menu, Printer, Refresher
+from ui import Menu, Printer, Refresher, PollingDataSource
 import tor
 
 i = None
@@ -38,7 +38,7 @@ def get_status():
     
 def status_refresher():
     Printer("Getting Tor status...", i, o, 0, skippable=True)
-    Refresher(get_status, i, o, 10).activate()
+    Refresher(None, i, o, data_source=PollingDataSource(get_status, 10)).activate()
 
 def check_conn():
     Printer("Getting DuckDuckGo", i, o, 0, skippable=True)
@@ -12,7 +12,7 @@ True
 menu_name = "System info"
 
 from subprocess import call
-from ui import Menu, Printer, Refresher
+from ui import Menu, Printer, Refresher, PollingDataSource
 
 import sys_info
 
@@ -22,7 +22,7 @@ def uptime_load_data():
     return [uptime_string, loadavg_string]
 
 def uptime_load_monitor():
-    Refresher(uptime_load_data, i, o, 1).activate()
+    Refresher(None, i, o, data_source=PollingDataSource(uptime_load_data, 1)).activate()
 
 def memory_menu_data():
     memory_info = sys_info.free()
@@ -4,6 +4,8 @@ from datetime import timedelta
 from subprocess import check_output
 import platform
 
+from helpers import parse_proc_meminfo
+
 def _kb_str_to_mb(string):
     """Converts a string formatted like "1234 kB" into a string where value given is expressed in megabytes"""
     value, suffix = string.split(" ")
@@ -63,20 +65,6 @@ CmaTotal:           8192 kB
 CmaFree:            3476 kB
 """
 
-def parse_proc_meminfo():
-    """ Parses /proc/meminfo and returns key:value pairs"""
-    meminfo_dict = {}
-    with open("/proc/meminfo") as f:
-        for line in f.readlines():
-            try:
-                key, value = line.split(":")
-            except:
-                continue
-            else:
-                meminfo_dict[key] = int(value.strip('\n').strip(' ').split(" ")[0])
-    return meminfo_dict
-
-
 """
 >>>free
              total       used       free     shared    buffers     cached
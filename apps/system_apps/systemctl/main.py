@@ -57,21 +57,21 @@ def all_units():
     units = systemctl.list_units()
     for unit in units:
         menu_contents.append([unit["name"], lambda x=unit: unit_menu(x)])
-    Menu(menu_contents, i, o, "Systemctl: all unit list menu").activate()
+    Menu(menu_contents, i, o, "Systemctl: all unit list menu", searchable=True).activate()
 
 def pinned_units():
     menu_contents = []
     units = systemctl.list_units("name", config["pinned_units"])
     for unit in units:
         menu_contents.append([unit["name"], lambda x=unit["name"]: unit_menu({"name":x}, in_pinned=True)])
-    Menu(menu_contents, i, o, "Pinned unit list menu").activate()
+    Menu(menu_contents, i, o, "Pinned unit list menu", searchable=True).activate()
 
 def filtered_units():
     menu_contents = []
     units = systemctl.list_units("unit_type", config["allowed_types"])
     for unit in units:
         menu_contents.append([unit["name"], lambda x=unit: unit_menu(x)])
-    Menu(menu_contents, i, o, "Systemctl: filtered unit list menu").activate()
+    Menu(menu_contents, i, o, "Systemctl: filtered unit list menu", searchable=True).activate()
 
 def unit_menu(unit, in_pinned=False):
     name = unit["name"]
@@ -1,10 +1,13 @@
 from input.input import InputProxy
 from output.output import OutputProxy
 
+from collections import namedtuple
 from functools import wraps
 from threading import Thread, Lock
+from time import time
+import Queue
 
-from helpers import setup_logger
+from helpers import setup_logger, parse_proc_meminfo, Scheduler
 
 logger = setup_logger(__name__, "info")
 
@@ -25,16 +28,153 @@ class ContextError(Exception):
     pass
 
 
+ContextEvent = namedtuple("ContextEvent", ["type", "context_alias", "args", "kwargs"])
+"""
+An event sent between contexts and the ContextManager:
+
+  * ``type``: event type name, such as ``"finished"`` or ``"notification"``
+  * ``context_alias``: name of the context the event originates from
+  * ``args``, ``kwargs``: event parameters
+"""
+
+
+class EventBus(object):
+    """
+    Dispatches ``ContextEvent`` objects. Each event type can have one handler,
+    which is called to process the event and whose return value is passed
+    back to the caller, as well as any number of subscribers, which are
+    notified about the event.
+
+    Events can be sent synchronously with ``call()`` (the caller waits for the
+    handler to process the event) or asynchronously with ``post()`` (the event
+    is put into a queue and processed by the event bus thread, so that the
+    caller returns immediately).
+    """
+
+    thread = None
+
+    def __init__(self, name="EventBus"):
+        self.name = name
+        self.handlers = {}
+        self.subscribers = {}
+        self.queue = Queue.Queue()
+        self.subscriber_lock = Lock()
+
+    def register_handler(self, event_type, handler):
+        """
+        Sets the function that processes events of the given type
+        (replacing the previous handler, if one was set).
+        """
+        self.handlers[event_type] = handler
+
+    def subscribe(self, event_type, callback):
+        """
+        Adds a function to be called (with the ``ContextEvent`` as the only argument)
+        each time an event of the given type is processed. Subscribers are called
+        from the event bus thread.
+        """
+        with self.subscriber_lock:
+            self.subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type, callback):
+        """
+        Removes a subscriber previously added with ``subscribe()``.
+        """
+        with self.subscriber_lock:
+            callbacks = self.subscribers.get(event_type, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def call(self, event):
+        """
+        Processes an event synchronously and returns the handler's return value.
+        Subscribers are then notified asynchronously.
+        """
+        result = self.handle(event)
+        self.notify_subscribers(event)
+        return result
+
+    def post(self, event):
+        """
+        Puts an event into the queue, to be processed by the event bus thread.
+        Returns immediately.
+        """
+        self.start()
+        self.queue.put((event, True))
+
+    def handle(self, event):
+        handler = self.handlers.get(event.type, None)
+        if handler is None:
+            if not self.subscribers.get(event.type, None):
+                logger.warning("Unknown event: {}!".format(event.type))
+            return None
+        return handler(event)
+
+    def notify_subscribers(self, event):
+        """
+        Notifies subscribers about an event without processing it with a handler.
+        Returns immediately - subscribers are only called from the event bus thread.
+        """
+        with self.subscriber_lock:
+            has_subscribers = bool(self.subscribers.get(event.type, None))
+        if has_subscribers:
+            self.start()
+            self.queue.put((event, False))
+
+    def start(self):
+        """
+        Starts the event bus thread, unless it's already running.
+        """
+        if self.thread is not None and self.thread.isAlive():
+            return
+        self.thread = Thread(target=self.event_loop, name="{} thread".format(self.name))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def event_loop(self):
+        while True:
+            event, needs_handling = self.queue.get()
+            if needs_handling:
+                try:
+                    self.handle(event)
+                except:
+                    logger.exception("Exception while handling event {}".format(event))
+            with self.subscriber_lock:
+                callbacks = list(self.subscribers.get(event.type, []))
+            for callback in callbacks:
+                try:
+                    callback(event)
+                except:
+                    logger.exception("Exception in subscriber {} for event {}".format(callback, event))
+
+
+# Context lifecycle states:
+#  * "unloaded" - context is created, but there's no target set for it yet
+#  * "loaded" - context has a target, but it isn't running
+#  * "active" - context is the one currently active
+#  * "background" - context is not the current one, but is still running
+#  * "suspended" - context has been idle for a long time (or memory is low),
+#    so its suspend hook has been called and its stored images have been dropped
+context_states = ["unloaded", "loaded", "active", "background", "suspended"]
+
+
 class Context(object):
     thread = None
     target = None
     threaded = True
+    isolated = False
+    host = None
+    preserve_frame = True
+    suspend_hook = None
+    state = "unloaded"
+    last_active = 0
     i = None
     o = None
 
-    def __init__(self, name, event_callback):
+    def __init__(self, name, event_callback, event_bus=None):
         self.name = name
         self.event_cb = event_callback
+        self.event_bus = event_bus
 
     def set_target(self, target):
         """
@@ -42,6 +182,32 @@ class Context(object):
         you can define a custom callback to be used for your app.
         """
         self.target = target
+        if self.state == "unloaded":
+            self.state = "loaded"
+
+    def set_suspend_hook(self, hook):
+        """
+        Sets a function to be called when the context is suspended by the
+        ContextManager - your app can drop its caches in it to free some memory.
+        The hook shouldn't block or request context switches.
+        """
+        if not callable(hook):
+            raise ContextError("Context {} expected callable suspend hook, got {}!".format(self.name, type(hook)))
+        self.suspend_hook = hook
+
+    def suspend(self):
+        """
+        Calls the suspend hook (if set) and drops the images stored by the output
+        proxy, then marks the context as suspended (this function is used by
+        the context manager).
+        """
+        if callable(self.suspend_hook):
+            try:
+                self.suspend_hook()
+            except:
+                logger.exception("Exception in the suspend hook of context {}".format(self.name))
+        self.o._clear()
+        self.state = "suspended"
 
     def set_io(self, i, o):
         """
@@ -91,6 +257,14 @@ class Context(object):
         """
         return self.threaded and self.target is not None
 
+    def terminate(self):
+        """
+        Kills the process of an ``isolated`` context - for when the app hangs.
+        Does nothing for contexts that aren't isolated.
+        """
+        if self.host is not None:
+            self.host.terminate()
+
     def thread_is_active(self):
         """
         Tells whether there's a currently-running thread associated with the context.
@@ -100,9 +274,18 @@ class Context(object):
     def start_thread(self):
         """
         Actually launches the context thread (based on the target function,
-        wrapped into the ``context_target_wrapper()``.
-        """
-        wrapped_target = context_target_wrapper(self, self.target)
+        wrapped into the ``context_target_wrapper()``. If the context is
+        ``isolated``, the target is run in a separate process, and the thread
+        bridges the context's IO to that process until it exits.
+        """
+        target = self.target
+        if self.isolated:
+            # Imported here so that the multiprocessing machinery isn't loaded
+            # unless it's actually used
+            from isolated_context import IsolatedContextHost
+            self.host = IsolatedContextHost(self, self.target)
+            target = self.host.run
+        wrapped_target = context_target_wrapper(self, target)
         if self.thread: del self.thread
         self.thread = Thread(target=wrapped_target)
         self.thread.daemon = True
@@ -110,11 +293,16 @@ class Context(object):
 
     def signal_finished(self):
         """
-        Signals to the ContextManager that the application has finished running,
-        as well as clears the display (to avoid a bug from happening, where last
-        contents of the display are shortly shown on the next reactivation).
+        Signals to the ContextManager that the application has finished running.
+        If ``preserve_frame`` is set (default), the last frame the app has shown
+        is kept in the output proxy, so that it's shown as soon as the context
+        is switched to again, while the app itself is starting up and re-drawing
+        its UI. Otherwise, clears the output proxy's stored image.
         """
-        self.o._clear()
+        if self.preserve_frame:
+            self.o._preserve_frame()
+        else:
+            self.o._clear()
         return self.event_cb(self.name, "finished")
 
     def signal_background(self):
@@ -137,6 +325,69 @@ class Context(object):
         """
         return self.event_cb(self.name, "is_active")
 
+    def post_event(self, event_type, *args, **kwargs):
+        """
+        Sends an event to the ContextManager asynchronously - returns immediately,
+        without waiting for the event to be processed.
+        """
+        if self.event_bus is None:
+            raise ContextError("Context {} has no event bus to post events to!".format(self.name))
+        self.event_bus.post(ContextEvent(event_type, self.name, args, kwargs))
+
+    def notify(self, *args, **kwargs):
+        """
+        Lets the app notify about something that happened (for example, a new
+        message received). Subscribers to ``"notification"`` events will get it.
+        Returns immediately.
+        """
+        self.post_event("notification", *args, **kwargs)
+
+    def request_foreground(self):
+        """
+        Asynchronous version of ``request_switch`` - asks the ContextManager to
+        switch to this context, but returns immediately.
+        """
+        self.post_event("request_switch")
+
+    def subscribe(self, event_type, callback):
+        """
+        Makes the ContextManager call ``callback`` each time an event of the given
+        type happens - for example, ``"context_switched"`` (with ``event.args``
+        being the previous and the new context names) or ``"notification"``.
+        The callback receives a ``ContextEvent`` object and is called from
+        the event bus thread.
+        """
+        if self.event_bus is None:
+            raise ContextError("Context {} has no event bus to subscribe to!".format(self.name))
+        self.event_bus.subscribe(event_type, callback)
+
+    def unsubscribe(self, event_type, callback):
+        """
+        Removes a callback previously set with ``subscribe()``.
+        """
+        if self.event_bus is not None:
+            self.event_bus.unsubscribe(event_type, callback)
+
+    def schedule(self, delay, callback, interval=None, tolerance=0, switch=False):
+        """
+        Asks the ContextManager to call ``callback`` after ``delay`` seconds (and then
+        every ``interval`` seconds, if ``interval`` is set) from its timer thread -
+        so that the app doesn't need a thread of its own that polls with ``sleep()``.
+        ``tolerance`` is how early (in seconds) the callback can be called, so that
+        it can be called together with other callbacks that are due earlier.
+        If ``switch`` is True, this context is switched to before the callback is called.
+
+        Returns a ``ScheduledJob`` object, which has a ``cancel()`` method.
+        """
+        return self.event_cb(self.name, "schedule", delay, callback, interval=interval, tolerance=tolerance, switch=switch)
+
+    def get_switch_latency(self):
+        """
+        Returns the time (in seconds) that the last switch to this context took,
+        or None if the context hasn't yet been switched to.
+        """
+        return self.event_cb(self.name, "get_switch_latency")
+
     def get_previous_context_image(self):
         """
         Useful for making screenshots (mainly, for ZeroMenu). Might get deprecated in
@@ -162,10 +413,39 @@ class ContextManager(object):
     fallback_context = "main"
     initial_contexts = ["main"]
 
-    def __init__(self):
+    suspend_timeout = 10*60 # Seconds of inactivity before a context is suspended
+    memory_low_threshold = 0.1 # Fraction of available memory that is considered "low"
+    monitor_interval = 30
+    monitor_job = None
+
+    def __init__(self, config=None):
         self.contexts = {}
         self.previous_contexts = {}
+        self.switch_latencies = {}
         self.switching_contexts = Lock()
+        self.config = config if config else {}
+        self.suspend_timeout = self.config.get("suspend_timeout", self.suspend_timeout)
+        self.memory_low_threshold = self.config.get("memory_low_threshold", self.memory_low_threshold)
+        self.monitor_interval = self.config.get("monitor_interval", self.monitor_interval)
+        self.scheduler = Scheduler(name="ContextManager scheduler")
+        self.event_bus = EventBus(name="ContextManager event bus")
+        self.register_event_handlers()
+
+    def register_event_handlers(self):
+        """
+        Sets up ``EventBus`` handlers for events that contexts can send.
+        """
+        handlers = {"finished": self.on_context_finished,
+                    "background": self.on_context_finished,
+                    "get_previous_context_image": self.on_get_previous_context_image,
+                    "get_switch_latency": lambda e: self.get_switch_latency(e.context_alias),
+                    "is_active": lambda e: e.context_alias == self.current_context,
+                    "request_switch": self.on_request_switch,
+                    "request_global_keymap": self.on_request_global_keymap,
+                    "schedule": self.on_schedule,
+                    "notification": self.on_notification}
+        for event_type, handler in handlers.items():
+            self.event_bus.register_handler(event_type, handler)
 
     def init_io(self, input_processor, screen):
         """
@@ -227,6 +507,7 @@ class ContextManager(object):
         were before and re-raises the exception - in the worst case, 
         """
         logger.info("Switching to {} context".format(context_alias))
+        switch_start = time()
         previous_context = self.current_context
         self.current_context = context_alias
         # First, activating IO - if it fails, restoring the previous context's IO
@@ -266,7 +547,134 @@ class ContextManager(object):
             # Passing the exception back to the caller
             raise
         else:
-            logger.debug("Switched to {} context!".format(context_alias))
+            self.update_context_states(previous_context, context_alias)
+            latency = time() - switch_start
+            self.switch_latencies[context_alias] = latency
+            logger.debug("Switched to {} context in {:.2f}ms!".format(context_alias, latency*1000))
+            self.event_bus.notify_subscribers(ContextEvent("context_switched", context_alias, (previous_context, context_alias), {}))
+
+    def update_context_states(self, previous_context, new_context):
+        """
+        Updates lifecycle states and activity timestamps for the contexts involved
+        in a context switch.
+        """
+        now = time()
+        previous = self.contexts.get(previous_context, None)
+        if previous is not None and previous_context != new_context:
+            previous.last_active = now
+            # A context that has finished will already have its state set to "loaded"
+            if previous.state == "active":
+                previous.state = "background"
+        context = self.contexts[new_context]
+        context.last_active = now
+        context.state = "active"
+
+    def get_context_state(self, context_alias):
+        """
+        Returns the lifecycle state of a context.
+        """
+        return self.contexts[context_alias].state
+
+    def get_suspendable_contexts(self):
+        """
+        Returns names of contexts that can be suspended, least recently used first.
+        Only contexts that don't have a running thread can be suspended - the
+        initial contexts and the current context are never suspended.
+        """
+        contexts = [c for name, c in self.contexts.items() if name != self.current_context
+                    and name not in self.initial_contexts
+                    and c.state in ("loaded", "background")
+                    and not c.thread_is_active()]
+        contexts.sort(key=lambda c: c.last_active)
+        return [c.name for c in contexts]
+
+    def suspend_context(self, context_alias):
+        """
+        Suspends a context, calling its suspend hook and dropping its stored images.
+        """
+        logger.info("Suspending {} context".format(context_alias))
+        self.contexts[context_alias].suspend()
+
+    def suspend_idle_contexts(self):
+        """
+        Suspends all contexts that haven't been used for ``suspend_timeout`` seconds.
+        Returns the list of names of the contexts suspended.
+        """
+        if self.suspend_timeout is None:
+            return []
+        now = time()
+        suspended = []
+        for context_alias in self.get_suspendable_contexts():
+            if now - self.contexts[context_alias].last_active > self.suspend_timeout:
+                self.suspend_context(context_alias)
+                suspended.append(context_alias)
+        return suspended
+
+    def memory_is_low(self):
+        """
+        Checks ``/proc/meminfo`` and tells whether the amount of available memory
+        is below ``memory_low_threshold``. Returns False if memory information
+        can't be read.
+        """
+        try:
+            meminfo = parse_proc_meminfo()
+            total = meminfo["MemTotal"]
+            if "MemAvailable" in meminfo:
+                available = meminfo["MemAvailable"]
+            else:
+                available = meminfo["MemFree"] + meminfo["Buffers"] + meminfo["Cached"]
+        except (IOError, OSError, KeyError, ValueError):
+            logger.debug("Can't read memory information")
+            return False
+        return float(available) / total < self.memory_low_threshold
+
+    def reclaim_memory(self):
+        """
+        Suspends contexts, least recently used first, for as long as memory
+        is low. Returns the list of names of the contexts suspended.
+        """
+        suspended = []
+        for context_alias in self.get_suspendable_contexts():
+            if not self.memory_is_low():
+                break
+            logger.warning("Memory is low, suspending {} context".format(context_alias))
+            self.suspend_context(context_alias)
+            suspended.append(context_alias)
+        return suspended
+
+    def start_monitor(self):
+        """
+        Schedules a periodic job that suspends idle contexts and reclaims
+        memory when it's low.
+        """
+        if self.monitor_job is not None:
+            return
+        # The monitor isn't time-critical, so it can run together with other jobs
+        self.monitor_job = self.scheduler.schedule_periodic(self.monitor_interval, self.monitor,
+                                                            tolerance=self.monitor_interval/2.0, name="context monitor")
+
+    def stop_monitor(self):
+        """
+        Cancels the context monitor job.
+        """
+        if self.monitor_job is not None:
+            self.monitor_job.cancel()
+            self.monitor_job = None
+
+    def monitor(self):
+        with self.switching_contexts:
+            try:
+                self.suspend_idle_contexts()
+                self.reclaim_memory()
+            except:
+                logger.exception("Exception in the context monitor")
+
+    def get_switch_latency(self, context_alias):
+        """
+        Returns the time (in seconds) that the last successful switch to a context
+        took, or None if the context hasn't been switched to yet.
+        """
+        return self.switch_latencies.get(context_alias, None)
 
     def failsafe_switch_to_fallback_context(self):
         """
@@ -280,6 +688,7 @@ class ContextManager(object):
         self.previous_contexts[self.fallback_context] = self.fallback_context
         self.activate_context_io(self.current_context)
         self.contexts[self.current_context].activate()
+        self.contexts[self.current_context].state = "active"
         logger.info("Fallback switched to {} - proceed with caution".format(self.current_context))
 
     def activate_context_io(self, context_alias):
@@ -299,7 +708,7 @@ class ContextManager(object):
         (by the given context alias).
         """
         logger.debug("Creating {} context".format(context_alias))
-        context = Context(context_alias, self.signal_event)
+        context = Context(context_alias, self.signal_event, event_bus=self.event_bus)
         context.set_io(*self.create_io_for_context(context_alias))
         self.contexts[context_alias] = context
         return context
@@ -336,52 +745,73 @@ class ContextManager(object):
 
     def signal_event(self, context_alias, event, *args, **kwargs):
         """
-        A callback for context objects to use to signal/receive events - 
+        A callback for context objects to use to signal/receive events -
         providing an interface for apps to interact with the context manager.
-        This function will, at some point in the future, be working through
-        RPC.
-        """
-        if event == "finished" or event == "background":
-            # For now, those two events are handled the same - later on,
-            # there will be differences.
-            with self.switching_contexts:
-                #Locking to avoid a check-then-do race condition
-                if self.current_context == context_alias:
-                    #Current context is the active one, switching to the previous context
-                    next_context = self.get_previous_context(context_alias, pop=True)
-                    logger.debug("Next context: {}".format(next_context))
-                    try:
-                        self.unsafe_switch_to_context(next_context)
-                    except ContextError:
-                        logger.exception("A ContextError was caught")
-                        self.previous_contexts[context_alias] = next_context
-                        return False
-                    return True
-                else:
-                    return False
-        elif event == "get_previous_context_image":
-            # This is a special-case function for screenshots. I'm wondering
-            # if there's a better way to express this.
-            previous_context = self.get_previous_context(context_alias)
-            return self.contexts[previous_context].get_io()[1].get_current_image()
-        elif event == "is_active":
-            return context_alias == self.current_context
-        elif event == "request_switch":
-            # As usecases appear, we will likely want to do some checks here
-            logger.info("Context switch requested by {} app".format(context_alias))
-            return self.switch_to_context(context_alias)
-        elif event == "request_global_keymap":
-            results = {}
-            keymap = args[0]
-            for key, cb in keymap.items():
+        Wraps the event into a ``ContextEvent`` and processes it synchronously
+        through the event bus, returning the result.
+        """
+        return self.event_bus.call(ContextEvent(event, context_alias, args, kwargs))
+
+    def on_context_finished(self, event):
+        # For now, "finished" and "background" events are handled the same - later on,
+        # there will be differences.
+        context_alias = event.context_alias
+        with self.switching_contexts:
+            #Locking to avoid a check-then-do race condition
+            if self.current_context == context_alias:
+                if event.type == "finished":
+                    self.contexts[context_alias].state = "loaded"
+                #Current context is the active one, switching to the previous context
+                next_context = self.get_previous_context(context_alias, pop=True)
+                logger.debug("Next context: {}".format(next_context))
                 try:
-                    self.input_processor.set_global_callback(key, cb)
-                except Exception as e:
-                    logger.warning("Context {} couldn't set a global callback on {} (function: {})".format(context_alias, key, cb.__name__))
-                    results[key] = e
-                else:
-                    logger.warning("Context {} set a global callback on {} (function: {})".format(context_alias, key, cb.__name__))
-                    results[key] = True
-            return results
+                    self.unsafe_switch_to_context(next_context)
+                except ContextError:
+                    logger.exception("A ContextError was caught")
+                    self.previous_contexts[context_alias] = next_context
+                    return False
+                return True
+            else:
+                return False
+
+    def on_get_previous_context_image(self, event):
+        # This is a special-case function for screenshots. I'm wondering
+        # if there's a better way to express this.
+        previous_context = self.get_previous_context(event.context_alias)
+        return self.contexts[previous_context].get_io()[1].get_current_image()
+
+    def on_request_switch(self, event):
+        # As usecases appear, we will likely want to do some checks here
+        logger.info("Context switch requested by {} app".format(event.context_alias))
+        return self.switch_to_context(event.context_alias)
+
+    def on_notification(self, event):
+        logger.info("Notification from {} app: {}".format(event.context_alias, event.args))
+
+    def on_schedule(self, event):
+        context_alias = event.context_alias
+        delay, callback = event.args
+        kwargs = dict(event.kwargs)
+        if kwargs.pop("switch", False):
+            def func():
+                self.switch_to_context(context_alias)
+                callback()
         else:
-            logger.warning("Unknown event: {}!".format(event))
+            func = callback
+        name = "{} ({} context)".format(getattr(callback, "__name__", repr(callback)), context_alias)
+        return self.scheduler.schedule(delay, func, name=name, **kwargs)
+
+    def on_request_global_keymap(self, event):
+        context_alias = event.context_alias
+        results = {}
+        keymap = event.args[0]
+        for key, cb in keymap.items():
+            try:
+                self.input_processor.set_global_callback(key, cb)
+            except Exception as e:
+                logger.warning("Context {} couldn't set a global callback on {} (function: {})".format(context_alias, key, cb.__name__))
+                results[key] = e
+            else:
+                logger.warning("Context {} set a global callback on {} (function: {})".format(context_alias, key, cb.__name__))
+                results[key] = True
+        return results
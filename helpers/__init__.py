@@ -1,5 +1,5 @@
 from config_parse import read_config, write_config, read_or_create_config, save_config_gen, save_config_method_gen
-from general import local_path_gen, flatten, Singleton
-from runners import BooleanEvent, Oneshot, BackgroundRunner
+from general import local_path_gen, flatten, Singleton, parse_proc_meminfo
+from runners import BooleanEvent, Oneshot, BackgroundRunner, Scheduler, ScheduledJob, DeadlineTimer, WakeupPipe, monotonic
 from usability import ExitHelper
 from logger import setup_logger
@@ -23,6 +23,20 @@ def local_path_gen(_name_):
     return local_path
 
 
+def parse_proc_meminfo():
+    """ Parses /proc/meminfo and returns key:value pairs"""
+    meminfo_dict = {}
+    with open("/proc/meminfo") as f:
+        for line in f.readlines():
+            try:
+                key, value = line.split(":")
+            except:
+                continue
+            else:
+                meminfo_dict[key] = int(value.strip('\n').strip(' ').split(" ")[0])
+    return meminfo_dict
+
+
 def flatten(foo):
     for x in foo:
         if hasattr(x, '__iter__'):
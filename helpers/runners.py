@@ -1,6 +1,41 @@
 from threading import Lock, Thread, Event
+from itertools import count
 import traceback
+import select
+import fcntl
+import heapq
+import errno
 import sys
+import os
+
+try:
+    from time import monotonic
+except ImportError:
+    # Python 2 has no monotonic clock in the standard library, so calling clock_gettime() directly -
+    # wall clock time can jump back and forth (say, when NTP sets the time on a Pi without an RTC)
+    import ctypes
+    import ctypes.util
+
+    CLOCK_MONOTONIC = 1 # From <linux/time.h>
+
+    class timespec(ctypes.Structure):
+        _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+    _librt = ctypes.CDLL(ctypes.util.find_library("rt") or ctypes.util.find_library("c"), use_errno=True)
+    _clock_gettime = _librt.clock_gettime
+    _clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(timespec)]
+
+    def monotonic():
+        """Returns the time of a clock that can't go backwards, in seconds (as a float)."""
+        t = timespec()
+        if _clock_gettime(CLOCK_MONOTONIC, ctypes.byref(t)) != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        return t.tv_sec + t.tv_nsec * 1e-9
+
+from logger import setup_logger
+
+logger = setup_logger(__name__, "warning")
 
 class BooleanEvent(object):
     def __init__(self):
@@ -157,3 +192,240 @@ class BackgroundRunner(object):
         self._failed.set(False)
         self.exc_info = None
         self.return_value = None
+
+
+class WakeupPipe(object):
+    """Lets a thread sleep for a given time, and be woken up early from another thread.
+    Unlike ``Event.wait()`` with a timeout, which polls on Python 2, the thread
+    sleeps in ``select()`` on a pipe, and only wakes up when it's supposed to."""
+
+    def __init__(self):
+        self.r, self.w = os.pipe()
+        # If the pipe is full, the sleeping thread has enough wakeups pending already
+        fcntl.fcntl(self.w, fcntl.F_SETFL, fcntl.fcntl(self.w, fcntl.F_GETFL) | os.O_NONBLOCK)
+        fcntl.fcntl(self.r, fcntl.F_SETFL, fcntl.fcntl(self.r, fcntl.F_GETFL) | os.O_NONBLOCK)
+
+    def wait(self, timeout=None):
+        """Sleeps until ``wake()`` is called or until ``timeout`` runs out (if it's not None).
+        Returns True if woken up by ``wake()``. Wakeups that happened while nobody
+        was waiting are not lost - the next ``wait()`` returns immediately."""
+        readable, _, _ = select.select([self.r], [], [], timeout)
+        if readable:
+            self.clear()
+            return True
+        return False
+
+    def wake(self):
+        try:
+            os.write(self.w, b"w")
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+    def clear(self):
+        """Discards the pending wakeups."""
+        try:
+            while os.read(self.r, 1024):
+                pass
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+    def __del__(self):
+        os.close(self.r)
+        os.close(self.w)
+
+
+class DeadlineTimer(object):
+    """Lets a loop do something every ``interval`` seconds. The deadlines are
+    calculated from the previous deadline using ``monotonic()``, so the time
+    the loop takes doesn't add up, and the loop can be woken up early with
+    ``wake()`` - i.e. when the UI element it belongs to is deactivated.
+
+    Args:
+
+        * ``interval``: time between the deadlines, in seconds"""
+
+    deadline = None
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.wakeup = WakeupPipe()
+
+    def set_interval(self, interval):
+        """Changes the interval, with the next deadline ``interval`` seconds from now."""
+        self.interval = interval
+        self.reset()
+
+    def reset(self):
+        """Sets the next deadline ``interval`` seconds from now."""
+        self.deadline = monotonic()+self.interval
+
+    def wait(self):
+        """Sleeps until the next deadline. Returns True if the deadline was reached
+        (then, the next deadline is set), and False if woken up by ``wake()``."""
+        if self.deadline is None:
+            self.reset()
+        if self.wakeup.wait(max(self.deadline-monotonic(), 0)):
+            return False
+        now = monotonic()
+        self.deadline += self.interval
+        if self.deadline <= now:
+            # Missed deadlines are skipped, instead of the loop running again immediately
+            self.deadline = now+self.interval
+        return True
+
+    def wake(self):
+        """Wakes up the thread that's waiting, or makes the next ``wait()`` return immediately."""
+        self.wakeup.wake()
+
+
+class ScheduledJob(object):
+    """A job scheduled with a ``Scheduler``. Returned by ``Scheduler.schedule()``,
+    can be used to cancel the job.
+
+    Args:
+
+        * ``func``: callable to be run (without arguments)
+        * ``deadline``: time (as returned by ``monotonic()``) the job is due
+        * ``interval``: if set, the job is periodic, and is re-scheduled after each run
+        * ``tolerance``: how early (in seconds) the job can run, so that it can be
+          coalesced with jobs that are due earlier
+        * ``name``: job name, for logging"""
+
+    cancelled = False
+
+    def __init__(self, func, deadline, interval=None, tolerance=0, name=None):
+        self.func = func
+        self.deadline = deadline
+        self.interval = interval
+        self.tolerance = tolerance
+        self.name = name if name else getattr(func, "__name__", repr(func))
+
+    @property
+    def periodic(self):
+        return self.interval is not None
+
+    def cancel(self):
+        """Cancels the job - it won't run anymore, even if it's periodic."""
+        self.cancelled = True
+
+    def __repr__(self):
+        return "<ScheduledJob {} at {}>".format(self.name, self.deadline)
+
+
+class Scheduler(object):
+    """Runs one-shot and periodic jobs from a single timer thread, so that
+    things that need to happen at some point in the future don't need
+    a thread of their own, each polling with ``sleep()``.
+
+    Between the deadlines, the timer thread blocks in ``select()``, and is only
+    woken up when a job is due or when a new job is scheduled. When a job is due,
+    all the jobs that can run early (within their ``tolerance``) are run
+    together, so that the timer thread wakes up as rarely as possible.
+
+    Jobs are run one after another in the timer thread, so they should return
+    quickly - a job that needs to do something lengthy should start a thread.
+
+    Args:
+
+        * ``name``: scheduler name, used for the timer thread name"""
+
+    thread = None
+
+    def __init__(self, name="Scheduler"):
+        self.name = name
+        self.jobs = []
+        self.job_counter = count()
+        self.jobs_lock = Lock()
+        self.stop_flag = Event()
+        self.wakeup = WakeupPipe()
+
+    def schedule(self, delay, func, interval=None, tolerance=0, name=None):
+        """Schedules ``func`` to be called after ``delay`` seconds - and, if ``interval``
+        is set, every ``interval`` seconds after that. Returns a ``ScheduledJob``.
+        Starts the timer thread if it's not yet running."""
+        job = ScheduledJob(func, monotonic()+delay, interval=interval, tolerance=tolerance, name=name)
+        self.add_job(job)
+        self.start()
+        return job
+
+    def schedule_periodic(self, interval, func, tolerance=0, name=None):
+        """Schedules ``func`` to be called every ``interval`` seconds,
+        starting ``interval`` seconds from now. Returns a ``ScheduledJob``."""
+        return self.schedule(interval, func, interval=interval, tolerance=tolerance, name=name)
+
+    def cancel(self, job):
+        """Cancels a job previously returned by ``schedule()``."""
+        job.cancel()
+
+    def add_job(self, job):
+        with self.jobs_lock:
+            heapq.heappush(self.jobs, (job.deadline, next(self.job_counter), job))
+            is_first = self.jobs[0][2] is job
+        # The timer thread only needs to wake up if it's now sleeping for too long
+        if is_first:
+            self.wake()
+
+    def get_next_deadline(self):
+        """Returns the time the next job is due, or None if there are no jobs scheduled."""
+        with self.jobs_lock:
+            while self.jobs and self.jobs[0][2].cancelled:
+                heapq.heappop(self.jobs)
+            return self.jobs[0][0] if self.jobs else None
+
+    def pop_due_jobs(self, now):
+        """Removes and returns all the jobs that can be run at ``now`` - the ones
+        that are due, as well as the ones that are due soon enough to be coalesced."""
+        with self.jobs_lock:
+            due_jobs = [job for _, _, job in self.jobs if not job.cancelled and job.deadline-job.tolerance <= now]
+            if due_jobs:
+                self.jobs = [entry for entry in self.jobs if entry[2] not in due_jobs and not entry[2].cancelled]
+                heapq.heapify(self.jobs)
+        due_jobs.sort(key=lambda job: job.deadline)
+        return due_jobs
+
+    def run_pending(self, now=None):
+        """Runs the jobs that are due (re-scheduling the periodic ones) and
+        returns them. Called from the timer thread."""
+        now = monotonic() if now is None else now
+        jobs = self.pop_due_jobs(now)
+        for job in jobs:
+            try:
+                job.func()
+            except:
+                logger.exception("{}: exception in job {}".format(self.name, job.name))
+            if job.periodic and not job.cancelled:
+                job.deadline += job.interval
+                if job.deadline <= now:
+                    # Missed runs are skipped, instead of being run all at once
+                    job.deadline = now+job.interval
+                self.add_job(job)
+        return jobs
+
+    def wake(self):
+        self.wakeup.wake()
+
+    def start(self):
+        """Starts the timer thread, unless it's already running."""
+        if self.thread is not None and self.thread.isAlive():
+            return
+        self.stop_flag.clear()
+        self.thread = Thread(target=self.timer_loop, name="{} timer thread".format(self.name))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Signals the timer thread to exit. Scheduled jobs are kept."""
+        self.stop_flag.set()
+        self.wake()
+
+    def timer_loop(self):
+        while not self.stop_flag.isSet():
+            deadline = self.get_next_deadline()
+            timeout = None if deadline is None else max(deadline-monotonic(), 0)
+            if timeout != 0:
+                if self.wakeup.wait(timeout):
+                    # Woken up - a new job was added, or the scheduler is stopping
+                    continue
+            self.run_pending()
@@ -24,11 +24,8 @@ class ExitHelper(object):
         self.set_callback(cb)
 
     def start(self):
-        """Clears input device keymap, registers callbacks and enables input listener."""
-        self.i.stop_listen()
-        self.i.clear_keymap()
-        keymap = {key:self.callback for key in self.keys}
-        self.i.set_keymap(keymap)
+        """Replaces input device keymap with the exit callbacks and enables input listener."""
+        self.i.set_keymap(self.keymap)
         self.i.listen()
         self.started = True
         return self #Allows shortened usage, like eh = ExitHelper(i).start()
@@ -43,6 +40,7 @@ class ExitHelper(object):
                 self._do_exit.set()
                 callback()
             self.callback = wrapper
+        self.keymap = {key:self.callback for key in self.keys}
 
     def do_exit(self):
         """Returns ``True`` once exit flag has been set, ``False`` otherwise."""
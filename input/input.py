@@ -1,5 +1,5 @@
 from traceback import format_exc
-from threading import Thread, Event
+from threading import Thread, Event, Lock, current_thread
 from time import sleep
 from copy import copy
 import importlib
@@ -23,7 +23,8 @@ class CallbackException(Exception):
 class InputProcessor(object):
     """A class which listens for input device events and processes the callbacks 
     set in the InputProxy instance for the currently active context."""
-    stop_flag = None
+    processor_thread = None
+    exiting = False
     thread_index = 0
     backlight_cb = None
 
@@ -37,6 +38,9 @@ class InputProcessor(object):
         self.cm = context_manager
         self.queue = Queue.Queue()
         self.available_keys = {}
+        self.loop_lock = Lock()
+        self.idle_loops = [] # Event loop threads waiting to be reused, with Events that wake them up
+        self.busy_loops = set() # Event loop threads that are running a callback
         for driver_name, driver in self.drivers.items():
             driver.send_key = self.receive_key #Overriding the send_key method so that keycodes get sent to InputListener
             self.available_keys[driver_name] = driver.available_keys
@@ -99,38 +103,51 @@ class InputProcessor(object):
         """
         self.queue.put(key)
 
-    def event_loop(self, index):
+    def event_loop(self):
         """
         Blocking event loop which just calls ``process_key`` once a key
-        is received in the ``self.queue``. Also has some mechanisms that
-        make sure the existing event_loop will exit once flag is set, even
-        if other event_loop has already started (thought an event_loop can't
-        exit if it's still processing a callback.)
+        is received in the ``self.queue``. Only the thread that's currently
+        ``self.processor_thread`` processes keys - once it's not (it was stopped
+        or another thread took over while it was busy with a callback), it
+        waits until ``listen()`` needs an event loop thread again.
         """
-        logger.debug("Starting event loop "+str(index))
-        self.stop_flag = Event()
-        stop_flag = self.stop_flag # Saving a reference.
-        # stop_flag is an object that will signal the current input thread to exit or not exit once it's done processing a callback.
-        # It'll be called just before self.stop_flag will be overwritten. However, we've got a reference to it and now can check the exact flag this thread itself constructed.
-        # Praise the holy garbage collector.
-        stop_flag.clear()
-        while not stop_flag.isSet():
-            if self.get_current_proxy() is not None:
-                try:
-                    key = self.queue.get(False, 0.1)
-                except Queue.Empty:
-                    # here an active event_loop spends most of the time
-                    sleep(0.1)
-                except AttributeError:
-                    # typically happens upon program termination
-                    pass
-                else:
-                    # here event_loop is usually busy
-                    self.process_key(key)
-            else:
+        thread = current_thread()
+        wake = Event()
+        logger.debug("Starting event loop {}".format(thread.name))
+        while True:
+            with self.loop_lock:
+                is_current = self.processor_thread is thread
+                if not is_current:
+                    if self.exiting:
+                        break
+                    wake.clear()
+                    self.idle_loops.append((thread, wake))
+            if not is_current:
+                logger.debug("Event loop {} is idle".format(thread.name))
+                wake.wait()
+                continue
+            if self.get_current_proxy() is None:
                 # No current proxy set yet, not processing anything
                 sleep(0.1)
-        logger.debug("Stopping event loop "+str(index))
+                continue
+            try:
+                key = self.queue.get(True, 0.1)
+            except Queue.Empty:
+                # here an active event_loop spends most of the time
+                pass
+            except AttributeError:
+                # typically happens upon program termination
+                pass
+            else:
+                # here event_loop is usually busy
+                with self.loop_lock:
+                    self.busy_loops.add(thread)
+                try:
+                    self.process_key(key)
+                finally:
+                    with self.loop_lock:
+                        self.busy_loops.discard(thread)
+        logger.debug("Stopping event loop {}".format(thread.name))
 
     def process_key(self, key):
         """
@@ -212,28 +229,52 @@ class InputProcessor(object):
             return
 
     def listen(self):
-        """Start event_loop in a thread. Nonblocking."""
-        self.processor_thread = Thread(target = self.event_loop, name="InputThread-"+str(self.thread_index), args=(self.thread_index, ))
-        self.thread_index += 1
-        self.processor_thread.daemon = True
-        self.processor_thread.start()
+        """
+        Makes sure that an ``event_loop`` thread is processing keys. Nonblocking.
+
+        If the thread processing keys is running a callback (say, one that activates
+        a submenu and blocks until the submenu exits - or one that waits while a UI
+        element runs in another thread), key processing is handed over to another
+        thread, so that keys keep being processed while the callback runs. Threads
+        that were handed over from are reused once their callbacks return, so entering
+        and leaving UI elements doesn't start new threads. Otherwise, if a thread is
+        already processing keys, does nothing.
+        """
+        with self.loop_lock:
+            if self.processor_thread is not None and self.processor_thread is not current_thread() \
+                    and self.processor_thread not in self.busy_loops:
+                return
+            if self.idle_loops:
+                self.processor_thread, wake = self.idle_loops.pop()
+                wake.set()
+            else:
+                self.processor_thread = Thread(target=self.event_loop, name="InputThread-"+str(self.thread_index))
+                self.thread_index += 1
+                self.processor_thread.daemon = True
+                self.processor_thread.start()
 
     def stop_listen(self):
-        """This sets a flag for ``event_loop`` to stop. If the ``event_loop()`` is 
-        currently executing a callback, it will exit as soon as the callback will 
+        """Stops the ``event_loop`` from processing keys. If the ``event_loop()`` is
+        currently executing a callback, it will stop as soon as the callback will
         finish executing."""
-        if self.stop_flag is not None:
-            self.stop_flag.set()
+        with self.loop_lock:
+            self.processor_thread = None
 
     def atexit(self):
         """Exits driver (if necessary) if something wrong happened or ZPUI exits. Also, stops the InputProcessor, and all the associated drivers."""
-        self.stop_listen()
+        processor_thread = self.processor_thread
+        with self.loop_lock:
+            self.exiting = True
+            self.processor_thread = None
+            for _, wake in self.idle_loops:
+                wake.set()
+            self.idle_loops = []
         for driver in self.drivers.values():
             driver.stop()
             if hasattr(driver, "atexit"):
                 driver.atexit()
         try:
-            self.processor_thread.join()
+            processor_thread.join()
         except AttributeError:
             pass
 
@@ -297,6 +338,8 @@ class InputProxy(object):
         >>> "KEY_ENTER" in i.keymap
         True
         """
+        # Keymaps are set without copying, so they're copied before being changed
+        self.keymap = dict(self.keymap)
         self.keymap[key_name] = callback
 
     def check_special_callback(self, key_name):
@@ -334,6 +377,7 @@ class InputProxy(object):
 
     def remove_callback(self, key_name):
         """Removes a single callback."""
+        self.keymap = dict(self.keymap)
         self.keymap.pop(key_name)
 
     def remove_maskable_callback(self, key_name):
@@ -345,7 +389,10 @@ class InputProxy(object):
         return self.keymap
 
     def set_keymap(self, new_keymap):
-        """Sets all the callbacks supplied, removing the previously set keymap completely."""
+        """Sets all the callbacks supplied, removing the previously set keymap completely.
+        The keymap isn't copied - it's swapped in as a whole, so UI elements can build
+        their keymaps once and set them each time they're activated. Methods that change
+        a single callback, like ``set_callback``, change a copy of it instead."""
         self.keymap = new_keymap
 
     def update_keymap(self, new_keymap):
@@ -368,6 +415,7 @@ class InputProxy(object):
         >>> i.keymap["KEY_1"]()
         4
         """
+        self.keymap = dict(self.keymap)
         self.keymap.update(new_keymap)
 
     def clear_keymap(self):
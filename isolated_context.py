@@ -0,0 +1,371 @@
+"""
+This module allows running a context's target in a separate process, so that
+CPU-heavy apps don't compete with ZPUI input processing for the GIL, and
+so that an app that crashes or hangs can't take the whole UI down with it.
+
+The context process is forked from the ZPUI process once the context is
+activated, and communicates with it over a ``multiprocessing.Pipe`` - in
+both directions, unlike the emulator. Frames are not sent over the pipe -
+instead, they're written into a shared memory buffer, and only a short
+notification is sent (on character displays, which have no framebuffer,
+output calls are sent over the pipe instead). Keypresses are sent from the ZPUI
+process to the context process, where they're dispatched to the app's callbacks.
+Events the app subscribes to are also sent to the context process, where the
+app's subscriber callbacks are called.
+
+Since the app is running in a forked process, changes the app makes to
+its global state are not visible to ZPUI, and are lost once the app exits.
+"""
+
+import ctypes
+import Queue
+from multiprocessing import Process, Pipe, Lock as ProcessLock
+from multiprocessing.sharedctypes import RawArray, RawValue
+from threading import Thread, Lock, Event
+
+from PIL import Image
+
+from context_manager import EventBus, ContextEvent
+from helpers import setup_logger
+
+logger = setup_logger(__name__, "info")
+
+
+class SharedFramebuffer(object):
+    """
+    A buffer in shared memory that holds one frame (as returned by ``PIL.Image.tobytes()``)
+    for a display of the given size and mode. Frames are written and read whole,
+    under a lock, so that the reader never gets a half-written frame.
+    """
+
+    def __init__(self, size, mode):
+        self.size = size
+        self.mode = mode
+        self.frame_length = len(Image.new(mode, size).tobytes())
+        self.buffer = RawArray(ctypes.c_char, self.frame_length)
+        self.frame_number = RawValue(ctypes.c_ulong, 0)
+        self.lock = ProcessLock()
+
+    def write(self, image):
+        """
+        Writes an image into the buffer, converting it into the buffer's mode
+        if necessary. Returns the frame number.
+        """
+        if image.mode != self.mode:
+            image = image.convert(self.mode)
+        if image.size != self.size:
+            raise ValueError("Image size {} doesn't match the framebuffer size {}!".format(image.size, self.size))
+        data = image.tobytes()
+        with self.lock:
+            ctypes.memmove(self.buffer, data, self.frame_length)
+            self.frame_number.value += 1
+            return self.frame_number.value
+
+    def read(self):
+        """
+        Returns the number of the frame currently stored in the buffer,
+        and the frame itself as an image.
+        """
+        with self.lock:
+            data = self.buffer.raw
+            frame_number = self.frame_number.value
+        return frame_number, Image.frombytes(self.mode, self.size, data)
+
+
+class IsolatedContextHost(object):
+    """
+    Runs a context's target in a separate process and bridges the context's
+    ``InputProxy`` and ``OutputProxy`` to that process. ``run()`` blocks until
+    the process exits, so it's meant to be called from the context's thread.
+    """
+
+    poll_interval = 0.1
+    process = None
+    last_frame = 0
+
+    def __init__(self, context, target):
+        self.context = context
+        self.target = target
+        self.i, self.o = context.get_io()
+        if "b&w-pixel" in self.o.type:
+            self.framebuffer = SharedFramebuffer((self.o.width, self.o.height), self.o.device_mode)
+        else:
+            # Character displays only get display_data() calls, which are sent over the pipe
+            self.framebuffer = None
+        self.send_lock = Lock()
+        self.subscriptions = set()
+
+    def run(self):
+        """
+        Starts the context process and processes messages from it until it exits.
+        """
+        self.conn, child_conn = Pipe()
+        self.process = Process(target=run_isolated_target, name="ZPUI context {}".format(self.context.name),
+                               args=(self.context, self.target, child_conn, self.framebuffer))
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+        saved_keymaps = self.forward_input()
+        try:
+            self.process_messages()
+        finally:
+            self.restore_input(saved_keymaps)
+            for event_type in list(self.subscriptions):
+                self.unsubscribe(event_type)
+            self.process.join(self.poll_interval)
+            logger.info("Process for context {} exited with code {}".format(self.context.name, self.process.exitcode))
+
+    def terminate(self):
+        """
+        Kills the context process - for when an app hangs.
+        """
+        if self.process is not None and self.process.is_alive():
+            logger.warning("Terminating process for context {}".format(self.context.name))
+            self.process.terminate()
+
+    def forward_input(self):
+        """
+        Makes the ZPUI-side InputProxy forward all keys to the context process,
+        where the app's callbacks are. Returns the keymaps replaced, so that
+        they can be restored with ``restore_input()`` afterwards.
+        """
+        saved_keymaps = (self.i.keymap, self.i.maskable_keymap, self.i.nonmaskable_keymap, self.i.streaming)
+        self.i.keymap = {}
+        self.i.maskable_keymap = {}
+        self.i.nonmaskable_keymap = {}
+        self.i.streaming = self.forward_key
+        return saved_keymaps
+
+    def restore_input(self, saved_keymaps):
+        self.i.keymap, self.i.maskable_keymap, self.i.nonmaskable_keymap, self.i.streaming = saved_keymaps
+
+    def forward_key(self, key, *args, **kwargs):
+        self.send(("key", key))
+
+    def send(self, message):
+        with self.send_lock:
+            try:
+                self.conn.send(message)
+            except (IOError, EOFError):
+                logger.debug("Context {}: process is gone, couldn't send {}".format(self.context.name, message[0]))
+
+    def forward_event(self, event):
+        self.send(("notify", ) + tuple(event))
+
+    def subscribe(self, event_type):
+        """
+        Subscribes to events of the given type on behalf of the context process -
+        the process only asks once for each event type, and keeps its own subscribers.
+        """
+        if event_type not in self.subscriptions:
+            self.subscriptions.add(event_type)
+            self.context.subscribe(event_type, self.forward_event)
+
+    def unsubscribe(self, event_type):
+        if event_type in self.subscriptions:
+            self.subscriptions.remove(event_type)
+            self.context.unsubscribe(event_type, self.forward_event)
+
+    def process_messages(self):
+        while True:
+            try:
+                if not self.conn.poll(self.poll_interval):
+                    if not self.process.is_alive():
+                        break
+                    continue
+                message = self.conn.recv()
+            except (IOError, EOFError):
+                break
+            try:
+                self.process_message(message)
+            except:
+                logger.exception("Context {}: exception while processing message {}".format(self.context.name, message[0]))
+
+    def process_message(self, message):
+        message_type = message[0]
+        if message_type == "frame":
+            # Frames that were overwritten before we got to them are skipped
+            if self.framebuffer.frame_number.value != self.last_frame:
+                self.last_frame, image = self.framebuffer.read()
+                self.o.display_image(image)
+        elif message_type == "output":
+            _, method_name, args, kwargs = message
+            getattr(self.o, method_name)(*args, **kwargs)
+        elif message_type == "event":
+            _, request_id, event, args, kwargs = message
+            try:
+                result = self.context.event_cb(self.context.name, event, *args, **kwargs)
+            except Exception as e:
+                logger.exception("Context {}: exception while processing event {}".format(self.context.name, event))
+                result = None
+            self.send(("result", request_id, result))
+        elif message_type == "post":
+            _, event, args, kwargs = message
+            self.context.post_event(event, *args, **kwargs)
+        elif message_type == "subscribe":
+            self.subscribe(message[1])
+        elif message_type == "unsubscribe":
+            self.unsubscribe(message[1])
+        else:
+            logger.warning("Context {}: unknown message {}".format(self.context.name, message_type))
+
+
+class ChildBridge(object):
+    """
+    The context process side of ``IsolatedContextHost``. Redirects the proxies and
+    the context object (as inherited from the ZPUI process) to the pipe and the
+    shared framebuffer, and dispatches keys received from ZPUI to the app's callbacks.
+    """
+
+    direct_methods = ["display_image", "display_data_onto_image", "get_current_image", "on_attach"]
+
+    def __init__(self, conn, framebuffer):
+        self.conn = conn
+        self.framebuffer = framebuffer
+        self.send_lock = Lock()
+        self.request_count = 0
+        self.requests = {}
+        self.results = {}
+        self.key_queue = Queue.Queue()
+
+    def send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+
+    def attach(self, context):
+        i, o = context.get_io()
+        self.i = i
+        self.attach_output(o)
+        # The InputProcessor only exists in the ZPUI process
+        i.listen = lambda *a, **k: None
+        i.stop_listen = lambda *a, **k: None
+        context.event_cb = self.send_event
+        self.event_bus = ChildEventBus(self)
+        context.event_bus = self.event_bus
+        # Callbacks might send events and wait for results, so they can't be
+        # called from the thread that receives the results
+        for target in (self.receive, self.key_loop):
+            t = Thread(target=target, name="Context bridge thread ({})".format(target.__name__))
+            t.daemon = True
+            t.start()
+
+    def attach_output(self, o):
+        direct_methods = self.direct_methods
+        if self.framebuffer is not None:
+            def display_image(image):
+                o.current_image = image
+                self.framebuffer.write(image)
+                self.send(("frame", ))
+            o.display_image = display_image
+        else:
+            direct_methods = [name for name in direct_methods if name != "display_image"]
+        for name, value in o.__dict__.items():
+            if callable(value) and not name.startswith("_") and name not in direct_methods:
+                setattr(o, name, self.get_output_forwarder(name))
+
+    def get_output_forwarder(self, method_name):
+        def forwarder(*args, **kwargs):
+            self.send(("output", method_name, args, kwargs))
+        forwarder.__name__ = method_name
+        return forwarder
+
+    def send_event(self, context_alias, event, *args, **kwargs):
+        """
+        Sends an event to the ContextManager in the ZPUI process and waits for the result.
+        """
+        with self.send_lock:
+            self.request_count += 1
+            request_id = self.request_count
+            self.requests[request_id] = Event()
+            self.conn.send(("event", request_id, event, args, kwargs))
+        self.requests[request_id].wait()
+        self.requests.pop(request_id)
+        return self.results.pop(request_id)
+
+    def receive(self):
+        while True:
+            try:
+                message = self.conn.recv()
+            except (IOError, EOFError):
+                break
+            if message[0] == "key":
+                self.key_queue.put(message[1])
+            elif message[0] == "result":
+                _, request_id, result = message
+                self.results[request_id] = result
+                self.requests[request_id].set()
+            elif message[0] == "notify":
+                self.event_bus.notify_subscribers(ContextEvent(*message[1:]))
+
+    def key_loop(self):
+        while True:
+            self.process_key(self.key_queue.get())
+
+    def process_key(self, key):
+        """
+        Looks up a callback for the key in the app's keymaps - the same way
+        ``InputProcessor.process_key`` does it - and calls it.
+        """
+        i = self.i
+        if key in i.nonmaskable_keymap:
+            callback, pass_key = i.nonmaskable_keymap[key], False
+        elif key in i.keymap:
+            callback, pass_key = i.keymap[key], False
+        elif key in i.maskable_keymap:
+            callback, pass_key = i.maskable_keymap[key], False
+        elif callable(i.streaming):
+            callback, pass_key = i.streaming, True
+        else:
+            return
+        try:
+            if pass_key:
+                callback(key)
+            else:
+                callback()
+        except:
+            logger.exception("Exception in callback {} for key {}".format(callback, key))
+
+
+class ChildEventBus(EventBus):
+    """
+    Stands in for the ContextManager's ``EventBus`` in the context process -
+    posted events are sent to the ZPUI process. Subscribers are kept in the
+    context process, and the ZPUI process is asked to send events of the types
+    that have subscribers, which are then passed to the subscribers by this
+    event bus' thread.
+    """
+
+    def __init__(self, bridge):
+        EventBus.__init__(self, name="Context bridge event bus")
+        self.bridge = bridge
+
+    def post(self, event):
+        self.bridge.send(("post", event.type, event.args, event.kwargs))
+
+    def subscribe(self, event_type, callback):
+        with self.subscriber_lock:
+            first = not self.subscribers.get(event_type, None)
+            self.subscribers.setdefault(event_type, []).append(callback)
+        if first:
+            self.bridge.send(("subscribe", event_type))
+
+    def unsubscribe(self, event_type, callback):
+        with self.subscriber_lock:
+            callbacks = self.subscribers.get(event_type, [])
+            if callback not in callbacks:
+                return
+            callbacks.remove(callback)
+            last = not callbacks
+        if last:
+            self.bridge.send(("unsubscribe", event_type))
+
+
+def run_isolated_target(context, target, conn, framebuffer):
+    """
+    Entry point of the context process.
+    """
+    ChildBridge(conn, framebuffer).attach(context)
+    try:
+        target()
+    finally:
+        conn.close()
@@ -15,6 +15,7 @@ from helpers import read_config, local_path_gen
 from input import input
 from output import output
 from ui import Printer
+from ui.rendering import render_scheduler
 import helpers.logger
 
 emulator_flag_filename = "emulator"
@@ -72,8 +73,11 @@ def init():
         logging.exception(traceback.format_exc())
         sys.exit(2)
 
+    # UI elements draw their frames on the render thread from now on
+    render_scheduler.start()
+
     # Initialize the context manager
-    cm = ContextManager()
+    cm = ContextManager(config=config.get("context_manager", {}))
 
     # Initialize input
     try:
@@ -90,6 +94,7 @@ def init():
         screen.set_backlight_callback(input_processor)
     cm.init_io(input_processor, screen)
     cm.switch_to_context("main")
+    cm.start_monitor()
     i, o = cm.get_io_for_context("main")
 
     return i, o
@@ -3,7 +3,7 @@
 from luma_driver import LumaScreen
 from luma.oled.device import ssd1306
 
-from output.output import OutputDevice
+from output.output import OutputDevice, image_to_pages
 
 
 class Screen(LumaScreen, OutputDevice):
@@ -12,3 +12,14 @@ class Screen(LumaScreen, OutputDevice):
     def init_display(self, autoscroll=False, **kwargs):
         """Initializes SH1106 controller. """
         self.device = ssd1306(self.serial, width=128, height=64)
+
+    def _display_image(self, image):
+        # luma.oled converts images into the controller's page format pixel by pixel;
+        # when the image doesn't need to be rotated, it's converted here instead
+        device = self.device
+        if image.mode == "1" and getattr(device, "rotate", None) == 0 and hasattr(device, "_colstart"):
+            device.command(device._const.COLUMNADDR, device._colstart, device._colend - 1,
+                           device._const.PAGEADDR, 0x00, device._pages - 1)
+            device.data(list(image_to_pages(image)))
+        else:
+            device.display(image)
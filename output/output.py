@@ -2,6 +2,8 @@ from functools import wraps
 from copy import deepcopy
 import importlib
 
+from PIL import Image
+
 # These base classes document functions that
 # different output devices are expected to have.
 
@@ -144,6 +146,21 @@ class GraphicalOutputDevice(OutputDevice):
         """
         raise NotImplementedError
 
+def image_to_pages(image):
+    """
+    Converts a "1" image into the format used by SSD1306-like display controllers -
+    for each page (a strip 8 pixels high), one byte per column, with the topmost
+    pixel in the LSB. The image height has to be a multiple of 8.
+    """
+    width, height = image.size
+    pages = height // 8
+    # After flipping and transposing, each row of the image is a column of the original
+    # image, bottom to top, and tobytes() packs each 8 pixels of it into a byte, MSB first -
+    # so each byte is a column of a page, with the topmost pixel of it in the LSB.
+    data = image.transpose(Image.FLIP_TOP_BOTTOM).transpose(Image.TRANSPOSE).tobytes()
+    return bytearray(b"".join([data[pages - 1 - page::pages] for page in range(pages)]))
+
+
 class OutputProxy(CharacterOutputDevice, GraphicalOutputDevice):
 
     current_image = None
@@ -173,7 +190,19 @@ class OutputProxy(CharacterOutputDevice, GraphicalOutputDevice):
     def _setCursor(self, *position):
         self.__cursor_position = position
 
+    def _preserve_frame(self):
+        # The image shown can belong to a canvas that's reused for drawing
+        # frames (see ui.canvas.get_canvas()), so a copy of it is kept instead
+        if self.current_image:
+            self.current_image = self.current_image.copy()
+
     def get_current_image(self):
+        """
+        Returns a copy of the image that's currently on the proxy (or None),
+        so that it won't change once the next frame is drawn.
+        """
+        if self.current_image:
+            return self.current_image.copy()
         return self.current_image
 
     def on_attach(self):
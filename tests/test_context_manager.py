@@ -3,10 +3,11 @@ import os
 import unittest
 
 from threading import Event
+from time import time
 from mock import patch, Mock
 
 try:
-    from context_manager import ContextManager, Context, ContextError
+    from context_manager import ContextManager, Context, ContextError, EventBus, ContextEvent
 except ImportError:
     print("Absolute imports failed, trying relative imports")
     os.sys.path.append(os.path.dirname(os.path.abspath('.')))
@@ -22,7 +23,7 @@ except ImportError:
         return orig_import(name, *args, **kwargs)
 
     with patch('__builtin__.__import__', side_effect=import_mock):
-        from context_manager import ContextManager, Context, ContextError
+        from context_manager import ContextManager, Context, ContextError, EventBus, ContextEvent
 
 class TestContext(unittest.TestCase):
     """tests context class"""
@@ -65,6 +66,47 @@ class TestContext(unittest.TestCase):
         else:
             pass
 
+    def test_frame_preserved_on_finish(self):
+        """Tests whether the last frame is kept in the output proxy once the context finishes"""
+        c = Context("test_context", lambda *a, **k: True)
+        o = Mock()
+        c.set_io(Mock(), o)
+        c.signal_finished()
+        assert(not o._clear.called)
+        assert(o._preserve_frame.called)
+        c.preserve_frame = False
+        c.signal_finished()
+        assert(o._clear.called)
+
+
+class TestEventBus(unittest.TestCase):
+    """tests the event bus used by the context manager"""
+    def test_call(self):
+        """Tests whether synchronous calls return the handler's result"""
+        eb = EventBus()
+        eb.register_handler("test", lambda e: e.args[0]*2)
+        assert(eb.call(ContextEvent("test", "c", (2, ), {})) == 4)
+        # Unknown events don't raise exceptions
+        assert(eb.call(ContextEvent("unknown", "c", (), {})) is None)
+
+    def test_post_and_subscribe(self):
+        """Tests whether posted events are handled and subscribers are notified"""
+        eb = EventBus()
+        handled = Event()
+        received = []
+        notified = Event()
+        def subscriber(e):
+            received.append(e)
+            notified.set()
+        eb.register_handler("test", lambda e: handled.set())
+        eb.subscribe("test", subscriber)
+        eb.post(ContextEvent("test", "c", (), {}))
+        assert(handled.wait(1))
+        assert(notified.wait(1))
+        assert(received[0].context_alias == "c")
+        eb.unsubscribe("test", subscriber)
+        assert(eb.subscribers["test"] == [])
+
 
 class TestContextManager(unittest.TestCase):
     """tests context manager class and interaction between contexts"""
@@ -126,6 +168,132 @@ class TestContextManager(unittest.TestCase):
             finished.wait()
         assert(cm.current_context == cm.fallback_context)
 
+    def test_switch_latency(self):
+        """Tests whether context switch latency is recorded and available to contexts"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        c = cm.contexts[cm.fallback_context]
+        assert(c.get_switch_latency() is None)
+        cm.switch_to_context(cm.fallback_context)
+        latency = c.get_switch_latency()
+        assert(latency is not None)
+        assert(latency >= 0)
+        assert(latency == cm.get_switch_latency(cm.fallback_context))
+
+    def test_context_states(self):
+        """Tests whether context lifecycle states change as contexts are switched"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        cm.switch_to_context(cm.fallback_context)
+        c = cm.create_context("test1")
+        assert(c.state == "unloaded")
+        e1 = Event()
+        cm.register_context_target("test1", e1.wait)
+        assert(c.state == "loaded")
+        cm.switch_to_context("test1")
+        assert(c.state == "active")
+        assert(cm.get_context_state(cm.fallback_context) == "background")
+        cm.switch_to_context(cm.fallback_context)
+        assert(c.state == "background")
+        # The thread is still running, so the context can't be suspended
+        assert(cm.get_suspendable_contexts() == [])
+        e1.set()
+        c.thread.join()
+        assert(cm.get_suspendable_contexts() == ["test1"])
+
+    def test_suspend_idle_contexts(self):
+        """Tests whether idle contexts get suspended, with suspend hooks called"""
+        cm = ContextManager(config={"suspend_timeout":60})
+        cm.init_io(Mock(), Mock())
+        cm.switch_to_context(cm.fallback_context)
+        c1 = cm.create_context("test1")
+        c2 = cm.create_context("test2")
+        cm.register_context_target("test1", lambda: True)
+        cm.register_context_target("test2", lambda: True)
+        hook = Mock()
+        c1.set_suspend_hook(hook)
+        c1.last_active = 0
+        c2.last_active = 0
+        c1.o.current_image = Mock()
+        assert(sorted(cm.suspend_idle_contexts()) == ["test1", "test2"])
+        assert(hook.called)
+        assert(c1.o.get_current_image() is None)
+        assert(c1.state == "suspended")
+        # Suspended contexts are not suspended again
+        assert(cm.suspend_idle_contexts() == [])
+        assert(hook.call_count == 1)
+        # Recently used contexts are not suspended
+        c3 = cm.create_context("test3")
+        cm.register_context_target("test3", lambda: True)
+        c3.last_active = time()
+        assert(cm.suspend_idle_contexts() == [])
+
+    def test_reclaim_memory(self):
+        """Tests whether least recently used contexts get suspended while memory is low"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        cm.switch_to_context(cm.fallback_context)
+        for i, name in enumerate(["test1", "test2", "test3"]):
+            c = cm.create_context(name)
+            cm.register_context_target(name, lambda: True)
+            c.last_active = i
+        # Memory is only low for two checks
+        with patch.object(cm, 'memory_is_low', side_effect=[True, True, False]):
+            assert(cm.reclaim_memory() == ["test1", "test2"])
+        assert(cm.get_context_state("test3") == "loaded")
+
+    def test_context_switch_subscription(self):
+        """Tests whether contexts can subscribe to context switch events"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        c = cm.contexts[cm.fallback_context]
+        received = []
+        notified = Event()
+        def on_switch(event):
+            received.append(event.args)
+            notified.set()
+        c.subscribe("context_switched", on_switch)
+        cm.switch_to_context(cm.fallback_context)
+        assert(notified.wait(1))
+        assert(received == [(None, cm.fallback_context)])
+
+    def test_async_events(self):
+        """Tests whether contexts can post notifications and foreground requests asynchronously"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        cm.switch_to_context(cm.fallback_context)
+        notified = Event()
+        cm.event_bus.subscribe("notification", lambda e: notified.set())
+        e1 = Event()
+        c = cm.create_context("test1")
+        cm.register_context_target("test1", e1.wait)
+        c.notify("New message")
+        assert(notified.wait(1))
+        switched = Event()
+        cm.event_bus.subscribe("context_switched", lambda e: switched.set())
+        c.request_foreground()
+        assert(switched.wait(1))
+        assert(cm.current_context == "test1")
+        e1.set()
+
+    def test_scheduled_jobs(self):
+        """Tests whether contexts can schedule jobs, and get switched to when they fire"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        cm.switch_to_context(cm.fallback_context)
+        fired = Event()
+        e1 = Event()
+        c = cm.create_context("test1")
+        cm.register_context_target("test1", e1.wait)
+        job = c.schedule(0, lambda: None, interval=10)
+        assert(job.periodic)
+        job.cancel()
+        c.schedule(0.01, fired.set, switch=True)
+        assert(fired.wait(1))
+        assert(cm.current_context == "test1")
+        e1.set()
+        cm.scheduler.stop()
+
     def test_targetless_context_switching(self):
         """Tests that switching to a target-less context fails"""
         cm = ContextManager()
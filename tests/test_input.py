@@ -0,0 +1,125 @@
+"""tests for InputProcessor key processing threads"""
+import os
+import unittest
+
+from threading import Event, Thread
+from mock import patch, Mock
+
+try:
+    from input.input import InputProcessor, InputProxy
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args, **kwargs):
+        if name in ['helpers'] and not kwargs:
+            return Mock()
+        return orig_import(name, *args, **kwargs)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from input.input import InputProcessor, InputProxy
+
+
+def get_input_processor():
+    with patch('atexit.register'):
+        ip = InputProcessor({}, Mock())
+    proxy = InputProxy("test")
+    ip.attach_proxy(proxy)
+    return ip, proxy
+
+
+class TestInputProcessor(unittest.TestCase):
+    """tests InputProcessor class"""
+
+    def test_listen_keeps_thread(self):
+        """Tests that calling listen() again doesn't restart the event loop"""
+        ip, proxy = get_input_processor()
+        try:
+            ip.listen()
+            thread = ip.processor_thread
+            ip.listen()
+            assert ip.processor_thread is thread
+            assert ip.thread_index == 1
+        finally:
+            ip.atexit()
+
+    def test_nested_callbacks(self):
+        """Tests that keys are processed while a callback blocks, and that
+        the threads are reused when callbacks that block are entered again"""
+        ip, proxy = get_input_processor()
+        done = Event()
+        submenu_exited = Event()
+
+        def enter_submenu():
+            # What a Menu does when a submenu is activated from a callback
+            proxy.set_keymap(submenu_keymap)
+            ip.listen()
+            submenu_exited.wait()
+            proxy.set_keymap(menu_keymap)
+            ip.listen()
+            done.set()
+
+        menu_keymap = {"KEY_ENTER": enter_submenu}
+        submenu_keymap = {"KEY_LEFT": submenu_exited.set}
+        proxy.set_keymap(menu_keymap)
+        try:
+            ip.listen()
+            for _ in range(3):
+                done.clear()
+                submenu_exited.clear()
+                ip.receive_key("KEY_ENTER")
+                ip.receive_key("KEY_LEFT")
+                assert done.wait(5)
+            assert proxy.keymap is menu_keymap
+            # One thread processing keys, one that blocked in a callback - and, at most,
+            # one more if the callback returned before the other thread was done with its callback
+            assert ip.thread_index <= 3
+        finally:
+            ip.atexit()
+
+    def test_listen_from_background_thread(self):
+        """Tests that keys are processed for a UI element started from another thread
+        while the thread processing keys waits in a callback"""
+        ip, proxy = get_input_processor()
+        callback_waiting = Event()
+        left_pressed = Event()
+
+        def wait_for_background_element():
+            callback_waiting.set()
+            left_pressed.wait(5)
+
+        def background_element():
+            # What, say, an ExitHelper does in an app's thread
+            callback_waiting.wait(5)
+            proxy.set_keymap({"KEY_LEFT": left_pressed.set})
+            ip.listen()
+
+        proxy.set_keymap({"KEY_ENTER": wait_for_background_element})
+        try:
+            ip.listen()
+            t = Thread(target=background_element)
+            t.daemon = True
+            t.start()
+            ip.receive_key("KEY_ENTER")
+            t.join(5)
+            ip.receive_key("KEY_LEFT")
+            assert left_pressed.wait(2)
+        finally:
+            left_pressed.set()
+            ip.atexit()
+
+    def test_set_callback_copies_keymap(self):
+        """Tests that changing a single callback doesn't change the keymap that was set"""
+        ip, proxy = get_input_processor()
+        keymap = {"KEY_LEFT": lambda: None}
+        proxy.set_keymap(keymap)
+        proxy.set_callback("KEY_ENTER", lambda: None)
+        proxy.remove_callback("KEY_LEFT")
+        assert keymap.keys() == ["KEY_LEFT"]
+        assert proxy.keymap.keys() == ["KEY_ENTER"]
+
+
+if __name__ == '__main__':
+    unittest.main()
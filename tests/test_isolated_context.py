@@ -0,0 +1,143 @@
+"""tests for running contexts in separate processes"""
+import os
+import unittest
+
+from threading import Event
+from mock import patch, Mock
+from PIL import Image
+
+try:
+    from context_manager import ContextManager, ContextEvent
+    from isolated_context import SharedFramebuffer
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args, **kwargs):
+        if name in ['helpers'] and not kwargs:
+            return Mock()
+        return orig_import(name, *args, **kwargs)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from context_manager import ContextManager, ContextEvent
+        from isolated_context import SharedFramebuffer
+
+
+class TestSharedFramebuffer(unittest.TestCase):
+    """tests the shared memory framebuffer"""
+    def test_write_read(self):
+        """Tests whether images survive a round trip through the framebuffer"""
+        fb = SharedFramebuffer((128, 64), "1")
+        image = Image.new("1", (128, 64))
+        image.putpixel((10, 20), 1)
+        assert(fb.write(image) == 1)
+        frame_number, read_image = fb.read()
+        assert(frame_number == 1)
+        assert(read_image.tobytes() == image.tobytes())
+        # Images in other modes are converted
+        assert(fb.write(image.convert("L")) == 2)
+        assert(fb.read()[1].tobytes() == image.tobytes())
+
+    def test_wrong_size(self):
+        """Tests whether images of a wrong size are refused"""
+        fb = SharedFramebuffer((128, 64), "1")
+        with self.assertRaises(ValueError):
+            fb.write(Image.new("1", (64, 32)))
+
+
+class TestIsolatedContext(unittest.TestCase):
+    """tests isolated contexts"""
+    def test_isolated_context(self):
+        """Tests whether frames, output calls and keys get through to and from the context process"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        cm.switch_to_context(cm.fallback_context)
+        c = cm.create_context("test1")
+        c.isolated = True
+        i, o = c.get_io()
+        o.width, o.height, o.device_mode, o.type = 128, 64, "1", ["b&w-pixel"]
+        images = []
+        image_received = Event()
+        def display_image(image):
+            images.append(image)
+            image_received.set()
+        o.display_image = display_image
+        o.display_data = Mock()
+        def target():
+            # Runs in a separate process
+            done = Event()
+            def on_enter():
+                o.display_data("Hello")
+                done.set()
+            i.set_keymap({"KEY_ENTER": on_enter})
+            o.display_image(Image.new("1", (128, 64), 1))
+            done.wait()
+        cm.register_context_target("test1", target)
+        cm.switch_to_context("test1")
+        assert(image_received.wait(5))
+        assert(images[0].getpixel((0, 0)) == 255)
+        # The app's keymap is in the other process, so keys are forwarded there
+        assert(i.keymap == {})
+        i.streaming("KEY_ENTER")
+        c.thread.join(5)
+        assert(not c.thread_is_active())
+        o.display_data.assert_called_with("Hello")
+        assert(cm.current_context == cm.fallback_context)
+        assert(i.streaming is None)
+
+    def test_character_display(self):
+        """Tests that contexts can be isolated on displays that don't have a framebuffer"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        cm.switch_to_context(cm.fallback_context)
+        c = cm.create_context("test1")
+        c.isolated = True
+        i, o = c.get_io()
+        o.rows, o.cols, o.type = 4, 20, ["char"]
+        o.display_data = Mock()
+        def target():
+            o.display_data("Hello")
+        cm.register_context_target("test1", target)
+        cm.switch_to_context("test1")
+        c.thread.join(5)
+        assert(not c.thread_is_active())
+        assert(c.host.framebuffer is None)
+        o.display_data.assert_called_with("Hello")
+
+    def test_subscribe(self):
+        """Tests that events the context process subscribes to are passed to its subscribers"""
+        cm = ContextManager()
+        cm.init_io(Mock(), Mock())
+        cm.switch_to_context(cm.fallback_context)
+        c = cm.create_context("test1")
+        c.isolated = True
+        i, o = c.get_io()
+        o.width, o.height, o.device_mode, o.type = 128, 64, "1", ["b&w-pixel"]
+        o.display_data = Mock()
+        def target():
+            # Runs in a separate process
+            done = Event()
+            def on_notification(event):
+                o.display_data(*event.args)
+                done.set()
+            c.subscribe("notification", on_notification)
+            done.wait()
+            c.unsubscribe("notification", on_notification)
+        cm.register_context_target("test1", target)
+        cm.switch_to_context("test1")
+        for _ in range(50):
+            if "notification" in c.host.subscriptions:
+                break
+            c.thread.join(0.1)
+        assert("notification" in c.host.subscriptions)
+        cm.event_bus.notify_subscribers(ContextEvent("notification", "test2", ("Hello", ), {}))
+        c.thread.join(5)
+        assert(not c.thread_is_active())
+        o.display_data.assert_called_with("Hello")
+        assert(not cm.event_bus.subscribers["notification"])
+
+
+if __name__ == '__main__':
+    unittest.main()
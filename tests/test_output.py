@@ -0,0 +1,72 @@
+"""tests for output helper functions"""
+import os
+import unittest
+
+from PIL import Image, ImageDraw
+
+try:
+    from output.output import image_to_pages, OutputProxy
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    from output.output import image_to_pages, OutputProxy
+
+
+def image_to_pages_naive(image):
+    width, height = image.size
+    pixels = image.load()
+    data = bytearray()
+    for page in range(height // 8):
+        for x in range(width):
+            byte = 0
+            for bit in range(8):
+                if pixels[x, page * 8 + bit]:
+                    byte |= 1 << bit
+            data.append(byte)
+    return data
+
+
+class TestImageToPages(unittest.TestCase):
+    """Tests the image_to_pages function"""
+
+    def test_matches_naive_conversion(self):
+        """Tests that the conversion matches a pixel-by-pixel one"""
+        image = Image.new("1", (128, 64))
+        draw = ImageDraw.Draw(image)
+        draw.text((3, 5), "Hello world", fill="white")
+        draw.line((0, 0, 127, 63), fill="white")
+        draw.rectangle((100, 40, 120, 50), fill="white")
+        assert(image_to_pages(image) == image_to_pages_naive(image))
+
+    def test_single_pixels(self):
+        """Tests the bit and byte order of the conversion"""
+        image = Image.new("1", (128, 32))
+        image.putpixel((0, 0), 1)
+        image.putpixel((5, 15), 1)
+        pages = image_to_pages(image)
+        assert(len(pages) == 128 * 4)
+        assert(pages[0] == 0x01)
+        assert(pages[128 + 5] == 0x80)
+        assert(sum(pages) == 0x81)
+
+
+class TestOutputProxy(unittest.TestCase):
+    """Tests the OutputProxy class"""
+
+    def test_current_image_not_changed_by_next_frame(self):
+        """Tests that screenshots and preserved frames don't change when the shown image is drawn over"""
+        proxy = OutputProxy("test")
+        assert(proxy.get_current_image() is None)
+        image = Image.new("1", (128, 64))
+        proxy._display_image(image)
+        screenshot = proxy.get_current_image()
+        proxy._preserve_frame()
+        # Drawing the next frame on the same image, like pooled canvases do
+        image.putpixel((3, 3), 1)
+        assert(screenshot.getbbox() is None)
+        assert(proxy.current_image.getbbox() is None)
+        assert(proxy.get_current_image().getbbox() is None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""tests for the Scheduler helper"""
+import os
+import time
+import unittest
+
+from threading import Event
+from mock import patch
+
+try:
+    from helpers import Scheduler, ScheduledJob, DeadlineTimer, monotonic
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    from helpers import Scheduler, ScheduledJob, DeadlineTimer, monotonic
+
+
+class TestScheduler(unittest.TestCase):
+    """tests Scheduler class"""
+
+    def test_run_pending(self):
+        """Tests that only due jobs are run, and that periodic jobs are re-scheduled"""
+        s = Scheduler()
+        calls = []
+        s.add_job(ScheduledJob(lambda: calls.append("due"), 10))
+        s.add_job(ScheduledJob(lambda: calls.append("later"), 100))
+        s.add_job(ScheduledJob(lambda: calls.append("periodic"), 5, interval=5))
+        ran = s.run_pending(10)
+        assert(calls == ["periodic", "due"])
+        assert(len(ran) == 2)
+        # The missed run at 10 is skipped
+        assert(s.get_next_deadline() == 15)
+
+    def test_coalescing(self):
+        """Tests that jobs that can run early are run together with the due ones"""
+        s = Scheduler()
+        calls = []
+        s.add_job(ScheduledJob(lambda: calls.append(1), 10))
+        s.add_job(ScheduledJob(lambda: calls.append(2), 12, tolerance=5))
+        s.add_job(ScheduledJob(lambda: calls.append(3), 20, tolerance=5))
+        s.run_pending(10)
+        assert(calls == [1, 2])
+
+    def test_cancel(self):
+        """Tests that cancelled jobs don't run"""
+        s = Scheduler()
+        calls = []
+        job = ScheduledJob(lambda: calls.append(1), 1, interval=1)
+        s.add_job(job)
+        s.cancel(job)
+        s.run_pending(1)
+        assert(calls == [])
+        assert(s.get_next_deadline() is None)
+
+    def test_timer_thread(self):
+        """Tests that the timer thread runs jobs and wakes up for jobs added later"""
+        s = Scheduler()
+        e1 = Event()
+        e2 = Event()
+        s.schedule(100, e2.set)
+        s.schedule(0.01, e1.set)
+        assert(e1.wait(1))
+        assert(not e2.isSet())
+        s.stop()
+
+    def test_wall_clock_jump(self):
+        """Tests that jobs still run on time when the wall clock goes back by an hour"""
+        s = Scheduler()
+        s.start()
+        e = Event()
+        real_time = time.time
+        with patch("time.time", side_effect=lambda: real_time()-3600):
+            s.schedule(0.01, e.set)
+            assert(e.wait(1))
+        s.stop()
+
+
+class TestDeadlineTimer(unittest.TestCase):
+    """tests DeadlineTimer class"""
+
+    def test_deadlines(self):
+        """Tests that deadlines are counted from the previous deadline, not from when wait() was called"""
+        t = DeadlineTimer(0.05)
+        t.reset()
+        first_deadline = t.deadline
+        assert(t.wait())
+        assert(monotonic() >= first_deadline)
+        assert(t.deadline == first_deadline+0.05)
+
+    def test_wake(self):
+        """Tests that wake() makes wait() return early, even if it's called before wait()"""
+        t = DeadlineTimer(10)
+        t.wake()
+        start = monotonic()
+        assert(not t.wait())
+        assert(monotonic()-start < 1)
+        # The wakeup is consumed
+        t.set_interval(0.01)
+        assert(t.wait())
+
+    def test_monotonic_clock(self):
+        """Tests that the clock used for deadlines is not the wall clock, and doesn't go backwards"""
+        assert(monotonic is not time.time)
+        times = [monotonic() for i in range(1000)]
+        assert(times == sorted(times))
+
+    def test_wall_clock_jump(self):
+        """Tests that deadlines aren't moved when the wall clock goes back by an hour"""
+        t = DeadlineTimer(0.05)
+        t.reset()
+        real_time = time.time
+        with patch("time.time", side_effect=lambda: real_time()-3600):
+            start = monotonic()
+            assert(t.wait())
+            assert(monotonic()-start < 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ from ui import UIElement
 """
 
 from char_input import CharArrowKeysInput
+from base_list_ui import LazyContents
 from checkbox import Checkbox
 from dialog import DialogBox
 from funcs import ellipsize, format_for_screen, ffs
@@ -16,9 +17,10 @@ from number_input import IntegerAdjustInput
 from numpad_input import NumpadCharInput, NumpadNumberInput, NumpadHexInput
 from path_picker import PathPicker
 from printer import Printer, PrettyPrinter, GraphicsPrinter
-from refresher import Refresher, RefresherExitException
+from refresher import Refresher, RefresherExitException, DataSource, PollingDataSource
 from scrollable_element import TextReader
+from t9_dictionary import T9Dictionary
 from ui.loading_indicators import ProgressBar, LoadingIndicator, TextProgressBar, GraphicalProgressBar, CircularProgressBar, IdleDottedMessage, Throbber
 from ui.numbered_menu import NumberedMenu
-from canvas import Canvas, MockOutput
+from canvas import Canvas, MockOutput, get_canvas
 IntegerInDecrementInput = IntegerAdjustInput  # Compatibility with old ugly name
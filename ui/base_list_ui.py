@@ -4,16 +4,17 @@ Best example of such an element is a Menu element - it has menu entries you can
 
 from copy import copy
 from threading import Event
-from time import sleep
 
-from canvas import Canvas
-from helpers import setup_logger
+from canvas import Canvas, MockOutput, get_canvas
+from search import T9SearchIndex
+from rendering import render_scheduler
+from helpers import setup_logger, DeadlineTimer
 from utils import to_be_foreground, clamp_list_index
 
 
 logger = setup_logger(__name__, "warning")
 
-global_config = {}
+cm = None
 
 # Documentation building process has problems with this import
 try:
@@ -23,11 +24,83 @@ except (ImportError, AttributeError):
 else:
     cm = config_manager.get_ui_config_manager()
     cm.set_path("ui/configs")
+
+
+def get_global_config():
+    """Returns the current UI config snapshot (or an empty config if it's not available)."""
+    if cm is None:
+        return {}
     try:
-        global_config = cm.get_global_config()
+        return cm.get_global_config()
     except OSError as e:
         logger.error("Config files not available, running under ReadTheDocs?")
         logger.exception(e)
+        return {}
+
+
+# View dictionaries, by UI element class - they're the same for all instances of a class
+views_dicts = {}
+
+
+class LazyContents(object):
+    """Contents for list-like UI elements that are only generated when they're needed -
+    for when creating all the entries (and their callbacks) upfront would be too slow,
+    like with directories that have thousands of files in them. Only the entries
+    currently on the screen (plus a small window, ``cache_size`` entries total)
+    are kept in memory.
+
+    Can be passed to ``set_contents()`` of ``BaseListUIElement``-based UI elements
+    (like ``Menu``) instead of a list. Entries aren't validated, and duplicate "exit"
+    entries aren't filtered out - make sure ``get_entry`` returns proper entries.
+
+    Args:
+
+        * ``length``: number of entries
+        * ``get_entry``: function that receives an entry index and returns the entry
+        * ``cache_size``: how many generated entries to keep
+        * ``get_label``: function that receives an entry index and returns the entry's
+          label - if set, searching the UI element won't need to generate all the entries"""
+
+    def __init__(self, length, get_entry, cache_size=32, get_label=None):
+        self.length = length
+        self.get_entry = get_entry
+        self.label_getter = get_label
+        self.cache_size = cache_size
+        self.cache = {}
+        self.appended_entries = []
+
+    def __len__(self):
+        return self.length + len(self.appended_entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("LazyContents index out of range: {}".format(index))
+        if index >= self.length:
+            return self.appended_entries[index - self.length]
+        if index not in self.cache:
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            self.cache[index] = self.get_entry(index)
+        return self.cache[index]
+
+    def append(self, entry):
+        """Adds an entry after the generated ones (used for the "Exit" entry)."""
+        self.appended_entries.append(entry)
+
+    def get_label(self, index):
+        """Returns the label of an entry, without generating the entry if possible."""
+        if self.label_getter is not None and index < self.length:
+            return self.label_getter(index)
+        return self[index][0]
+
+    def __copy__(self):
+        contents = LazyContents(self.length, self.get_entry, cache_size=self.cache_size, get_label=self.label_getter)
+        contents.appended_entries = copy(self.appended_entries)
+        return contents
 
 
 class BaseListUIElement(object):
@@ -45,6 +118,12 @@ class BaseListUIElement(object):
 
     config_key = "base_list_ui"
 
+    searchable = False
+    search_query = ""
+    search_index = None
+    search_matches = None
+    unfiltered_contents = None
+
     def __init__(self, contents, i, o, name=None, entry_height=1, append_exit=True, exitable=True, scrolling=True,
                  config=None, keymap=None):
         self.i = i
@@ -61,7 +140,8 @@ class BaseListUIElement(object):
             "counter": 0,
             "pointer": 0
         }
-        self.config = config if config is not None else global_config
+        self.idle_timer = DeadlineTimer(0.1)
+        self.config = config if config is not None else get_global_config()
         self.set_view(self.config.get(self.config_key, {}))
         self.set_contents(contents)
         self.generate_keymap()
@@ -76,9 +156,18 @@ class BaseListUIElement(object):
             "SimpleGraphicalView": EightPtView  # Not a descriptive name - left for compatibility
         }
 
+    def get_views_dict(self):
+        """Sets ``self.views`` to the view dictionary for the UI element's class,
+        calling ``set_views_dict()`` only once per class."""
+        cls = self.__class__
+        if cls not in views_dicts:
+            self.set_views_dict()
+            views_dicts[cls] = self.views
+        self.views = views_dicts[cls]
+
     def set_view(self, config):
         view = None
-        self.set_views_dict()
+        self.get_views_dict()
         if self.name in config.get("custom_views", {}).keys():
             view_config = config["custom_views"][self.name]
             if isinstance(view_config, basestring):
@@ -125,7 +214,10 @@ class BaseListUIElement(object):
         Is the perfect place to clear any flags that you don't want to persist 
         between multiple activations of a single instance of an UI element.
 
-        For a start, resets the ``pointer`` to the ``start_pointer``."""
+        For a start, stops the search (if the UI element was left while being searched)
+        and resets the ``pointer`` to the ``start_pointer``."""
+        if self.search_query:
+            self.stop_search()
         self.pointer = self.start_pointer
 
     def to_foreground(self):
@@ -136,13 +228,21 @@ class BaseListUIElement(object):
         self.before_foreground()
         self.reset_scrolling()
         self.in_foreground = True
-        self.view.refresh()
+        self.refresh()
+        self.idle_timer.reset()
         self.set_keymap()
 
+    def refresh(self):
+        """Asks for the UI element to be redrawn. Redraws are done on the render thread
+        (see ``ui.rendering``), so this returns right away - and, if the UI element
+        changes again before it's redrawn, only the newest state is drawn."""
+        render_scheduler.post(self, self.view.refresh)
+
     def idle_loop(self):
-        """Contains code which will be executed in UI element's idle loop """
-        sleep(0.1)
-        self.scroll()
+        """Contains code which will be executed in UI element's idle loop -
+        every 0.1 seconds, as long as the UI element is active."""
+        if self.idle_timer.wait():
+            self.scroll()
 
     def activate(self):
         """ A method which is called when UI element needs to start operating.
@@ -166,6 +266,8 @@ class BaseListUIElement(object):
     def deactivate(self):
         """Sets a flag that signals the UI element's ``activate()`` to return."""
         self.in_foreground = False
+        render_scheduler.cancel(self)
+        self.idle_timer.wake()
         self.o.noCursor()
         logger.info("{} deactivated".format(self.name))
 
@@ -174,11 +276,15 @@ class BaseListUIElement(object):
     @to_be_foreground
     def scroll(self):
         if self.scrolling["enabled"] and not self.scrolling["current_finished"] and self.scrolling["current_scrollable"]:
+            pixel_offset = self.view.get_scroll_pixel_offset()
             self.scrolling["counter"] += 1
             if self.scrolling["counter"] == 10:
                 self.scrolling["pointer"] += 1
                 self.scrolling["counter"] = 0
-                self.view.refresh()
+                self.refresh()
+            elif self.view.get_scroll_pixel_offset() != pixel_offset:
+                # Graphical views scroll by pixels in between characters
+                self.refresh()
 
     def reset_scrolling(self):
         self.scrolling["current_finished"] = False
@@ -209,7 +315,7 @@ class BaseListUIElement(object):
             logger.debug("moved down")
             self.pointer += 1
             self.reset_scrolling()
-            self.view.refresh()
+            self.refresh()
             return True
         else:
             return False
@@ -223,7 +329,7 @@ class BaseListUIElement(object):
             logger.debug("moved down")
             self.pointer += 1
             counter -= 1
-        self.view.refresh()
+        self.refresh()
         self.reset_scrolling()
         return True
 
@@ -236,7 +342,7 @@ class BaseListUIElement(object):
         if self.pointer != 0:
             logger.debug("moved up")
             self.pointer -= 1
-            self.view.refresh()
+            self.refresh()
             self.reset_scrolling()
             return True
         else:
@@ -251,7 +357,7 @@ class BaseListUIElement(object):
             logger.debug("moved down")
             self.pointer -= 1
             counter -= 1
-        self.view.refresh()
+        self.refresh()
         self.reset_scrolling()
         return True
 
@@ -267,12 +373,82 @@ class BaseListUIElement(object):
            in UI element."""
         logger.debug("Right key press detected on {}".format(self.contents[self.pointer]))
 
+    # Type-ahead search - typing digits on the numpad narrows the entries down
+    # to the ones that have a word starting with the letters typed (T9-style)
+
+    def get_entry_labels(self):
+        """Returns labels of all the entries, as strings, for the search index."""
+        if isinstance(self.contents, LazyContents):
+            labels = [self.contents.get_label(i) for i in range(len(self.contents))]
+        else:
+            labels = [entry[0] for entry in self.contents]
+        return [" ".join(label) if isinstance(label, list) else label for label in labels]
+
+    @to_be_foreground
+    def search_add_digit(self, digit):
+        """Adds a digit to the search query and shows the entries matching it.
+        If no entries match, the digit is ignored."""
+        if self.search_index is None:
+            # The index is built on the first keypress, so that UI elements
+            # that are never searched don't have to build it
+            self.search_index = T9SearchIndex(self.get_entry_labels())
+        matches = self.search_index.search(self.search_query + digit)
+        if not matches:
+            return False
+        self.show_search_results(self.search_query + digit, matches)
+        return True
+
+    @to_be_foreground
+    def search_remove_digit(self):
+        """Removes the last digit from the search query, stopping the search
+        if there are no digits left."""
+        query = self.search_query[:-1]
+        if not query:
+            self.stop_search()
+        else:
+            self.show_search_results(query, self.search_index.search(query))
+
+    def show_search_results(self, query, matches):
+        if self.unfiltered_contents is None:
+            self.unfiltered_contents = self.contents
+        unfiltered_contents = self.unfiltered_contents
+        self.search_query = query
+        self.search_matches = matches
+        self.contents = LazyContents(len(matches), lambda index: unfiltered_contents[matches[index]])
+        self.pointer = 0
+        self.view.fix_pointers_on_contents_update()
+        self.reset_scrolling()
+        self.refresh()
+
+    def stop_search(self):
+        """Shows all the entries again, keeping the currently selected one selected."""
+        if self.unfiltered_contents is None:
+            return
+        pointer = self.search_matches[self.pointer] if self.search_matches else 0
+        self.contents = self.unfiltered_contents
+        self.unfiltered_contents = None
+        self.search_matches = None
+        self.search_query = ""
+        self.pointer = pointer
+        self.view.fix_pointers_on_contents_update()
+        self.reset_scrolling()
+        if self.in_foreground:
+            self.refresh()
+
+    def process_left_press(self):
+        """Removes the last digit typed if the UI element is being searched,
+        otherwise, exits the UI element."""
+        if self.search_query:
+            self.search_remove_digit()
+        elif self.exitable:
+            self.deactivate()
+
     # Working with the keymap
 
     @to_be_foreground
     def set_keymap(self):
-        """Sets the input device's keycode-to-callback mapping. Re-starts the input device because ofpassing-variables-between-threads issues."""
-        self.i.stop_listen()
+        """Sets the input device's keycode-to-callback mapping. The keymap is built once,
+        in ``generate_keymap``, so this only swaps it in."""
         self.i.set_keymap(self.keymap)
         self.i.listen()
 
@@ -287,12 +463,21 @@ class BaseListUIElement(object):
             "KEY_ENTER": lambda: self.select_entry(),
             "KEY_RIGHT": lambda: self.process_right_press()
         })
-        if self.exitable:
-            self.keymap["KEY_LEFT"] = lambda: self.deactivate()
+        if self.exitable or self.searchable:
+            self.keymap["KEY_LEFT"] = lambda: self.process_left_press()
+        if self.searchable:
+            # Digit keys set by the UI element's user take precedence
+            for digit in "0123456789":
+                self.keymap.setdefault("KEY_{}".format(digit), lambda x=digit: self.search_add_digit(x))
 
     def set_contents(self, contents):
         """Sets the UI element contents and triggers pointer recalculation in the view."""
         self.validate_contents(contents)
+        # Search results and the search index are for the old contents
+        self.search_query = ""
+        self.search_index = None
+        self.search_matches = None
+        self.unfiltered_contents = None
         # Copy-ing the contents list is necessary because it can be modified
         # by UI elements that are based on this class
         self.contents = copy(contents)
@@ -302,9 +487,12 @@ class BaseListUIElement(object):
     def validate_contents(self, contents):
         """A hook to validate contents before they're set. If validation is unsuccessful,
         raise exceptions (it's better if exception message contains the faulty entry).
-        Does not check if the contents are falsey."""
+        Does not check if the contents are falsey. ``LazyContents`` aren't validated,
+        since that would mean generating all the entries."""
         # if not contents:
         #    raise ValueError("UI element 'contents' argument has to be set to a non-empty list!")
+        if isinstance(contents, LazyContents):
+            return
         for entry in contents:
             entry_repr = entry[0]
             if not isinstance(entry_repr, basestring) and not isinstance(entry_repr, list):
@@ -320,10 +508,11 @@ class BaseListUIElement(object):
         If ``self.append_exit`` is set, it goes through the menu and removes every callback which either is ``self.deactivate`` or is just a string 'exit'.
         |Then, it appends a single "Exit" entry at the end of menu contents. It makes dynamically appending entries to menu easier and makes sure there's only one "Exit" callback, at the bottom of the menu."""
         if self.append_exit:
-            # filtering possible duplicate exit entries
-            for entry in self.contents:
-                if len(entry) > 1 and entry[1] == 'exit':
-                    self.contents.remove(entry)
+            # filtering possible duplicate exit entries (can't be done for lazy contents)
+            if not isinstance(self.contents, LazyContents):
+                for entry in self.contents:
+                    if len(entry) > 1 and entry[1] == 'exit':
+                        self.contents.remove(entry)
             self.contents.append(self.exit_entry)
         logger.debug("{}: contents processed".format(self.name))
 
@@ -364,6 +553,7 @@ class BaseListBackgroundableUIElement(BaseListUIElement):
         """ Inhibits all UI element's refreshes, effectively bringing it to background."""
         self.o.noCursor()
         self.in_foreground = False
+        render_scheduler.cancel(self)
         logger.debug("{0} disabled".format(self.name))
 
     def activate(self):
@@ -498,6 +688,11 @@ class TextView(object):
     def get_active_line_num(self):
         return (self.el.pointer - self.first_displayed_entry) * self.entry_height
 
+    def get_scroll_pixel_offset(self):
+        """Returns how many pixels the active entry is scrolled by, in addition
+        to ``scrolling["pointer"]`` characters."""
+        return 0
+
     @to_be_foreground
     def refresh(self):
         logger.debug("{}: refreshed data on display".format(self.el.name))
@@ -510,11 +705,41 @@ class TextView(object):
 
 
 class EightPtView(TextView):
+    """Renders the UI element on a graphical display, using the default 8pt font.
+
+    Keeps the last frame without the cursor, so that moving the cursor within the
+    same screen of entries only takes copying the frame and inverting the cursor
+    rectangle. Rendered rows of text are cached by ``Canvas``, so scrolling by one
+    entry only takes rendering one new row.
+
+    Labels too long for the screen are scrolled pixel by pixel - the whole label
+    is rendered once, and the part that fits on the screen is cut out of it
+    for each frame."""
+
     charwidth = 6
     charheight = 8
     x_offset = 2
     x_scrollbar_offset = 5
     scrollbar_y_offset = 1
+    font = None
+    pixel_scrolling = True
+
+    def __init__(self, *args, **kwargs):
+        TextView.__init__(self, *args, **kwargs)
+        self.frame_canvas = None # Reused for drawing each new frame without the cursor
+        self.reset_frame_cache()
+
+    def reset_frame_cache(self):
+        self.frame = None
+        self.frame_key = None
+        self.frame_left_offset = None
+        self.label_strip = None
+        self.label_strip_key = None
+
+    def fix_pointers_on_contents_update(self):
+        # Parts of the frame other than the text (like Menu triangles) depend on contents
+        self.reset_frame_cache()
+        TextView.fix_pointers_on_contents_update(self)
 
     def get_fow_width_in_chars(self):
         return (self.o.width - self.x_scrollbar_offset) / self.charwidth
@@ -558,9 +783,58 @@ class EightPtView(TextView):
         return left_offset
 
     def draw_menu_text(self, c, menu_text, left_offset):
+        font = self.get_row_font(c)
         for i, line in enumerate(menu_text):
-            y = (i * self.charheight - 1) if i != 0 else 0
-            c.text(line, (left_offset, y))
+            self.draw_menu_row(c, i, line, left_offset, font=font)
+
+    def draw_menu_row(self, c, i, line, left_offset, font=None):
+        y = (i * self.charheight - 1) if i != 0 else 0
+        if i == self.get_scrolled_row():
+            self.draw_scrolled_row(c, (left_offset, y), font=font)
+        else:
+            self.draw_row(c, line, (left_offset, y), font=font)
+
+    def get_row_font(self, c):
+        return c.load_font(self.font, self.charheight) if self.font else None
+
+    def draw_row(self, c, line, coords, font=None):
+        c.text(line, coords, font=font)
+
+    def get_scroll_pixel_offset(self):
+        if not self.pixel_scrolling or self.entry_height != 1:
+            return 0
+        # One character is scrolled over 10 ticks of the idle loop
+        return self.el.scrolling["counter"] * self.charwidth // 10
+
+    def get_scrolled_row(self):
+        """Returns the row number of the active entry if it's being scrolled pixel by pixel, otherwise None."""
+        scrolling = self.el.scrolling
+        if not self.pixel_scrolling or self.entry_height != 1 or not scrolling["enabled"] \
+          or not scrolling["current_scrollable"] or scrolling["current_finished"]:
+            return None
+        return self.get_active_line_num()
+
+    def get_label_strip(self, c, label, font=None):
+        """Returns an image with the whole label drawn on it, rendering it only
+        if it's not the label that was rendered last."""
+        key = (label, font, self.charheight)
+        if key != self.label_strip_key:
+            width = c.get_text_bounds(label, font=font)[0] + self.charwidth
+            strip = Canvas(MockOutput(width, self.o.height, device_mode=self.o.device_mode))
+            strip.text(label, (0, 0), font=font)
+            self.label_strip, self.label_strip_key = strip.get_image(), key
+        return self.label_strip
+
+    def draw_scrolled_row(self, c, coords, font=None):
+        """Draws the label of the active entry, scrolled by ``scrolling["pointer"]``
+        characters and ``get_scroll_pixel_offset()`` pixels. The whole label is rendered
+        once (see ``get_label_strip``), and the part that's shown is cut out of it."""
+        x, y = coords
+        label = self.el.contents[self.el.pointer][0]
+        scroll_x = self.el.scrolling["pointer"] * self.charwidth + self.get_scroll_pixel_offset()
+        strip = self.get_label_strip(c, label, font=font)
+        mask = strip.crop((scroll_x, 0, scroll_x + self.get_fow_width_in_chars() * self.charwidth, strip.height))
+        c.paste(c.default_color, (x, y), mask)
 
     def draw_cursor(self, c, menu_text, left_offset):
         cursor_y = self.get_active_line_num()
@@ -579,15 +853,24 @@ class EightPtView(TextView):
     def get_displayed_image(self):
         """Generates the displayed data for a canvas-based output device. The output of this function can be fed to the o.display_image function.
         |Doesn't support partly-rendering entries yet."""
-        c = Canvas(self.o)
         # Get the menu text
         menu_text = self.get_displayed_text()
-        # Drawing the scrollbar (will only be drawn if applicable)
-        left_offset = self.draw_scrollbar(c)
-        # Drawing the text itself
-        self.draw_menu_text(c, menu_text, left_offset)
+        # The frame without the cursor only needs to be redrawn if the displayed text changed
+        frame_key = (tuple(menu_text), self.first_displayed_entry, self.get_scrollbar_top_bottom(), self.get_scroll_pixel_offset())
+        if frame_key != self.frame_key:
+            if self.frame_canvas is None:
+                self.frame_canvas = Canvas(self.o)
+            else:
+                self.frame_canvas.reset()
+            c = self.frame_canvas
+            # Drawing the scrollbar (will only be drawn if applicable)
+            left_offset = self.draw_scrollbar(c)
+            # Drawing the text itself
+            self.draw_menu_text(c, menu_text, left_offset)
+            self.frame, self.frame_key, self.frame_left_offset = c.get_image(), frame_key, left_offset
+        c = get_canvas(self.o, base_image=self.frame)
         # Drawing the cursor
-        self.draw_cursor(c, menu_text, left_offset)
+        self.draw_cursor(c, menu_text, self.frame_left_offset)
         # Returning the image
         return c.get_image()
 
@@ -597,12 +880,6 @@ class SixteenPtView(EightPtView):
     charheight = 16
     font = "Fixedsys62.ttf"
 
-    def draw_menu_text(self, c, menu_text, left_offset):
-        font = c.load_font(self.font, self.charheight)
-        for i, line in enumerate(menu_text):
-            y = (i * self.charheight - 1) if i != 0 else 0
-            c.text(line, (left_offset, y), font=font)
-
 
 class MainMenuTripletView(SixteenPtView):
     # TODO: enable scrolling
@@ -617,7 +894,7 @@ class MainMenuTripletView(SixteenPtView):
     @to_be_foreground
     def get_displayed_image(self):
         # This view doesn't have a cursor, instead, the entry that's currently active is in the display center
-        c = Canvas(self.o)
+        c = get_canvas(self.o)
         central_position = (10, 16)
         font = c.load_font("Fixedsys62.ttf", 32)
         current_entry = self.el.contents[self.el.pointer]
@@ -1,11 +1,17 @@
 import os
+from threading import local
+from weakref import WeakKeyDictionary
 
-from PIL import Image, ImageDraw, ImageOps, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageChops
 
-from ui.utils import is_sequence_not_string as issequence, Rect
+from ui.utils import is_sequence_not_string as issequence, Rect, LRUCache
 
 fonts_dir = "ui/fonts/"
 font_cache = {}
+fonts_dir_contents = {} # Font directories are only listed once
+text_bounds_cache = LRUCache(64*1024) # (font, text): (width, height)
+text_bitmap_cache = LRUCache(256*1024) # (font, text, mode): ((x, y) offset, mask image) - budget is in bytes
+white_image_cache = LRUCache(64*1024) # size: white "1" image, for inverting parts of "1" images - budget is in bytes
 
 default_font = None
 def get_default_font():
@@ -14,6 +20,11 @@ def get_default_font():
         default_font = ImageFont.load_default()
     return default_font
 
+def get_fonts_dir_contents(fonts_dir):
+    if fonts_dir not in fonts_dir_contents:
+        fonts_dir_contents[fonts_dir] = set(os.listdir(fonts_dir))
+    return fonts_dir_contents[fonts_dir]
+
 from helpers import setup_logger
 logger = setup_logger(__name__, "warning")
 
@@ -58,6 +69,17 @@ class Canvas(object):
             self.default_font = get_default_font()
         self.interactive = interactive
 
+    def reset(self, base_image=None):
+        """
+        Clears the canvas (or copies ``base_image`` onto it, if supplied),
+        reusing the image that the canvas has - see ``get_canvas()``.
+        """
+        if base_image:
+            assert(base_image.size == self.size)
+            self.image.paste(base_image, (0, 0))
+        else:
+            self.image.paste(self.background_color, (0, 0, self.width, self.height))
+
     def load_font(self, path, size, alias=None, type="truetype"):
         """
         Loads a font by its path for the given size, then returns it.
@@ -68,23 +90,22 @@ class Canvas(object):
         directory and paths to fonts in the ZPUI font directory
         (``ui/fonts`` by default).
         """
-        # For fonts in the font directory, can use the filename as a shorthand
-        if path in os.listdir(self.fonts_dir):
-            logger.debug("Loading font from the font storage directory")
-            path = os.path.join(self.fonts_dir, path)
         # If an alias was not specified, using font filename as the alias (for caching)
         if alias is None:
             alias = os.path.basename(path)
         # Adding size to the alias and using it for caching
         font_name = "{}:{}".format(alias, size)
-        logger.debug("Font alias: {}".format(font_name))
         # Font already loaded, returning the instance we have
         if font_name in font_cache:
-            logger.debug("Font {} already loaded, returning".format(font_name))
             return font_cache[font_name]
+        logger.debug("Font alias: {}".format(font_name))
+        # For fonts in the font directory, can use the filename as a shorthand
+        if path in get_fonts_dir_contents(self.fonts_dir):
+            logger.debug("Loading font from the font storage directory")
+            path = os.path.join(self.fonts_dir, path)
         # We don't have it cached - let's see the type requested
         # We only support loading TrueType fonts, though
-        elif type == "truetype":
+        if type == "truetype":
             logger.debug("Loading a TT font from {}".format(font_name))
             font = ImageFont.truetype(path, size)
         else:
@@ -159,15 +180,49 @@ class Canvas(object):
         Keyword arguments:
 
           * ``fill``: text color (default: white, as default canvas color)
+
+        Text is rendered once for each font, and then copied from the
+        ``text_bitmap_cache`` - as long as no other keyword arguments are passed.
         """
         assert(isinstance(text, basestring))
         fill = kwargs.pop("fill", self.default_color)
         font = kwargs.pop("font", self.default_font)
         font = self.decypher_font_reference(font)
         coords = self.check_coordinates(coords)
-        self.draw.text(coords, text, fill=fill, font=font, **kwargs)
+        if not kwargs and isinstance(fill, basestring) and self.image.mode in ("1", "L", "RGB"):
+            bitmap = self.get_text_bitmap(text, font)
+            if bitmap is not None:
+                (dx, dy), mask = bitmap
+                self.image.paste(fill, (int(coords[0]) + dx, int(coords[1]) + dy), mask)
+        else:
+            self.draw.text(coords, text, fill=fill, font=font, **kwargs)
         self.display_if_interactive()
 
+    def get_text_bitmap(self, text, font):
+        """
+        Returns the text rendered with the given font as a mask image cropped
+        to the text's bounding box, together with the offset of the box -
+        or None, if the text has nothing to draw. Rendered text is cached.
+        """
+        # PIL draws text without antialiasing on "1" images
+        mode = "1" if self.image.mode == "1" else "L"
+        key = (font, text, mode)
+        bitmap = text_bitmap_cache.get(key, False)
+        if bitmap is False:
+            w, h = self.get_text_bounds(text, font=font)
+            # Some glyphs go over the text's bounds, so there has to be a margin
+            margin = max(h, 8)
+            image = Image.new(mode, (w + margin * 2, h + margin * 2))
+            ImageDraw.Draw(image).text((margin, margin), text, fill="white", font=font)
+            bbox = image.getbbox()
+            if bbox:
+                bitmap = ((bbox[0] - margin, bbox[1] - margin), image.crop(bbox))
+                size = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+            else:
+                bitmap, size = None, 0
+            text_bitmap_cache.set(key, bitmap, size + len(text))
+        return bitmap
+
     def rectangle(self, coords, **kwargs):
         """
         Draw a rectangle on the canvas. Coordinates are expected in
@@ -260,7 +315,31 @@ class Canvas(object):
         """
         Inverts the image that ``Canvas`` is currently operating on.
         """
-        self.image = ImageOps.invert(self.image).convert(o.device_mode)
+        self.invert_rect((0, 0, self.width, self.height))
+
+    def paste(self, image, coords=(0, 0), mask=None):
+        """
+        Copies an image (or a part of it, if ``mask`` is supplied) onto the canvas,
+        with its top left corner at ``coords``.
+        """
+        coords = self.check_coordinates(coords)
+        self.image.paste(image, coords, mask)
+        self.display_if_interactive()
+
+    def scroll(self, dx=0, dy=0, fill=None):
+        """
+        Moves the contents of the canvas ``dx`` pixels to the right and ``dy`` pixels
+        down (negative values move it to the left and up), filling the part that's
+        uncovered with the background color.
+        """
+        if fill is None:
+            fill = self.background_color
+        if abs(dx) >= self.width or abs(dy) >= self.height:
+            self.image.paste(fill, (0, 0, self.width, self.height))
+        else:
+            region = self.image.crop((max(0, -dx), max(0, -dy), self.width - max(0, dx), self.height - max(0, dy)))
+            self.image.paste(fill, (0, 0, self.width, self.height))
+            self.image.paste(region, (max(0, dx), max(0, dy)))
         self.display_if_interactive()
 
     def display(self):
@@ -281,8 +360,9 @@ class Canvas(object):
             coords = (0, 0, self.width, self.height)
         if fill is None:
             fill = self.background_color
-        coords = self.check_coordinates(coords)
-        self.rectangle(coords, fill=fill, outline=fill)  # paint the background black first
+        x1, y1, x2, y2 = [int(coord) for coord in self.check_coordinates(coords)]
+        # Filling the area directly - the bottom right corner is included, like with rectangle()
+        self.image.paste(fill, (min(x1, x2), min(y1, y2), max(x1, x2) + 1, max(y1, y2) + 1))
         self.display_if_interactive()
 
     def check_coordinates(self, coords, check_count=True):
@@ -366,8 +446,12 @@ class Canvas(object):
         non-default font, pass it as ``font``.
         """
         font = self.decypher_font_reference(font)
-        w, h = self.draw.textsize(text, font=font)
-        return w, h
+        key = (font, text)
+        bounds = text_bounds_cache.get(key)
+        if bounds is None:
+            bounds = self.draw.textsize(text, font=font)
+            text_bounds_cache.set(key, bounds, len(text) + 64)
+        return bounds
 
     def get_centered_text_bounds(self, text, font=None):
         # type: str -> Rect
@@ -392,14 +476,17 @@ class Canvas(object):
         coords = self.check_coordinates(coords)
         image_subset = self.image.crop(coords)
 
-        if image_subset.mode != "L": # PIL can only invert "L" and "RGBA" images
-            # We only support "L" for now
-            image_subset = image_subset.convert("L")
-        image_subset = ImageOps.invert(image_subset)
-        image_subset = image_subset.convert(self.o.device_mode)
+        if image_subset.mode == "1":
+            # ImageChops.invert doesn't work on "1" images, XOR-ing with white instead
+            white = white_image_cache.get(image_subset.size)
+            if white is None:
+                white = Image.new("1", image_subset.size, 1)
+                white_image_cache.set(image_subset.size, white, image_subset.size[0] * image_subset.size[1] // 8 + 64)
+            image_subset = ImageChops.logical_xor(image_subset, white)
+        else:
+            image_subset = ImageChops.invert(image_subset)
 
-        self.clear(coords)
-        self.draw.bitmap((coords[0], coords[1]), image_subset, fill=self.default_color)
+        self.image.paste(image_subset, (coords[0], coords[1]))
         self.display_if_interactive()
 
     def display_if_interactive(self):
@@ -412,6 +499,50 @@ class Canvas(object):
         raise AttributeError
 
 
+class CanvasPool(object):
+    """
+    Two canvases for an output device, used in turns: while the frame drawn
+    on one of them is on the screen (that is, it's the output's ``current_image``),
+    the next frame is drawn on the other one.
+    """
+
+    def __init__(self, o):
+        self.canvases = [Canvas(o), Canvas(o)]
+
+    def get_canvas(self, current_image, base_image=None):
+        canvas = self.canvases[0]
+        if canvas.image is current_image:
+            canvas = self.canvases[1]
+        canvas.reset(base_image)
+        return canvas
+
+
+canvas_pools = local() # Each thread gets its own pools, so that threads can't draw on the same canvas
+
+def get_canvas(o, base_image=None):
+    """
+    Returns a ``Canvas`` for drawing a frame that's going to be shown with
+    ``o.display_image()`` - cleared, or with ``base_image`` copied onto it.
+    Instead of making a new image for each frame, reuses the images of two
+    canvases kept for the output device.
+
+    So, the canvas (and its image) can only be used until the next frame is drawn
+    (don't keep the image, say, in a cache). Outputs that don't keep the image
+    on the screen in ``current_image`` (like mock outputs used in tests) get
+    a new ``Canvas`` each time.
+    """
+    current_image = getattr(o, "current_image", False)
+    if current_image is not None and not isinstance(current_image, Image.Image):
+        return Canvas(o, base_image=base_image)
+    pools = getattr(canvas_pools, "pools", None)
+    if pools is None:
+        pools = canvas_pools.pools = WeakKeyDictionary()
+    pool = pools.get(o)
+    if pool is None or pool.canvases[0].size != (o.width, o.height):
+        pool = pools[o] = CanvasPool(o)
+    return pool.get_canvas(current_image, base_image=base_image)
+
+
 class MockOutput(object):
     """
     A mock output device that you can use to draw icons and other bitmaps using
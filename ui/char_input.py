@@ -1,11 +1,11 @@
-from time import sleep
+from threading import Event
 from helpers import setup_logger
 logger = setup_logger(__name__, "warning")
 
 import string
 
 from utils import to_be_foreground
-from canvas import Canvas
+from canvas import Canvas, get_canvas
 
 
 class CharArrowKeysInput(object):
@@ -78,11 +78,13 @@ class CharArrowKeysInput(object):
         self.char_indices = [] #Fixes a bug with char_indices remaining from previous input ( 0_0 )
         for char in self.value:
             self.char_indices.append(self.charmap.index(char))
+        self.exit_event = Event()
         self.set_view()
 
     def to_foreground(self):
         """ Is called when ``activate()`` method is used, sets flags and performs all the actions so that UI element can display its contents and receive keypresses. Also, refreshes the screen."""
         logger.info("{0} enabled".format(self.name))    
+        self.exit_event.clear()
         self.in_foreground = True
         self.refresh()
         self.set_keymap()
@@ -111,11 +113,13 @@ class CharArrowKeysInput(object):
             return ''.join(self.value) #Making string from the list we have
 
     def idle_loop(self):
-        sleep(0.1)
+        # All the work is done in input callbacks, so there's nothing to do until the element exits
+        self.exit_event.wait()
 
     def deactivate(self):
         """ Deactivates the UI element, exiting it and thus making activate() return."""
         self.in_foreground = False
+        self.exit_event.set()
         logger.info("{0} deactivated".format(self.name))    
 
     def print_value(self):
@@ -212,9 +216,7 @@ class CharArrowKeysInput(object):
 
     @to_be_foreground
     def set_keymap(self):
-        self.i.stop_listen()
-        self.i.clear_keymap()
-        self.i.keymap = self.keymap
+        self.i.set_keymap(self.keymap)
         self.i.listen()
 
     def check_for_backspace(self):
@@ -267,7 +269,7 @@ class TextView(object):
 class GraphicalView(TextView):
 
     def get_image(self):
-        c = Canvas(self.o)
+        c = get_canvas(self.o)
 
         #Getting displayed data, drawing it
         lines = self.get_displayed_data()
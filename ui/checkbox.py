@@ -1,6 +1,7 @@
 from copy import copy
 
 from base_list_ui import BaseListUIElement, TextView, EightPtView, SixteenPtView, to_be_foreground
+from ui.utils import Bitset
 from helpers import setup_logger
 
 logger = setup_logger(__name__, "warning")
@@ -19,11 +20,12 @@ class Checkbox(BaseListUIElement):
          * ``entry[2]`` (entry state) is the default state of the entry (checked or not checked). If not present, assumed to be`` default_state``.
 
       *If you want to set contents after the initalisation, please, use set_contents() method.*
+    * ``states``: a ``Bitset`` with the states of the checkbox entries, indexed the same way as ``self.contents``.
     * ``pointer``: currently selected menu element's number in ``self.contents``.
     * ``in_foreground`` : a flag which indicates if checkbox is currently displayed. If it's not active, inhibits any of menu's actions which can interfere with other menu or UI element being displayed.
 
     """
-    states = []
+    states = None
     accepted = False
     exit_entry = ["Accept", None, 'accept']
 
@@ -60,11 +62,14 @@ class Checkbox(BaseListUIElement):
 
     def get_return_value(self):
         if self.accepted:
-            return {self.contents[index][1]: self.states[index] for index, element in enumerate(self.contents) if
-                    element != self.exit_entry}
+            return {self.contents[index][1]: state for index, state in enumerate(self.states)}
         else:
             return None
 
+    def get_selected(self):
+        """Returns the names (``entry[1]``) of the entries that are checked."""
+        return [self.contents[index][1] for index in self.states.indices()]
+
     def before_activate(self):
         # Clearing flags
         BaseListUIElement.before_activate(self)
@@ -79,8 +84,23 @@ class Checkbox(BaseListUIElement):
             self.accepted = True
             self.deactivate()
             return
-        self.states[self.pointer] = not self.states[self.pointer]  # Just inverting.
-        self.view.refresh()
+        self.states.toggle(self.pointer)
+        self.refresh()
+
+    def select_all(self):
+        """Checks all the entries."""
+        self.states.fill(True)
+        self.refresh()
+
+    def select_none(self):
+        """Unchecks all the entries."""
+        self.states.fill(False)
+        self.refresh()
+
+    def invert_selection(self):
+        """Checks all the unchecked entries and unchecks all the checked ones."""
+        self.states.invert()
+        self.refresh()
 
     def validate_contents(self, contents):
         assert isinstance(contents, list), "Checkbox contents should be a list"
@@ -99,9 +119,12 @@ class Checkbox(BaseListUIElement):
                     repr(entry[2]))
 
     def process_contents(self):
-        self.states = [element[2] if len(element) > 2 else self.default_state for element in self.contents]
+        # The final button doesn't have a state, so it's not in self.states
+        self.states = Bitset(len(self.contents), self.default_state)
+        for index, element in enumerate(self.contents):
+            if len(element) > 2 and element[2] != self.default_state:
+                self.states[index] = element[2]
         self.contents.append(self.exit_entry)
-        self.states.append(False)  # For the final button, to maintain "len(states) == len(self.contents)"
         logger.debug("{}: menu contents processed".format(self.name))
 
 
@@ -118,8 +141,11 @@ class CheckboxRenderingMixin(object):
 
     """
 
+    # The checkmark column isn't supposed to scroll with the label
+    pixel_scrolling = False
+
     def entry_is_checked(self, entry_num):
-        return self.el.states[entry_num]
+        return entry_num < len(self.el.states) and self.el.states[entry_num]
 
     def render_displayed_entry_text(self, entry_num):
         rendered_entry = []
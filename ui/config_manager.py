@@ -3,8 +3,9 @@ import json
 
 import traceback
 import collections
+from threading import Lock
 
-from helpers import setup_logger
+from helpers import setup_logger, monotonic
 
 logger = setup_logger(__name__, "warning")
 
@@ -17,26 +18,84 @@ def get_ui_config_manager():
     return _UI_CONFIG_MANAGER
 
 
+class FrozenDict(dict):
+    """
+    A dictionary that can't be changed - used for config snapshots that are shared
+    between all the UI elements. ``dict(frozen_dict)`` makes a changeable copy.
+
+    >>> d = FrozenDict({"a": 1})
+    >>> d["a"] = 2
+    Traceback (most recent call last):
+    ...
+    TypeError: Config snapshots can't be changed!
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Config snapshots can't be changed!")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+
+
+def freeze(config):
+    """Recursively converts a config dictionary into ``FrozenDict`` objects."""
+    if isinstance(config, collections.Mapping):
+        return FrozenDict((key, freeze(value)) for key, value in config.items())
+    return config
+
+
 class UIConfigManager(object):
+    """
+    Loads the UI config files from a directory - ``base_config.json``, then the
+    ``config*.json`` files that override it. The result is kept as an immutable
+    snapshot that's returned by ``get_global_config()``. If any of the files change
+    (judging by their mtimes, checked at most once per ``check_interval`` seconds),
+    the config is loaded again and the snapshot is replaced - UI elements created
+    after that get the new config.
+    """
+
     base_config_name = "base_config.json"
     user_config_prefix = "config"
     user_config_postfix = ".json"
+    check_interval = 1
 
     global_config = None
     path = None
 
     def __init__(self):
-        pass
+        self.files_state = None
+        self.last_check = None
+        self.lock = Lock()
 
     def set_path(self, path):
-        self.path = path
-        self.global_config = None #If path changes, global config is no longer valid
+        with self.lock:
+            self.path = path
+            self.global_config = None #If path changes, global config is no longer valid
 
     def get_global_config(self):
-        if not self.global_config:
-            self.load_all_configs(self.path)
+        now = monotonic()
+        if self.global_config is not None and now - self.last_check < self.check_interval:
+            return self.global_config
+        with self.lock:
+            self.last_check = now
+            files_state = self.get_files_state(self.path)
+            if self.global_config is None or files_state != self.files_state:
+                if self.global_config is not None:
+                    logger.info("UI config files changed, reloading")
+                self.load_all_configs(self.path)
+                self.files_state = files_state
         return self.global_config
 
+    def get_files_state(self, path):
+        """Returns the names and mtimes of the config files, to check whether the configs changed."""
+        state = []
+        for file in sorted(os.listdir(path)):
+            if file == self.base_config_name or (file.startswith(self.user_config_prefix) and file.endswith(self.user_config_postfix)):
+                try:
+                    state.append((file, os.stat(os.path.join(path, file)).st_mtime))
+                except OSError:
+                    pass
+        return state
+
     def update_config(self, base_config, new_config):
         #Taken from https://stackoverflow.com/a/18394648/1250228
         #TODO: add some logging here, to show when base config 
@@ -78,7 +137,8 @@ class UIConfigManager(object):
                 logger.exception(e)
             else:
                 base_config = self.update_config(base_config, config)
-        self.global_config = base_config
+        # The snapshot is replaced in one go, so the config is never seen half-loaded
+        self.global_config = freeze(base_config)
 
     def load_config(self, path):
         with open(path, "r") as f:
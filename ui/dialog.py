@@ -1,7 +1,7 @@
-from time import sleep
+from threading import Event
 from helpers import setup_logger
 
-from canvas import Canvas
+from canvas import Canvas, get_canvas
 
 logger = setup_logger(__name__, "info")
 
@@ -51,10 +51,12 @@ class DialogBox(object):
                     values[i] = self.default_options[value]
             self.values = values
         self.message = message
+        self.exit_event = Event()
         self.generate_keymap()
         self.set_view()
 
     def to_foreground(self):
+        self.exit_event.clear()
         self.in_foreground = True
         self.refresh()
         self.set_keymap()
@@ -88,10 +90,12 @@ class DialogBox(object):
             return None
 
     def idle_loop(self):
-        sleep(0.1)
+        # All the work is done in input callbacks, so there's nothing to do until the element exits
+        self.exit_event.wait()
 
     def deactivate(self):
         self.in_foreground = False
+        self.exit_event.set()
         logger.debug("{0} deactivated".format(self.name))
 
     def generate_keymap(self):
@@ -102,9 +106,7 @@ class DialogBox(object):
         }
 
     def set_keymap(self):
-        self.i.stop_listen()
-        self.i.clear_keymap()
-        self.i.keymap = self.keymap
+        self.i.set_keymap(self.keymap)
         self.i.listen()
 
     def move_left(self):
@@ -159,7 +161,7 @@ class TextView(object):
 class GraphicalView(TextView):
 
     def get_image(self):
-        c = Canvas(self.o)
+        c = get_canvas(self.o)
 
         #Drawing text
         second_line_position = 10
@@ -93,8 +93,6 @@ class NumberKeypadInputLayer(object):
 
     @to_be_foreground
     def set_keymap(self):
-        self.i.stop_listen()
-        self.i.clear_keymap()
         self.i.set_keymap(self.keymap)
         self.i.set_streaming(self.process_keycode)
         self.i.listen()
@@ -1,43 +1,134 @@
+from ui.utils import LRUCache
+
+layout_cache = LRUCache(256*1024) # (text, layout settings): rows - budget is in characters
+
 def ellipsize(string, length, ellipsis="..."):
     if len(string) <= length:
         return string
     string = string[:(length-len(ellipsis))]
     return string+ellipsis
 
-def format_for_screen(data, screen_width, break_words=False, linebreak=None):
-    strings = data.split('\n')
-    #Filter \n's
-    data = ' \n '.join(strings) #Making sure linebreaks are surrounded by space characters so that when splitting by space you don't have to scan for linebreaks and just can compare
-    words = data.split(' ')
-    screen_data = []
-    current_data = ""
-    for word in words:
-        #Five cases:
-        if not word: #An empty line encountered somehow
-            pass
-        elif word == '\n': #A linebreak, need to indent them in a way
-            screen_data.append(current_data)
-            current_data = ""
-            if linebreak is not None:
-                screen_data.append(linebreak) 
-        elif len(word) <= screen_width-len(current_data): #Word fits on current line
-            current_data += word+" "
-        elif not break_words and len(word) <= screen_width:
-            screen_data.append(current_data)
-            current_data = word+" "
+def get_font_measure(font):
+    """Returns a function that measures the width of a string in pixels, when drawn with the given PIL font."""
+    widths = {}
+    def measure(string):
+        if string not in widths:
+            widths[string] = font.getsize(string)[0]
+        return widths[string]
+    return measure
+
+def fit_prefix(word, width, measure):
+    """Returns the length of the longest beginning of ``word`` that fits into ``width``."""
+    if measure is len:
+        return max(width, 0)
+    lo, hi = 0, len(word)
+    while lo < hi:
+        middle = (lo + hi + 1) // 2
+        if measure(word[:middle]) <= width:
+            lo = middle
         else:
-            space_on_current_line = screen_width-len(current_data)
-            screen_data.append(current_data+word[:space_on_current_line])
-            word = word[space_on_current_line:]
-            current_line = ""
-            while word:
-                data = word[:screen_width]
-                if len(data) == screen_width: #Full line taken
-                    screen_data.append(data)
-                else:
-                    current_data = data+" "
-                word = word[screen_width:]
-    screen_data.append(current_data)
-    return screen_data
+            hi = middle - 1
+    return lo
+
+def wrap_text(data, screen_width, break_words=False, linebreak=None, measure=len):
+    """
+    Splits text into rows that fit into ``screen_width``, moving words that don't fit to
+    the next row. Words longer than a row are split, and so are words that don't fit
+    on the current row if ``break_words`` is set. Rows are yielded as they're laid out,
+    so only as much of the text is processed as is shown.
+
+    ``measure`` is a function that returns the width of a string - ``len`` for
+    character displays (where ``screen_width`` is in characters), or one returned
+    by ``get_font_measure()`` for wrapping by pixel widths.
+
+    >>> list(wrap_text("Hello and welcome to Aperture Science", 10))
+    ['Hello and', 'welcome to', 'Aperture', 'Science']
+    >>> list(wrap_text("Line one\\nline two", 10, linebreak="-"))
+    ['Line one', '-', 'line two']
+    """
+    space_width = measure(" ")
+    # An empty row is "minus one space" wide, so that the space before a word can always be counted
+    empty_width = -space_width
+    position = 0
+    while position <= len(data):
+        end = data.find("\n", position)
+        if end == -1:
+            end = len(data)
+        row, row_width = [], empty_width
+        for word in data[position:end].split(" "):
+            if not word: # Consecutive spaces are collapsed into one
+                continue
+            word_width = measure(word)
+            new_width = row_width + space_width + word_width
+            if new_width <= screen_width: # Word fits on current row
+                row.append(word)
+                row_width = new_width
+                continue
+            if not break_words and word_width <= screen_width:
+                yield " ".join(row)
+                row, row_width = [word], word_width
+                continue
+            # Filling the current row with the beginning of the word, then splitting the rest into rows
+            if row:
+                length = fit_prefix(word, screen_width - row_width - space_width, measure)
+                if length:
+                    row.append(word[:length])
+                    word = word[length:]
+                yield " ".join(row)
+            while True:
+                length = max(fit_prefix(word, screen_width, measure), 1)
+                if length >= len(word) and measure(word) <= screen_width:
+                    row, row_width = [word], measure(word)
+                    break
+                yield word[:length]
+                word = word[length:]
+                if not word:
+                    row, row_width = [], empty_width
+                    break
+        yield " ".join(row)
+        if end < len(data) and linebreak is not None:
+            yield linebreak
+        position = end + 1
+
+def format_for_screen(data, screen_width, break_words=False, linebreak=None, font=None):
+    """
+    Splits text into a list of rows that fit the screen (see ``wrap_text``). If a PIL
+    ``font`` is passed, ``screen_width`` is in pixels, and words are wrapped by their
+    width when drawn with the font. Layouts are cached, so formatting the same text
+    the same way again is cheap.
+    """
+    key = (data, screen_width, break_words, linebreak, font)
+    rows = layout_cache.get(key)
+    if rows is None:
+        measure = get_font_measure(font) if font is not None else len
+        rows = list(wrap_text(data, screen_width, break_words=break_words, linebreak=linebreak, measure=measure))
+        layout_cache.set(key, rows, len(data) + 64)
+    return list(rows)
+
+def iter_pages(data, screen_width, screen_rows, break_words=False, linebreak=None, font=None):
+    """
+    Yields screenfuls of rows (lists of ``screen_rows`` rows, the last one can be shorter)
+    for a text, as ``format_for_screen`` would lay it out. Uses the cached layout if there
+    is one - otherwise, only lays out as much of the text as the pages requested need,
+    and caches the layout once all the pages have been requested.
+    """
+    key = (data, screen_width, break_words, linebreak, font)
+    rows = layout_cache.get(key)
+    if rows is not None:
+        for start in range(0, len(rows), screen_rows):
+            yield rows[start:start+screen_rows]
+        return
+    measure = get_font_measure(font) if font is not None else len
+    rows = []
+    page = []
+    for row in wrap_text(data, screen_width, break_words=break_words, linebreak=linebreak, measure=measure):
+        rows.append(row)
+        page.append(row)
+        if len(page) == screen_rows:
+            yield page
+            page = []
+    if page:
+        yield page
+    layout_cache.set(key, rows, len(data) + 64)
 
 ffs = format_for_screen
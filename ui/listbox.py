@@ -21,6 +21,7 @@ class Listbox(BaseListUIElement):
     """
     selected_entry = None
     exit_entry = ["Exit", None]
+    searchable = True
 
     def __init__(self, *args, **kwargs):
         """Initialises the Listbox object.
@@ -6,7 +6,7 @@ from time import time
 from canvas import Canvas
 
 from ui import Refresher
-from ui.utils import clamp, Chronometer, to_be_foreground, Rect
+from ui.utils import clamp, to_be_foreground, Rect, LRUCache
 
 """
 These UI elements are used to show the user that something is happening in the background.
@@ -17,8 +17,28 @@ There are two types of loading indicator elements:
 2. "Loading" elements, for when you can't measure the progress, but have to show that a task is running in background
 
 These classes are based on `Refresher`.
+
+Graphical indicators don't draw their frames on each refresh - frames are rendered
+once (for the display size, message and other settings used) and kept in the
+``frame_cache``, so that an indicator shown while the device is busy with something
+else only costs a dictionary lookup and a ``display_image()`` call per refresh.
 """
 
+
+frame_cache = LRUCache(256*1024) # (indicator, display size and mode, frame settings): frame - budget is in bytes
+
+
+def get_cached_frame(key, render):
+    """
+    Returns the frame for the key from the ``frame_cache``, calling ``render()``
+    to render it if it's not in the cache yet.
+    """
+    frame = frame_cache.get(key)
+    if frame is None:
+        frame = render()
+        frame_cache.set(key, frame, len(frame.tobytes()))
+    return frame
+
 # ========================= abstract classes =========================
 
 
@@ -33,6 +53,17 @@ class BaseLoadingIndicator(Refresher):
     def on_refresh(self):
         pass
 
+    def get_frame_key(self, *args):
+        """Returns a ``frame_cache`` key for a frame of this indicator on the current display."""
+        return (self.__class__.__name__, self.o.width, self.o.height, self.o.device_mode) + args
+
+    def display_frame(self, key, render):
+        """Shows the cached frame for the key (rendering it if necessary),
+        unless it's the frame that's already shown."""
+        frame = get_cached_frame(key, render)
+        if self.data_changed(key):
+            self.o.display_image(frame)
+
     def set_message(self, new_message):
         self.message = new_message
         self.refresh()
@@ -75,31 +106,39 @@ class ProgressIndicator(BaseLoadingIndicator):
 
 class Throbber(BaseLoadingIndicator):
     """A throbber is a circular BaseLoadingIndicator, similar to those used on websites
-    or in smartphones. Suitable for graphical displays and looks great on them!"""
+    or in smartphones. Suitable for graphical displays and looks great on them!
+
+    The animation repeats every ``cycle`` seconds, and ``frame_count`` frames
+    of it are rendered - once for each message shown."""
+
+    cycle = 2  # seconds - the throbber's width changes with this period
+    frame_count = 40
 
     def __init__(self, i, o, *args, **kwargs):
         self._current_angle = 0
         self._current_range = 0  # range or width of the throbber
         self.rotation_speed = 360  # degree per second
-        # We use a counter to make the rotation speed independent of the refresh-rate
-        self.counter = Chronometer()
         self.start_time = 0
         self.message = kwargs.pop("message", None)
-        BaseLoadingIndicator.__init__(self, i, o, refresh_interval=0.01, *args, **kwargs)
+        BaseLoadingIndicator.__init__(self, i, o, refresh_interval=float(self.cycle)/self.frame_count, *args, **kwargs)
 
     def activate(self):
         self.start_time = time()
-        self.counter.start()
         return Refresher.activate(self)
 
     @to_be_foreground
     def refresh(self):
-        self.update_throbber_angle()
+        frame_number = int(((time() - self.start_time) % self.cycle) * self.frame_count / self.cycle)
+        key = self.get_frame_key(frame_number, self.frame_count, self.rotation_speed, self.message)
+        self.display_frame(key, lambda: self.render_frame(frame_number))
+
+    def render_frame(self, frame_number):
+        self.update_throbber_angle(float(frame_number) * self.cycle / self.frame_count)
         c = Canvas(self.o)
         self.draw_throbber(c)
         if self.message:
             self.draw_message(c)
-        self.o.display_image(c.get_image())
+        return c.get_image()
 
     def draw_message(self, c):
         # type: (Canvas) -> None
@@ -120,13 +159,10 @@ class Throbber(BaseLoadingIndicator):
             fill=True
         )
 
-    def update_throbber_angle(self):
-        self.counter.update()
-        self._current_angle += self.rotation_speed * self.counter.elapsed
-        time_since_activation = time() - self.start_time
+    def update_throbber_angle(self, time_since_activation):
+        self._current_angle = (self.rotation_speed * time_since_activation) % 360
         self._current_range = cos(time_since_activation * math.pi) / 2 + 0.5
         self._current_range = (self._current_range * 170) + 10
-        self.counter.restart()
 
 
 class IdleDottedMessage(BaseLoadingIndicator):
@@ -156,7 +192,12 @@ class CircularProgressBar(ProgressIndicator):
         self.show_percentage = kwargs.pop("show_percentage", True)
         BaseLoadingIndicator.__init__(self, i, o, *args, **kwargs)
 
+    @to_be_foreground
     def refresh(self):
+        key = self.get_frame_key(self.progress, self.show_percentage)
+        self.display_frame(key, self.render_frame)
+
+    def render_frame(self):
         c = Canvas(self.o)
         x, y = c.size
         radius = min(x, y) / 4
@@ -164,8 +205,7 @@ class CircularProgressBar(ProgressIndicator):
         c.arc(center_coordinates, start=0, end=360 * (self.progress / 100.0), fill=True)
         if self.show_percentage:
             c.centered_text(str(self.progress)+"%")
-
-        self.o.display_image(c.get_image())
+        return c.get_image()
 
 
 class TextProgressBar(ProgressIndicator):
@@ -234,49 +274,64 @@ class GraphicalProgressBar(ProgressIndicator):
         self.bar_height = kwargs.pop("bar_height", 15)
         BaseLoadingIndicator.__init__(self, i, o, *args, **kwargs)
 
+    @to_be_foreground
     def refresh(self):
+        key = self.get_frame_key(self.progress, *self.get_settings())
+        self.display_frame(key, self.render_frame)
+
+    def get_settings(self):
+        return (self.message, self.show_percentage, self.margin, self.text_margin,
+                self.percentage_margin, self.padding, self.bar_height)
+
+    def render_frame(self):
+        """Draws the percentage and the bar itself on top of the background,
+        which is the same for all frames with the same settings."""
         c = Canvas(self.o)
         if self.show_percentage:
             percentage_text = "{}%".format(self.progress)
             coords = c.get_centered_text_bounds(percentage_text)
-            c.text(percentage_text, (coords.left, self.percentage_margin), fill=True)  # Drawn top-centered (with margin)
             bar_top_min = self.margin + (coords.bottom - coords.top)
             bar_top = bar_top_min if self.margin < bar_top_min else self.margin
         else:
             bar_top = self.o.width / 2
+        key = self.get_frame_key("background", bar_top, *self.get_settings())
+        c = Canvas(self.o, base_image=get_cached_frame(key, lambda: self.render_background(bar_top)))
+        if self.show_percentage:
+            c.text(percentage_text, (coords.left, self.percentage_margin), fill=True)  # Drawn top-centered (with margin)
+        c.rectangle(self.get_bar_coords(bar_top), fill=True, outline=False)
+        return c.get_image()
 
+    def render_background(self, bar_top):
+        c = Canvas(self.o)
         self.draw_message(c)
-        self.draw_bar(c, bar_top)
-
-        self.o.display_image(c.get_image())
+        c.rectangle(self.get_outline_coords(bar_top), fill=False, outline=True)
+        return c.get_image()
 
     def draw_message(self, c):
         # type: Canvas -> None
         coords = c.get_centered_text_bounds(self.message)
         c.text(self.message, (coords.left, self.text_margin))
 
-    def draw_bar(self, c, top_y):
-        # type: (Canvas, int) -> None
-        outline_coords = Rect(
+    def get_outline_coords(self, top_y):
+        return Rect(
             self.margin,
             top_y,
             self.o.width - self.margin,
             min(top_y + self.bar_height, self.o.height - self.margin)
         )
 
+    def get_bar_coords(self, top_y):
+        outline_coords = self.get_outline_coords(top_y)
         bar_width = outline_coords.right - outline_coords.left - self.padding * 2
         bar_width *= (self.progress / 100.0)
 
-        bar_coords = Rect(
+        return Rect(
             outline_coords.left + self.padding,
             outline_coords.top + self.padding,
             outline_coords.left + self.padding + int(bar_width),
             outline_coords.bottom - self.padding
         )
 
-        c.rectangle(outline_coords, fill=False, outline=True)
-        c.rectangle(bar_coords, fill=True, outline=False)
-
 
 # noinspection PyPep8Naming
 def ProgressBar(i, o, *args, **kwargs):
@@ -19,6 +19,7 @@ class Menu(BaseListBackgroundableUIElement):
     in_background = False  #: flag which indicates whether menu is currently active, either being displayed or just waiting in background (for example, when you go into a sub-menu, the parent menu will still be considered active).
     in_foreground = False  #: flag which indicates whether menu is currently displayed.
     exit_exception = False
+    searchable = False  #: whether menu entries can be searched by typing on the numpad.
 
     def __init__(self, *args, **kwargs):
         """Initialises the Menu object.
@@ -47,9 +48,11 @@ class Menu(BaseListBackgroundableUIElement):
             * ``catch_exit``: If ``MenuExitException`` is received and catch_exit is False, it passes ``MenuExitException`` to the parent menu so that it exits, too. If catch_exit is True, MenuExitException is not passed along.
             * ``exitable``: Decides if menu can exit by pressing ``KEY_LEFT``. Set by default and disables ``KEY_LEFT`` callback if unset. Is used for ZPUI main menu, not advised to be used in other settings.
             * ``contents_hook``: A function that is called every time menu goes in foreground that returns new menu contents. Allows to almost-dynamically update menu contents.
+            * ``searchable``: If True, menu entries can be searched by typing on the numpad (the digit keys that aren't in the ``keymap`` are used for that). Not set by default.
 
         """
         self.catch_exit = kwargs.pop("catch_exit", True)
+        self.searchable = kwargs.pop("searchable", self.searchable)
         self.contents_hook = kwargs.pop("contents_hook", None)
         BaseListBackgroundableUIElement.__init__(self, *args, **kwargs)
 
@@ -136,26 +139,21 @@ class MenuRenderingMixin(object):
             )
             c.polygon(coords, fill=c.default_color)
 
-
-class MeEightPtView(MenuRenderingMixin, EightPtView):
-
     def draw_menu_text(self, c, menu_text, left_offset):
+        font = self.get_row_font(c)
         for i, line in enumerate(menu_text):
-            y = (i * self.charheight - 1) if i != 0 else 0
-            c.text(line, (left_offset, y))
+            self.draw_menu_row(c, i, line, left_offset, font=font)
             self.draw_triangle(c, i)
 
 
+class MeEightPtView(MenuRenderingMixin, EightPtView):
+    pass
+
+
 class MeTextView(MenuRenderingMixin, TextView):
     # Arrow rendering not yet done for text-based displays =(
     pass
 
 
 class MeSixteenPtView(MenuRenderingMixin, SixteenPtView):
-
-    def draw_menu_text(self, c, menu_text, left_offset):
-        font = c.load_font(self.font, self.charheight)
-        for i, line in enumerate(menu_text):
-            y = (i * self.charheight - 1) if i != 0 else 0
-            c.text(line, (left_offset, y), font=font)
-            self.draw_triangle(c, i)
+    pass
@@ -130,10 +130,7 @@ class IntegerAdjustInput(object):
 
     @to_be_foreground
     def set_keymap(self):
-        self.generate_keymap()
-        self.i.stop_listen()
-        self.i.clear_keymap()
-        self.i.keymap = self.keymap
+        self.i.set_keymap(self.keymap)
         self.i.listen()
 
     def get_displayed_data(self):
@@ -17,6 +17,8 @@ class NumberedMenu(Menu):
     (default: `True`)
     """
 
+    searchable = False  # Digits are used to jump to entries instead
+
     def __init__(self, *args, **kwargs):
         self.prepend_numbers = kwargs.pop('prepend_numbers', True)
         self.input_delay = kwargs.pop('input_delay', 1)
@@ -58,7 +60,7 @@ class NumberedMenu(Menu):
             self.process_multi_digit_input(key)
         else:
             self.process_single_digit_input(key)
-        self.view.refresh()
+        self.refresh()
 
     def process_single_digit_input(self, key):
         self.move_to_entry(self.numeric_keymap[key])
@@ -79,7 +81,7 @@ class NumberedMenu(Menu):
             return
         self.pointer = clamp(index, 0, len(self.contents) - 1)
         self.current_input = None
-        self.view.refresh()
+        self.refresh()
 
     def process_contents(self):
         Menu.process_contents(self)
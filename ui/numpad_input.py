@@ -1,6 +1,6 @@
+import re
 from copy import copy
-from time import sleep
-from threading import Lock
+from threading import Lock, Event, Timer, current_thread
 from functools import wraps
 
 from helpers import setup_logger
@@ -8,6 +8,8 @@ from ui.utils import to_be_foreground, check_value_lock
 
 logger = setup_logger(__name__, "warning")
 
+word_end_re = re.compile("[a-zA-Z]+$")
+
 def check_position_overflow(condition):
     """Returns a decorator which can check for different ways of "self.position" counter overflow """
     def decorator(func):
@@ -39,6 +41,7 @@ class NumpadCharInput(object):
     Attributes:
 
     * ``value``: currently entered number string.
+    * ``predictive``: whether words are typed with one keypress per letter, using the dictionary.
     * ``in_foreground``: A flag which indicates if UI element is currently displayed. If it's not active, inhibits any of element's actions which can interfere with other UI element being displayed.
 
     """
@@ -73,18 +76,35 @@ class NumpadCharInput(object):
     position = 0
     value_lock = None
     pending_character = None
-    pending_counter = 0
-    pending_counter_start = 10 #Multiples of 0.1 second interval
+    pending_timer = None
+    pending_timeout = 1 #Seconds before a pending character is accepted
     current_letter_num = 0
     __locked_name__ = None
 
-    def __init__(self, i, o, message="Value:", value="", name="NumpadCharInput", mapping=None):
+    predictive = False
+    word_digits = ""
+    word_start = 0
+    word = ""
+    candidates = []
+    candidate_num = 0
+    word_known = False
+    multitap_word = False
+
+    def __init__(self, i, o, message="Value:", value="", name="NumpadCharInput", mapping=None, dictionary=None):
         """Initialises the NumpadCharInput object.
         
         Args:
 
             * ``i``, ``o``: input&output device objects
 
+        Kwargs:
+
+            * ``dictionary``: a ``T9Dictionary`` object. If passed, the input starts in
+              predictive mode, where letters are typed with one keypress each and words
+              are guessed from the digits typed. ``*`` shows the next guess, ``F5``
+              switches between predictive and multi-tap modes. Words typed in multi-tap
+              mode are added to the dictionary once they're finished.
+
         """
         self.i = i
         self.o = o
@@ -99,6 +119,11 @@ class NumpadCharInput(object):
             self.mapping = copy(self.default_mapping)
         self.value_lock = Lock()
         self.value_accepted = False
+        self.exit_event = Event()
+        self.dictionary = dictionary
+        if dictionary is not None:
+            self.predictive = True
+            self.action_keys["F5"] = "toggle_predictive"
 
     #Default set of UI element functions -
 
@@ -106,6 +131,7 @@ class NumpadCharInput(object):
         """ Is called when ``activate()`` method is used, sets flags and performs all the actions so that UI element can display its contents and receive keypresses. Also, refreshes the screen."""
         logger.info("{0} enabled".format(self.name))
         self.value_accepted = False
+        self.exit_event.clear()
         self.in_foreground = True
         self.refresh()
         self.set_keymap()
@@ -128,12 +154,14 @@ class NumpadCharInput(object):
             return None
 
     def idle_loop(self):
-        sleep(0.1)
-        self.check_character_state()
+        # Pending characters are accepted by a timer, so there's nothing to do until the element exits
+        self.exit_event.wait()
 
     def deactivate(self):
         """ Deactivates the UI element, exiting it and thus making activate() return."""
         self.in_foreground = False
+        self.cancel_pending_timer()
+        self.exit_event.set()
         logger.info("{0} deactivated".format(self.name))
 
     def deactivate_if_first(self):
@@ -143,6 +171,10 @@ class NumpadCharInput(object):
 
     def accept_value(self):
         logger.info("{0}: accepted value".format(self.name))
+        if self.dictionary is not None:
+            self.commit_word()
+            self.learn_multitap_word()
+            self.dictionary.save()
         self.value_accepted = True
         self.deactivate()
 
@@ -158,6 +190,15 @@ class NumpadCharInput(object):
             #Is one of the action keys
             getattr(self, self.action_keys[key])()
             return
+        if self.predictive and self.process_predictive_key(key):
+            self.refresh()
+            return
+        if key in self.mapping and self.dictionary is not None:
+            if self.mapping[key][0].isalpha():
+                self.multitap_word = True
+            else:
+                #A space or punctuation - the word before it is finished
+                self.learn_multitap_word()
         if key in self.mapping:
             #It's one of the keys we can process
             #NO INSERT IN MIDDLE/START SUPPORT
@@ -177,7 +218,7 @@ class NumpadCharInput(object):
                     #So, onto the "countdown before character accepted" mechanism
                     self.pending_character = key
                     #Starting the "time before the character is accepted" countdown
-                    self.pending_counter = self.pending_counter_start
+                    self.start_pending_timer()
                     #Output things on display
             elif self.pending_character != key: #Currently another key pending
                 #Advancing position and inserting a new letter
@@ -197,7 +238,7 @@ class NumpadCharInput(object):
                     #So, onto the "countdown before character accepted" mechanism
                     self.pending_character = key
                     #Starting the "time before the character is accepted" countdown
-                    self.pending_counter = self.pending_counter_start
+                    self.start_pending_timer()
                     #Output things on display
             elif self.pending_character == key: #Current pending key is the same as the one pressed
                 #Just updating the value and resetting the countdown
@@ -210,12 +251,86 @@ class NumpadCharInput(object):
                 self.update_letter_in_value(letter)
                 #For fast typists, not resetting the counter could be an option in the future
                 #That'd mean there'd be only 1 second in total to choose from all letters, so it needs to be tested
-                self.pending_counter = self.pending_counter_start
+                self.start_pending_timer()
             #Finally, output all changes to display
             self.refresh()
 
     def backspace(self):
-        self.remove_letter_in_value()
+        if self.word_digits:
+            self.word_digits = self.word_digits[:-1]
+            self.update_word()
+        else:
+            self.remove_letter_in_value()
+        self.refresh()
+
+    #Functions for predictive input
+
+    def process_predictive_key(self, key):
+        """
+        Processes a key in predictive mode. Returns False if the key
+        needs to be processed as a multi-tap key instead.
+        """
+        if key in self.dictionary.letter_keys:
+            if self.pending_character is not None:
+                # Accepting the multi-tap character that's pending
+                self.pending_character = None
+                self.position += 1
+            if not self.word_digits:
+                self.word_start = self.position
+            self.word_digits += key
+            self.update_word()
+            return True
+        if key == "*" and self.word_digits:
+            self.candidate_num = (self.candidate_num + 1) % len(self.candidates)
+            self.update_word(keep_candidates=True)
+            return True
+        # Punctuation, spaces and other characters are typed as usual, after the word
+        self.commit_word()
+        return False
+
+    def update_word(self, keep_candidates=False):
+        """Replaces the word being typed in the value with the current guess."""
+        if not keep_candidates:
+            self.candidates = self.dictionary.lookup(self.word_digits)
+            self.word_known = bool(self.candidates)
+            if not self.candidates:
+                # Nothing in the dictionary - keeping the previous guess, adding the first letters of new keys
+                guess = self.word[:len(self.word_digits)]
+                guess += "".join([self.mapping[digit][0] for digit in self.word_digits[len(guess):]])
+                self.candidates = [guess]
+            self.candidate_num = 0
+        word = self.candidates[self.candidate_num]
+        self.value = self.value[:self.word_start] + word + self.value[self.word_start + len(self.word):]
+        self.word = word
+        self.position = self.word_start + len(word)
+
+    def commit_word(self):
+        """Accepts the word being typed, so that the next key starts a new word."""
+        if not self.word_digits:
+            return
+        if self.word_known:
+            self.dictionary.learn(self.word)
+        self.word_digits = ""
+        self.word = ""
+        self.candidates = []
+
+    def learn_multitap_word(self):
+        """
+        Adds the word before the cursor to the dictionary if some of its letters were
+        typed in multi-tap mode - that's how words the dictionary doesn't know get into it.
+        """
+        if not self.multitap_word:
+            return
+        self.multitap_word = False
+        end = self.position + 1 if self.pending_character is not None else self.position
+        match = word_end_re.search(self.value[:end])
+        if match:
+            self.dictionary.learn(match.group())
+
+    def toggle_predictive(self):
+        self.commit_word()
+        self.learn_multitap_word()
+        self.predictive = not self.predictive
         self.refresh()
 
     #Functions that do processing on the current value
@@ -259,18 +374,33 @@ class NumpadCharInput(object):
             self.value = self.value[:-1]
             self.position -= 1
 
-    #Functions that work with "pending counter"
+    #Functions that work with "pending timer"
+
+    def start_pending_timer(self):
+        self.cancel_pending_timer()
+        self.pending_timer = Timer(self.pending_timeout, self.on_pending_timeout)
+        self.pending_timer.daemon = True
+        self.pending_timer.start()
+
+    def cancel_pending_timer(self):
+        if self.pending_timer is not None:
+            self.pending_timer.cancel()
+            self.pending_timer = None
 
     @check_value_lock
-    def check_character_state(self):
-        if self.pending_character is not None:
-            #Character still pending
-            self.pending_counter -= 1
-            if self.pending_counter == 0:
-                self.skip() # advancing to the next character
+    def on_pending_timeout(self):
+        # A key might've been pressed while the timer was waiting for the lock,
+        # restarting the timer - then, this one is no longer the current timer
+        if current_thread() is self.pending_timer and self.pending_character is not None:
+            self.skip() # advancing to the next character
 
     def skip(self):
-        #Counter reset
+        if self.word_digits:
+            self.commit_word()
+            self.refresh()
+            return
+        #Timer reset
+        self.cancel_pending_timer()
         self.pending_character = None
         #Advancing position so that cursor takes the next space
         self.position += 1
@@ -280,7 +410,6 @@ class NumpadCharInput(object):
 
     @to_be_foreground
     def set_keymap(self):
-        self.i.stop_listen()
         self.i.clear_keymap()
         self.i.set_streaming(self.process_streaming_keycode)
         self.i.listen()
@@ -1,13 +1,107 @@
 import os
+from collections import OrderedDict
+from threading import Thread, Event, Lock, RLock
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # Backport of os.scandir() for Python 2
+        from scandir import scandir
+    except ImportError:
+        scandir = None
 
 from menu import Menu, MenuExitException, to_be_foreground
+from base_list_ui import LazyContents
 from printer import Printer
+from search import T9SearchIndex
 from helpers import setup_logger
 logger = setup_logger(__name__, "warning")
 
+
+listing_cache = OrderedDict()
+listing_cache_size = 64
+listing_cache_lock = Lock()
+
+
+def iterate_directory(path):
+    """Yields ``(name, is_dir)`` tuples for the directory's entries. With ``scandir``,
+    whether an entry is a directory is mostly known without calling ``stat()``."""
+    if scandir is not None:
+        for entry in scandir(path):
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            yield entry.name, is_dir
+    else:
+        for name in os.listdir(path):
+            yield name, os.path.isdir(os.path.join(path, name))
+
+
+def get_cached_listing(path):
+    """Returns the cached ``(dirs, files)`` listing of a directory, or None if the
+    directory hasn't been listed yet or has been changed since (judging by its mtime)."""
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    with listing_cache_lock:
+        if path in listing_cache and listing_cache[path][0] == mtime:
+            return listing_cache[path][1:]
+    return None
+
+
+def list_directory(path, cancel_event=None, on_update=None):
+    """
+    Returns sorted lists of directory and file names in the directory, as a ``(dirs, files)``
+    tuple - from the ``listing_cache`` if the directory hasn't changed since it was last listed.
+    While a directory is being listed, ``on_update`` is called with partial (sorted) lists
+    now and then. If ``cancel_event`` is set while listing, returns None.
+    """
+    listing = get_cached_listing(path)
+    if listing is not None:
+        return listing
+    mtime = os.stat(path).st_mtime
+    dirs, files = [], []
+    next_update = 32
+    for name, is_dir in iterate_directory(path):
+        if cancel_event is not None and cancel_event.isSet():
+            return None
+        (dirs if is_dir else files).append(name)
+        # Updates are twice as far apart each time, so that sorting doesn't take longer than listing
+        if on_update is not None and len(dirs) + len(files) == next_update:
+            on_update(sorted(dirs), sorted(files))
+            next_update *= 2
+    dirs.sort()
+    files.sort()
+    with listing_cache_lock:
+        listing_cache.pop(path, None)
+        listing_cache[path] = (mtime, dirs, files)
+        while len(listing_cache) > listing_cache_size:
+            listing_cache.popitem(last=False)
+    return dirs, files
+
+
+def has_subdirectories(path, cancel_event=None):
+    """Tells whether there are directories in the directory, stopping at the first one found.
+    Unlike ``list_directory``, doesn't put the listing into the ``listing_cache`` - most of the
+    directories checked are never opened, and would push useful listings out of the cache."""
+    listing = get_cached_listing(path)
+    if listing is not None:
+        return bool(listing[0])
+    for name, is_dir in iterate_directory(path):
+        if is_dir:
+            return True
+        if cancel_event is not None and cancel_event.isSet():
+            break
+    return False
+
+
 class PathPicker(Menu):
 
     path_chosen = None
+    searchable = True
 
     def __init__(self, path, i, o, callback = None, name = None, display_hidden = False, dirs_only = False, current_dot = False, prev_dot = True, scrolling=True, **kwargs):
         """Initialises the PathPicker object.
@@ -36,6 +130,14 @@ class PathPicker(Menu):
         self.current_dot = current_dot
         self.prev_dot = prev_dot
         self.menu_pointers = {}
+        self.listing = ([], [])
+        self.entries = []
+        self.entry_indices = {}
+        self.has_subdirs = {}
+        self.listing_cancel_event = None
+        # Held while the contents or the pointer are changed - by the listing thread
+        # and by the keys that move the pointer or search the entries
+        self.listing_lock = RLock()
         self.set_path(os.path.normpath(path))
         self.update_keymap()
 
@@ -70,8 +172,20 @@ class PathPicker(Menu):
             "KEY_RIGHT":lambda: self.options_menu(),
             "KEY_LEFT": lambda: self.go_back()
         })
+        # Callbacks of these keys can take a long time, and don't change the contents
+        for key in set(self.keymap.keys()) - {"KEY_ENTER", "KEY_RIGHT"}:
+            self.keymap[key] = self.get_locked_callback(self.keymap[key])
+
+    def get_locked_callback(self, callback):
+        def wrapper():
+            with self.listing_lock:
+                return callback()
+        return wrapper
 
     def go_back(self):
+        if self.search_query:
+            self.search_remove_digit()
+            return
         if self.path == '/':
             self.deactivate()
             return
@@ -79,50 +193,142 @@ class PathPicker(Menu):
         self.goto_dir(parent_path)
 
     def set_path(self, path):
-        self.path = path
-        self.name = "{}-{}".format(self.base_name, self.path)
-        self.set_contents(self.regenerate_contents())
+        """
+        Switches to a directory. If the directory's listing isn't cached, it's listed
+        in a background thread, and entries are shown as they're found. In ``dirs_only``
+        mode, the background thread then checks which directories have subdirectories.
+        """
+        with self.listing_lock:
+            if self.listing_cancel_event is not None:
+                # Still listing the previous directory
+                self.listing_cancel_event.set()
+                self.listing_cancel_event = None
+            self.path = path
+            self.name = "{}-{}".format(self.base_name, self.path)
+            self.has_subdirs = {}
+            listing = get_cached_listing(path)
+            if listing is None or self.dirs_only:
+                self.listing_cancel_event = Event()
+                t = Thread(target=self.list_in_background, args=(path, self.listing_cancel_event, listing),
+                           name="PathPicker listing thread ({})".format(path))
+                t.daemon = True
+                t.start()
+            self.listing = listing if listing is not None else ([], [])
+            self.set_contents(self.regenerate_contents())
+            self.select_path_entry(self.menu_pointers.get(path, None))
+
+    def list_in_background(self, path, cancel_event, listing=None):
+        if listing is None:
+            on_update = lambda dirs, files: self.on_listing_update(path, cancel_event, (dirs, files))
+            try:
+                listing = list_directory(path, cancel_event, on_update)
+            except OSError as e:
+                logger.warning("{}: couldn't list {}: {}".format(self.base_name, path, e))
+                listing = ([], [])
+            if listing is None:
+                return
+            self.on_listing_update(path, cancel_event, listing, finished=True)
+        if self.dirs_only:
+            self.check_subdirectories(path, cancel_event, listing[0])
+        with self.listing_lock:
+            if self.listing_cancel_event is cancel_event:
+                self.listing_cancel_event = None
+
+    def check_subdirectories(self, path, cancel_event, dirs):
+        """Finds out which of the directories have subdirectories, so that, in ``dirs_only``
+        mode, the ones that don't can be picked right away."""
+        has_subdirs = {}
+        for dir in dirs:
+            if cancel_event.isSet():
+                return
+            full_path = os.path.join(path, dir)
+            try:
+                has_subdirs[full_path] = has_subdirectories(full_path, cancel_event)
+            except OSError:
+                has_subdirs[full_path] = False
+        with self.listing_lock:
+            if cancel_event.isSet():
+                return
+            self.has_subdirs = has_subdirs
+        self.on_listing_update(path, cancel_event, self.listing)
+
+    def on_listing_update(self, path, cancel_event, listing, finished=False):
+        """Shows the entries listed so far, keeping the selected entry selected
+        and the search in progress (if there is one) going."""
+        with self.listing_lock:
+            if cancel_event.isSet():
+                return
+            self.listing = listing
+            selected_path = self.get_selected_path()
+            if finished and path in self.menu_pointers:
+                selected_path = self.menu_pointers[path]
+            query = self.search_query
+            self.set_contents(self.regenerate_contents())
+            if query:
+                self.search_index = T9SearchIndex(self.get_entry_labels())
+                matches = self.search_index.search(query)
+                if matches:
+                    self.show_search_results(query, matches)
+            self.select_path_entry(selected_path)
+            if self.in_foreground:
+                self.refresh()
+
+    def get_selected_path(self):
+        """Returns the full path of the entry selected, or None if there are no entries."""
+        index = self.search_matches[self.pointer] if self.search_matches else self.pointer
+        if 0 <= index < len(self.entries):
+            return self.entries[index][1]
+        return None
+
+    def select_path_entry(self, path):
+        """Moves the pointer to the entry for the path, or to the first entry if it's not there."""
+        index = self.entry_indices.get(path, 0)
+        if self.search_matches:
+            index = self.search_matches.index(index) if index in self.search_matches else 0
+        self.pointer = index
+        self.view.fix_pointers_on_contents_update()
 
     def regenerate_contents(self):
-        print("Regenerating contents")
-        contents = []
-        self.pointer = 0
+        logger.debug("Regenerating contents")
+        entries = []
         if self.path != '/':
             if self.current_dot or self.prev_dot:
                 dot_path = os.path.join(self.path, '.')
-                if self.current_dot: contents.append(['.', lambda: self.goto_dir(dot_path)])
-                if self.prev_dot: contents.append(['..', lambda: self.goto_dir(dot_path+'.')])
-        path_contents = os.listdir(self.path)
-        files = []
-        dirs = []
-        for item in path_contents:
-            full_path = os.path.join(self.path, item)
-            if os.path.isdir(full_path):
-                if not (self.display_hidden and item.startswith('.')):
-                    dirs.append(item)
-            else:
-                if not (self.display_hidden and item.startswith('.')):
-                    if not self.dirs_only:
-                        files.append(item)
-        dirs.sort()
-        files.sort()
-        for dir in dirs:
-            full_path = os.path.join(self.path, dir)
+                if self.current_dot: entries.append(('.', dot_path, "dot"))
+                if self.prev_dot: entries.append(('..', dot_path+'.', "dot"))
+        dirs, files = self.listing
+        dirs = [item for item in dirs if not (self.display_hidden and item.startswith('.'))]
+        if self.dirs_only:
+            files = []
+        else:
+            files = [item for item in files if not (self.display_hidden and item.startswith('.'))]
+        entries += [(dir, os.path.join(self.path, dir), "dir") for dir in dirs]
+        entries += [(file, os.path.join(self.path, file), "file") for file in files]
+        self.entries = entries
+        self.entry_indices = dict([(entry[1], index) for index, entry in enumerate(entries)])
+        # Entries (and their callbacks) are only created once they're shown
+        return LazyContents(len(entries), lambda index: self.get_entry(*entries[index]),
+                            get_label=lambda index: entries[index][0])
+
+    def get_entry(self, name, full_path, entry_type):
+        if entry_type == "dot":
+            return [name, lambda: self.goto_dir(full_path)]
+        elif entry_type == "dir":
             if self.dirs_only:
-                isdir = lambda x: os.path.isdir(os.path.join(full_path, x))
-                dirs_in_dir = [isdir(e) for e in os.listdir(full_path)]
-                if any(dirs_in_dir):
+                has_subdirs = self.has_subdirs.get(full_path, None)
+                if has_subdirs is None:
+                    #Not checked yet - checking once the directory is picked
+                    return [name, lambda: self.goto_or_select_dir(full_path)]
+                elif has_subdirs:
                     #Directory has other directories inside
-                    contents.append([dir, lambda x=full_path: self.goto_dir(x), lambda: True])
+                    return [name, lambda: self.goto_dir(full_path), lambda: True]
                 else:
                     #Directory has no other directories inside
-                    contents.append([dir, lambda x=full_path: self.select_path(x)])
+                    return [name, lambda: self.select_path(full_path)]
             else:
-                contents.append([dir, lambda x=full_path: self.goto_dir(x), lambda: True])
-        for file in files:
-            full_path = os.path.join(self.path, file)
-            contents.append([file, lambda x=full_path: self.select_path(x)])
-        return contents
+                return [name, lambda: self.goto_dir(full_path), lambda: True]
+        else:
+            return [name, lambda: self.select_path(full_path)]
 
     @to_be_foreground
     def options_menu(self):
@@ -139,7 +345,9 @@ class PathPicker(Menu):
             return contents
         Menu([], self.i, self.o, contents_hook=get_contents, name="PathPicker context menu").activate()
         if self.in_background:
-            self.set_contents(self.regenerate_contents())
+            with self.listing_lock:
+                self.set_contents(self.regenerate_contents())
+                self.select_path_entry(full_path)
             self.to_foreground()
 
     def toggle_display_hidden(self):
@@ -163,19 +371,20 @@ class PathPicker(Menu):
     #@to_be_foreground
     def goto_dir(self, dir):
         dir = os.path.normpath(dir)
-        self.menu_pointers[self.path] = self.pointer
+        # Remembering the entry selected by its path - the directory might change while we're away
+        self.menu_pointers[self.path] = self.get_selected_path()
         self.set_path(dir)
-        if self.path in self.menu_pointers:
-            pointer = self.menu_pointers[self.path]
-            #If parent directory changed contents while we were browsing child directory, the count will be different
-            #So, a quick check
-            if pointer >= len(self.contents):
-                self.pointer = len(self.contents)-1
-            else:
-                self.pointer = pointer
+        self.refresh()
+
+    def goto_or_select_dir(self, dir):
+        try:
+            has_subdirs = has_subdirectories(dir)
+        except OSError:
+            has_subdirs = False
+        if has_subdirs:
+            self.goto_dir(dir)
         else:
-            self.pointer = 0
-        self.view.refresh()
+            self.select_path(dir)
 
     #@to_be_foreground
     def select_path(self, path):
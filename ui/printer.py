@@ -1,14 +1,24 @@
 import PIL
 from PIL import ImageOps
 from time import sleep
-from funcs import format_for_screen as ffs
+from funcs import format_for_screen as ffs, iter_pages
+from canvas import get_default_font
+
+def get_wrap_settings(o):
+    """Returns the width (in characters or pixels) to wrap text to on the output device,
+    and the font to measure text with - on graphical displays, text is drawn with
+    the default font, so it's wrapped by its width in pixels."""
+    if "b&w-pixel" in o.type:
+        return o.width, get_default_font()
+    return o.cols, None
 
 def Printer(message, i, o, sleep_time=1, skippable=True):
     """Outputs a string, or a list of strings, on a display as soon as it's called.
-    A string will be split into a list, a list will not be modified. 
+    A string will be wrapped (by words) into rows that fit the screen, a list will not be modified.
     The resulting list is then displayed string-by-string.
     If resulting strings will take more than one screen, they'll be split
-    into multiple screenfuls and shown one-by-one.
+    into multiple screenfuls and shown one-by-one. A string is only wrapped as far
+    as it's been shown, so exiting the Printer early doesn't waste time on the rest of it.
                                                                                
     Args:
 
@@ -31,38 +41,29 @@ def Printer(message, i, o, sleep_time=1, skippable=True):
 
     #If skippable option is enabled, etting input callbacks on keys we use for skipping screens
     if i is not None: #On boot, None is passed to print debugging messages when i is not yet initialized
-        i.stop_listen()
-        i.clear_keymap()
+        keymap = {"KEY_LEFT": exit_printer}
         if skippable:
-            i.set_callback("KEY_ENTER", skip_screen)
-        i.set_callback("KEY_LEFT", exit_printer)
+            keymap["KEY_ENTER"] = skip_screen
+        i.set_keymap(keymap)
         i.listen()
 
-    #Now onto rendering the message
-    rendered_message = []
-    if isinstance(message, basestring): #Dividing the string into screen-sized chunks
-        screen_width = o.cols
-        while message:
-           rendered_message.append(message[:screen_width])
-           message = message[screen_width:]
+    #Now onto splitting the message into screenfuls
+    screen_rows = o.rows
+    if isinstance(message, basestring): #Wrapping the string, one screen at a time
+        screen_width, font = get_wrap_settings(o)
+        screens = iter_pages(message, screen_width, screen_rows, font=font) if message else []
     elif type(message) in (list, tuple): #It's simple then, just output it as it is.
        rendered_message = list(message)
        for element in message:
            if not isinstance(element, basestring):
                raise ValueError("Found {} in message! {}".format(type(element), element))
+       screens = [rendered_message[start:start+screen_rows] for start in range(0, len(rendered_message), screen_rows)]
     else:
        raise ValueError("{} can't be passed to Printer! {}".format(type(message), message))
 
-    #Now onto calculating the parameters and displaying the message screen-by-screen
-    screen_rows = o.rows
-    render_length = len(rendered_message)
-    num_screens = render_length/screen_rows #Number of screens it will take to show the whole message
-    if render_length%screen_rows != 0: #There is one more screen necessary, it's just not full but we need it.
-        num_screens += 1
-    for screen_num in range(num_screens):
+    #Now onto displaying the message screen-by-screen
+    for screen_data in screens:
         Printer.skip_screen_flag = False
-        shown_element_numbers = [(screen_num*screen_rows)+i for i in range(screen_rows)]
-        screen_data = [rendered_message[i] for i in shown_element_numbers if i in range(render_length)] 
         o.display_data(*screen_data)
         poll_period = 0.1
         sleep_periods = sleep_time/poll_period
@@ -75,7 +76,8 @@ def Printer(message, i, o, sleep_time=1, skippable=True):
 
 def PrettyPrinter(text, i, o, *args, **kwargs):
     """Outputs string data on display as soon as it's called. Will pass the data 
-    through format_for_screen function before passing it on to Printer.
+    through format_for_screen function before passing it on to Printer
+    (the layout is cached, so showing the same text again doesn't format it again).
     If text will take more than one screen, it'll be split into multiple 
     screenfuls to fit.
 
@@ -88,7 +90,8 @@ def PrettyPrinter(text, i, o, *args, **kwargs):
 
         * ``sleep_time``: Time to display each screenful of text.
         * ``skippable``: If set, allows skipping screens by presing ENTER."""
-    Printer(ffs(text, o.cols), i, o, *args, **kwargs)
+    screen_width, font = get_wrap_settings(o)
+    Printer(ffs(text, screen_width, font=font), i, o, *args, **kwargs)
 
 def GraphicsPrinter(image_or_path, i, o, sleep_time=1, invert=True):
     """Outputs image on the display, as soon as it's called.
@@ -112,10 +115,7 @@ def GraphicsPrinter(image_or_path, i, o, sleep_time=1, invert=True):
     def exit_printer():
         GraphicsPrinter.exit_flag = True
     if i is not None:
-        i.stop_listen()
-        i.clear_keymap()
-        i.set_callback("KEY_LEFT", exit_printer)
-        i.set_callback("KEY_ENTER", exit_printer)
+        i.set_keymap({"KEY_LEFT": exit_printer, "KEY_ENTER": exit_printer})
         i.listen()
     if invert: image = ImageOps.invert(image.convert('L'))
     image = image.convert(o.device_mode)
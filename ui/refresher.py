@@ -1,9 +1,8 @@
-from threading import Event
-from time import sleep
+from threading import Event, Lock, Thread
 
 import PIL
 
-from helpers import setup_logger
+from helpers import setup_logger, DeadlineTimer
 from ui.utils import to_be_foreground
 
 logger = setup_logger(__name__, "info")
@@ -13,15 +12,126 @@ class RefresherExitException(Exception):
     pass
 
 
+class DataSource(object):
+    """
+    A source of data for a ``Refresher``, for when it's the data that decides when
+    the screen needs to be updated - instead of the ``Refresher`` polling for it.
+    Call ``publish()`` with new data (from any thread), and all the ``Refresher``
+    objects using the source will show it.
+
+    Args:
+
+        * ``data``: initial data, in any format a ``Refresher`` accepts.
+          If it's None, nothing is shown until data is published.
+    """
+
+    def __init__(self, data=None):
+        self.data = data
+        self.subscribers = []
+        self.lock = Lock()
+
+    def get(self):
+        """Returns the data that was published last."""
+        return self.data
+
+    def publish(self, data):
+        """Stores new data and notifies the subscribers about it."""
+        self.data = data
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            callback(data)
+
+    def subscribe(self, callback):
+        """Adds a callback that will be called with the data each time it's published."""
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+
+class PollingDataSource(DataSource):
+    """
+    A ``DataSource`` that calls a function every ``interval`` seconds and publishes
+    what it returns - for data that can't notify anyone when it changes. The
+    function is called from a thread of its own, which only runs while the
+    source has subscribers, so the function can take its time (i.e. call
+    external commands) without blocking the UI.
+
+    Args:
+
+        * ``function``: function that returns data to be shown
+        * ``interval``: time between the function calls, in seconds
+    """
+
+    stop_event = None
+    timer = None
+
+    def __init__(self, function, interval, name=None):
+        DataSource.__init__(self)
+        self.function = function
+        self.interval = interval
+        self.name = name if name else getattr(function, "__name__", "PollingDataSource")
+
+    def subscribe(self, callback):
+        DataSource.subscribe(self, callback)
+        self.start()
+
+    def unsubscribe(self, callback):
+        DataSource.unsubscribe(self, callback)
+        if not self.subscribers:
+            self.stop()
+
+    def start(self):
+        """Starts the polling thread, unless it's already running."""
+        if self.stop_event is not None and not self.stop_event.isSet():
+            return
+        # Each thread gets its own stop event and timer, so that a thread that's still
+        # exiting can't be confused by the source being started again
+        self.stop_event = Event()
+        self.timer = DeadlineTimer(self.interval)
+        t = Thread(target=self.poll_loop, args=(self.stop_event, self.timer), name="{} polling thread".format(self.name))
+        t.daemon = True
+        t.start()
+
+    def stop(self):
+        """Signals the polling thread to exit."""
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.timer.wake()
+
+    def poll_loop(self, stop_event, timer):
+        while not stop_event.isSet():
+            try:
+                data = self.function()
+            except:
+                logger.exception("{}: exception while getting data".format(self.name))
+            else:
+                self.publish(data)
+            # Event.wait() with a timeout polls on Python 2, the timer sleeps until it's time
+            timer.wait()
+
+
 class Refresher(object):
     """
     A Refresher allows you to update the screen on a regular interval.
     All you need is to provide a function that'll return the text/image you want to display;
     that function will then be called with the desired frequency and the display
     will be updated with whatever it returns.
+
+    If the function returns the same data as the last time, the display isn't
+    updated. Instead of a function that's called periodically, the Refresher can
+    also use a ``DataSource``, and redraw the screen when the source publishes
+    new data. In adaptive mode, the Refresher also calls the function less often
+    while the data stays the same, and goes back to ``refresh_interval`` once
+    it changes. The number of ``refresh_function`` calls and skipped display
+    updates is kept in ``stats``.
     """
 
-    def __init__(self, refresh_function, i, o, refresh_interval=1, keymap=None, name="Refresher"):
+    def __init__(self, refresh_function, i, o, refresh_interval=1, keymap=None, name="Refresher", skip_unchanged=True, adaptive=False, max_interval=None, data_source=None):
         """Initialises the Refresher object.
         
         Args:
@@ -39,14 +149,27 @@ class Refresher(object):
             * ``refresh_interval``: Time between display refreshes (and, accordingly, ``refresh_function`` calls).
             * ``keymap``: Keymap entries you want to set while Refresher is active. By default, KEY_LEFT deactivates the Refresher, if you wan tto override it, do it carefully.
             * ``name``: Refresher name which can be used internally and for debugging.
+            * ``skip_unchanged``: if True (default), the display isn't updated when ``refresh_function`` returns the same data it returned the last time.
+            * ``adaptive``: if True, each time the data doesn't change, the interval between refreshes is doubled (up to ``max_interval``), and it's reset to ``refresh_interval`` once the data changes.
+            * ``max_interval``: the longest interval between refreshes in adaptive mode. By default, it's ten times the ``refresh_interval``.
+            * ``data_source``: a ``DataSource`` to get the data from. If it's set, the screen is refreshed each time the source publishes data, instead of every ``refresh_interval`` seconds. The published data is shown directly, unless ``refresh_function`` is passed - then, it's called to get the data to show, same as without a ``DataSource``.
 
         """
         self.i = i
         self.o = o
         self.name = name
+        self.skip_unchanged = skip_unchanged
+        self.adaptive = adaptive
+        self.max_interval = max_interval
+        self.last_data = None
+        self.stats = {"calls": 0, "skips": 0}
+        self.data_source = data_source
+        self.data_event = Event()
+        self.timer = DeadlineTimer(refresh_interval)
         self.set_refresh_interval(refresh_interval)
+        if refresh_function is None and data_source is not None:
+            refresh_function = data_source.get
         self.refresh_function = refresh_function
-        self.calculate_intervals()
         self.set_keymap(keymap if keymap else {})
         self.in_foreground = False
         self.in_background = Event()
@@ -57,7 +180,10 @@ class Refresher(object):
         self.in_background.set()
         self.in_foreground = True
         self.activate_keymap()
+        # Something else might've been shown on the display in the meantime
+        self.last_data = None
         self.refresh()
+        self.timer.reset()
 
     def to_background(self):
         """ Signals ``activate`` to finish executing """
@@ -67,9 +193,16 @@ class Refresher(object):
     def activate(self):
         """ A method which is called when refresher needs to start operating. Is blocking, sets up input&output devices, renders the refresher, periodically calls the refresh function&refreshes the screen while self.in_foreground is True, while refresher callbacks are executed from the input device thread."""
         logger.debug("refresher {} activated".format(self.name))
-        self.to_foreground()
-        while self.in_background.isSet():
-            self.idle_loop()
+        if self.data_source is not None:
+            self.data_event.clear()
+            self.data_source.subscribe(self.on_data)
+        try:
+            self.to_foreground()
+            while self.in_background.isSet():
+                self.idle_loop()
+        finally:
+            if self.data_source is not None:
+                self.data_source.unsubscribe(self.on_data)
         logger.debug(self.name+" exited")
         return True
 
@@ -92,44 +225,60 @@ class Refresher(object):
         if not self.in_foreground:
             self.in_foreground = True
             self.activate_keymap()
+            self.last_data = None
             self.refresh()
+            self.timer.reset()
 
     def set_refresh_interval(self, new_interval):
         """Allows setting Refresher's refresh intervals after it's been initialized"""
-        #interval for checking the in_background property in the activate()
-        #when refresh_interval is small enough, is the same as refresh_interval
         self.refresh_interval = new_interval
-        self.sleep_time = 0.1 if new_interval > 0.1 else new_interval
+        self.current_interval = new_interval
         self.calculate_intervals()
 
     def calculate_intervals(self):
-        """Calculates the sleep intervals of the refresher, so that no matter the
-        ``refresh_interval``, the refresher is responsive. Also, sets the counter to zero."""
-        #in_background of the refresher needs to be checked approx. each 0.1 second,
-        #since users expect the refresher to exit almost instantly
-        iterations_before_refresh = self.refresh_interval/self.sleep_time
-        if iterations_before_refresh < 1:
-            logger.warning("{}: self.refresh_interval is smaller than self.sleep_time!".format(self.name))
-            #Failsafe
-            self.iterations_before_refresh = 1
+        """Sets the interval of the refresher's timer to the current refresh interval,
+        with the next refresh one interval from now. The timer keeps the refreshes
+        at fixed deadlines, and is woken up when the refresher is deactivated,
+        so the refresher exits immediately no matter the ``refresh_interval``."""
+        self.timer.set_interval(self.current_interval)
+
+    def adapt_interval(self, changed):
+        """In adaptive mode, changes the interval between refreshes depending on
+        whether the data shown has just changed."""
+        if not self.adaptive:
+            return
+        if changed:
+            new_interval = self.refresh_interval
         else:
-            self.iterations_before_refresh = int(iterations_before_refresh)
-        self._counter = 0
+            max_interval = self.max_interval if self.max_interval is not None else self.refresh_interval*10
+            new_interval = max(min(self.current_interval*2, max_interval), self.refresh_interval)
+        if new_interval != self.current_interval:
+            logger.debug("{}: refresh interval is now {}".format(self.name, new_interval))
+            self.current_interval = new_interval
+            self.calculate_intervals()
+
+    def on_data(self, data):
+        """Called by the ``DataSource`` when new data is published."""
+        self.data_event.set()
 
     def idle_loop(self):
-        if self.in_foreground:
-            if self._counter == self.iterations_before_refresh:
-                self._counter = 0
-            if self._counter == 0:
-                self.refresh()
-            self._counter += 1
-        sleep(self.sleep_time)
+        if self.data_source is not None:
+            # Sleeping until there's new data, or until the refresher is deactivated
+            self.data_event.wait()
+            self.data_event.clear()
+            self.refresh()
+            return
+        # Sleeping until the next refresh is due, or until the refresher is deactivated
+        if self.timer.wait() and self.in_foreground:
+            self.refresh()
 
     def deactivate(self):
         """ Deactivates the refresher completely, exiting it."""
         self.in_foreground = False
         self.in_background.clear()
-        logger.debug("refresher {} deactivated".format(self.name))
+        self.data_event.set()
+        self.timer.wake()
+        logger.debug("refresher {} deactivated ({calls} refreshes, {skips} skipped)".format(self.name, **self.stats))
 
     def print_name(self):
         """ A debug method. Useful for hooking up to an input event so that you can see which refresher is currently active. """
@@ -175,8 +324,6 @@ class Refresher(object):
     @to_be_foreground
     def activate_keymap(self):
         if self.i:
-            self.i.stop_listen()
-            self.i.clear_keymap()
             self.i.set_keymap(self.keymap)
             self.i.listen()
         else:
@@ -185,12 +332,16 @@ class Refresher(object):
     @to_be_foreground
     def refresh(self):
         logger.debug("{}: refreshed data on display".format(self.name))
+        self.stats["calls"] += 1
         try:
             data_to_display = self.refresh_function()
         except RefresherExitException:
             logger.info("{}: received exit exception, deactivating".format(self.name))
             self.deactivate()
             return
+        if data_to_display is None and self.data_source is not None:
+            # Nothing published yet
+            return
         if isinstance(data_to_display, basestring):
             #Passed a string, not a list.
             #Let's be user-friendly and wrap it in a list!
@@ -201,8 +352,28 @@ class Refresher(object):
         elif isinstance(data_to_display, PIL.Image.Image):
             if "b&w-pixel" not in self.o.type:
                 raise ValueError("The screen doesn't support showing images!")
-            self.o.display_image(data_to_display)
+            # The same image object might be returned each time, with different contents
+            image = data_to_display
+            if not self.data_changed((image.mode, image.size, image.tobytes())):
+                return
+            self.o.display_image(image)
             return
         elif not isinstance(data_to_display, list):
             raise ValueError("refresh_function returned an unsupported type: {}!".format(type(data_to_display)))
+        if not self.data_changed(list(data_to_display)):
+            return
         self.o.display_data(*data_to_display)
+
+    def data_changed(self, data):
+        """
+        Compares the data returned by ``refresh_function`` with the data it returned
+        the last time, adapts the refresh interval and updates the stats accordingly.
+        Returns False if the display doesn't need to be updated.
+        """
+        changed = data != self.last_data
+        self.last_data = data
+        self.adapt_interval(changed)
+        if not changed and self.skip_unchanged:
+            self.stats["skips"] += 1
+            return False
+        return True
@@ -0,0 +1,140 @@
+"""
+Contains the render scheduler, which lets UI elements draw their frames on a
+separate thread - so that input callbacks only need to change the UI element's
+state (say, move the pointer), mark the UI element as needing a redraw, and return.
+
+If a UI element asks for a redraw while a previous redraw is still waiting,
+the requests are merged - so, when keys are pressed faster than frames can
+be drawn, intermediate frames are skipped, and only the newest state is drawn.
+
+The render thread is started by ZPUI on boot. If it's not running (for example,
+in tests or in an isolated context's process), frames are drawn right away,
+on the thread that asks for them.
+"""
+
+from collections import OrderedDict
+from threading import Thread, Lock, Event, current_thread
+
+from helpers import setup_logger
+
+logger = setup_logger(__name__, "warning")
+
+
+class RenderScheduler(object):
+    """
+    Calls render functions on a dedicated thread, keeping only the newest
+    render function for each key (typically, a UI element).
+
+    Attributes:
+
+        * ``requested``: how many renders were requested
+        * ``rendered``: how many renders were actually done
+    """
+
+    thread = None
+    current_key = None
+
+    def __init__(self):
+        self.pending = OrderedDict()
+        self.lock = Lock()
+        self.wakeup = Event()
+        self.idle = Event()
+        self.idle.set()
+        self.render_done = Event()
+        self.stop_flag = False
+        self.requested = 0
+        self.rendered = 0
+
+    def start(self):
+        """Starts the render thread, unless it's already running."""
+        if self.is_running():
+            return
+        self.stop_flag = False
+        self.thread = Thread(target=self.run, name="RenderThread")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stops the render thread once it's done with the render in progress.
+        Renders still waiting are done on the thread that asked for them."""
+        self.stop_flag = True
+        self.wakeup.set()
+        if self.thread is not None and self.thread is not current_thread():
+            self.thread.join()
+        self.flush()
+
+    def is_running(self):
+        # Threads don't survive a fork, so the thread is not alive in isolated context processes
+        return self.thread is not None and self.thread.is_alive() and not self.stop_flag
+
+    def post(self, key, render):
+        """
+        Asks for ``render`` (a function without arguments) to be called on the
+        render thread. If a render for the same ``key`` is already waiting,
+        it's replaced with this one. If the render thread isn't running,
+        ``render`` is called right away.
+        """
+        self.requested += 1
+        if not self.is_running() or current_thread() is self.thread:
+            self.rendered += 1
+            render()
+            return
+        with self.lock:
+            self.pending.pop(key, None)
+            self.pending[key] = render
+            self.idle.clear()
+            self.wakeup.set()
+
+    def cancel(self, key):
+        """
+        Drops the render waiting for ``key``, if there is one. If a render for ``key``
+        is in progress, waits until it's done - so that, once a UI element goes to
+        background, none of its frames are shown over the next UI element's frames.
+        """
+        with self.lock:
+            self.pending.pop(key, None)
+            in_progress = self.current_key is key
+        if in_progress and current_thread() is not self.thread:
+            self.render_done.wait()
+
+    def wait_idle(self, timeout=None):
+        """Blocks until there are no renders waiting or in progress. Returns False on timeout."""
+        return self.idle.wait(timeout)
+
+    def flush(self):
+        """Does all the renders that are waiting, on the calling thread."""
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.idle.set()
+                    return
+                key, render = self.pending.popitem(last=False)
+            self.call(key, render)
+
+    def call(self, key, render):
+        with self.lock:
+            self.current_key = key
+            self.render_done.clear()
+        self.rendered += 1
+        try:
+            render()
+        except:
+            logger.exception("Exception while rendering for {}".format(key))
+        finally:
+            with self.lock:
+                self.current_key = None
+                self.render_done.set()
+
+    def run(self):
+        while not self.stop_flag:
+            self.wakeup.wait()
+            with self.lock:
+                if not self.pending:
+                    self.wakeup.clear()
+                    self.idle.set()
+                    continue
+                key, render = self.pending.popitem(last=False)
+            self.call(key, render)
+
+
+render_scheduler = RenderScheduler()
@@ -1,10 +1,14 @@
 from __future__ import division
 
+import os
+import mmap
+from bisect import bisect_right
 from textwrap import wrap
-from time import sleep, time
+from threading import Lock
+from time import time
 
-from canvas import Canvas
-from helpers import setup_logger
+from canvas import Canvas, MockOutput, get_canvas
+from helpers import setup_logger, DeadlineTimer
 from ui.utils import to_be_foreground, clamp
 
 logger = setup_logger(__name__, "warning")
@@ -121,18 +125,192 @@ class HideableHorizontalScrollbar(HorizontalScrollbar, HideableVerticalScrollbar
         self._progress = clamp(value, 0, 1)
 
 
+def approach(current, target):
+    """Returns a value halfway between ``current`` and ``target``, or ``target`` if they're close enough."""
+    difference = target - current
+    if abs(difference) <= 1:
+        return target
+    return current + difference // 2
+
+
+class FileLines(object):
+    """
+    Lines of a text file, for showing files that are too big to be read into memory
+    (i.e. logs). The file is accessed through ``mmap``, and only the offsets of
+    each ``step``-th line are stored, so getting a line means finding the closest
+    stored offset and skipping at most ``step`` lines from there. ``update()``
+    indexes the lines appended to the file since the file was opened - the file
+    is only opened on the first ``update()``.
+    """
+
+    step = 64
+    file = None
+    mmap = None
+
+    def __init__(self, path):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        if self.mmap is not None:
+            self.mmap.close()
+        self.mmap = None
+        self.size = 0
+        self.offsets = [0]
+        self.complete_lines = 0
+        # Position right after the last newline found
+        self.scan_position = 0
+
+    def update(self):
+        """
+        Indexes the data appended to the file since the last call (or the whole file,
+        if it was truncated in the meantime). Returns True if the file changed.
+        If the file was closed with ``close()``, it's opened and indexed again.
+        """
+        if self.file is None:
+            self.file = open(self.path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size == self.size:
+            return False
+        if size < self.size:
+            self.reset()
+        if size:
+            # Empty files can't be mapped
+            if self.mmap is not None:
+                self.mmap.close()
+            self.mmap = mmap.mmap(self.file.fileno(), size, access=mmap.ACCESS_READ)
+        self.size = size
+        position = self.mmap.find(b"\n", self.scan_position) if size else -1
+        while position != -1:
+            self.complete_lines += 1
+            if self.complete_lines % self.step == 0:
+                self.offsets.append(position + 1)
+            self.scan_position = position + 1
+            position = self.mmap.find(b"\n", self.scan_position)
+        return True
+
+    def load(self, count):
+        """Does nothing - all the lines are indexed by ``update()`` as soon as they're in the file."""
+        pass
+
+    def close(self):
+        """Unmaps and closes the file. Calling ``update()`` afterwards opens it again."""
+        self.reset()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __len__(self):
+        # The last line might not be terminated with a newline (yet)
+        return self.complete_lines + (1 if self.scan_position < self.size else 0)
+
+    def get_lines(self, start, count):
+        """Returns up to ``count`` lines, starting with the line number ``start``."""
+        if start >= len(self) or count <= 0:
+            return []
+        position = self.offsets[start // self.step]
+        for _ in range(start % self.step):
+            position = self.mmap.find(b"\n", position) + 1
+        lines = []
+        while len(lines) < count and position < self.size:
+            end = self.mmap.find(b"\n", position)
+            if end == -1:
+                end = self.size
+            lines.append(self.mmap[position:end].rstrip(b"\r").decode("utf-8", "replace"))
+            position = end + 1
+        return lines
+
+
+class IteratorLines(object):
+    """
+    Lines from an iterator (i.e. a file object or output of a process),
+    read as they're needed - when the user scrolls down to them.
+    """
+
+    def __init__(self, iterator):
+        self.iterator = iter(iterator)
+        self.lines = []
+        self.exhausted = False
+
+    def load(self, count):
+        """Reads lines from the iterator until there are ``count`` lines, or until it's exhausted."""
+        while len(self.lines) < count and not self.exhausted:
+            try:
+                line = next(self.iterator)
+            except StopIteration:
+                self.exhausted = True
+            else:
+                self.lines.append(line.rstrip("\r\n"))
+
+    def update(self):
+        return False
+
+    def close(self):
+        """Does nothing - the iterator belongs to whoever passed it."""
+        pass
+
+    def __len__(self):
+        return len(self.lines)
+
+    def get_lines(self, start, count):
+        self.load(start + count)
+        return self.lines[start:start + count]
+
+
 class TextReader(object):
-    """A vertical-scrollable ui element used to read text"""
+    """A vertical-scrollable ui element used to read text.
+
+    Args:
+
+        * ``text``: text to be shown - a string, or an iterable of lines,
+          which are then read as the user scrolls down to them.
+        * ``i``, ``o``: input&output device objects
+
+    Kwargs:
+
+        * ``name``: UI element name which can be used internally and for debugging.
+        * ``sleep_interval``: interval for redrawing the screen (to hide the scrollbars)
+          and checking the file for new lines (if ``follow`` is set)
+        * ``scroll_speed``: how many lines or characters are scrolled at once
+        * ``autohide_scrollbars``: whether to hide the scrollbars when the text isn't scrolled
+        * ``h_scroll``: if True, lines are scrolled horizontally instead of being wrapped.
+          By default, enabled when some lines in the text don't fit on the screen.
+        * ``path``: path to a file to show instead of ``text``. The file isn't read
+          into memory, so it can be as big as necessary, and lines are only wrapped
+          when they're shown.
+        * ``follow``: if True, the file is checked for new lines, and if the last
+          line of the file is shown, the new lines are shown as they're added
+          (like ``tail -f``). The text is scrolled to the end when it's opened.
+        * ``smooth_scrolling``: if True (default), the text is scrolled pixel by pixel,
+          over a few frames, instead of jumping to the new position.
+
+    The text around the part that's shown is rendered onto an off-screen image
+    (a "strip"), a few screens tall, so that drawing a frame while scrolling
+    only takes cropping the part that's shown out of that image.
+    """
+
+    frame_interval = 0.03
+    strip_screens = 3
 
-    # todo : documentation
     def __init__(self, text, i, o, name="TextReader", sleep_interval=1, scroll_speed=2, autohide_scrollbars=True,
-                 h_scroll=None):
+                 h_scroll=None, path=None, follow=False, smooth_scrolling=True):
         self.i = i
         self.o = o
         self.name = name
         self.sleep_interval = sleep_interval
+        self.timer = DeadlineTimer(sleep_interval)
         self.scroll_speed = scroll_speed
-        self.keymap = dict
+        self.follow = follow
+        self.smooth_scrolling = smooth_scrolling
+        self.generate_keymap()
+
+        self.render_lock = Lock()
+        self.strip = None
+        self.strip_start = 0
+        self.line_tops = [0]
+        self.x_offset = 0
+        self.y_offset = 0
+        self.animating = False
 
         if autohide_scrollbars:
             self.v_scrollbar = HideableVerticalScrollbar(self.o, margin=2)
@@ -142,46 +320,181 @@ class TextReader(object):
             self.h_scrollbar = HorizontalScrollbar(self.o)
 
         char_width = self.o.char_width
-        text_width = self.o.cols - (self.v_scrollbar.width // char_width)
-
-        self._content_width = max([len(line) for line in text.splitlines()])
-        self._content_height = len(text.splitlines())
-        self.horizontal_scroll = h_scroll if h_scroll is not None else self._content_width > self.o.cols
-        self._content = text.splitlines() if self.horizontal_scroll else wrap(text, text_width)
+        self._text_width = self.o.cols - (self.v_scrollbar.width // char_width)
 
         self.in_foreground = False
         self.v_scroll_index = 0
         self.h_scroll_index = 0
 
+        if path is not None or not isinstance(text, basestring):
+            # Lines are read and wrapped as they're shown, so the content
+            # width is only known for the lines that were shown already
+            # The file is only opened once the TextReader is activated
+            self._lines = FileLines(path) if path is not None else IteratorLines(text)
+            self._lines.load(self.o.rows + 1)
+            self._content_width = 1
+            self._content_height = len(self._lines)
+            self.horizontal_scroll = bool(h_scroll)
+            self._content = None
+            # When following a file, it's shown from the end
+            self.show_end = self.follow
+        else:
+            lines = text.splitlines()
+            self._lines = None
+            self._content_width = max([len(line) for line in lines])
+            self._content_height = len(lines)
+            self.horizontal_scroll = h_scroll if h_scroll is not None else self._content_width > self.o.cols
+            self._content = lines if self.horizontal_scroll else wrap(text, self._text_width)
+
         self.after_move()
 
     def activate(self):
         logger.info("{0} activated".format(self.name))
         self.to_foreground()
         while self.in_foreground:  # All the work is done in input callbacks
-            sleep(self.sleep_interval)
-            self.refresh()  # needed to update the hideable scrollbars
+            deadline_reached = self.timer.wait()
+            if self.animating:
+                self.refresh()
+                if not self.animating:
+                    self.timer.set_interval(self.sleep_interval)
+            elif deadline_reached:
+                if self.follow and self._lines is not None:
+                    self.check_for_new_lines()
+                self.refresh()  # needed to update the hideable scrollbars
         logger.info("{} exited".format(self.name))
         return None
 
     @to_be_foreground
     def refresh(self):
-        text = self.get_displayed_text()
-        c = Canvas(self.o)
-        self.draw_text(text, c, self.v_scrollbar.width)
-        self.v_scrollbar.draw(c)
-        self.h_scrollbar.draw(c)
-        self.o.display_image(c.get_image())
-
-    def draw_text(self, text, c, x_offset):
-        for line, arg in enumerate(text):
-            y = (line * self.o.char_height)
-            c.text(arg, (x_offset, y))
+        with self.render_lock:
+            self.update_strip()
+            was_animating = self.animating
+            self.step_animation()
+            x = self.v_scrollbar.width
+            viewport = (self.x_offset, self.y_offset, self.x_offset + self.o.width - x, self.y_offset + self.o.height)
+            c = get_canvas(self.o)
+            c.paste(self.strip.crop(viewport), (x, 0))
+            self.v_scrollbar.draw(c)
+            self.h_scrollbar.draw(c)
+            self.o.display_image(c.get_image())
+        if self.animating and not was_animating:
+            # The rest of the frames are drawn by the activate() loop
+            self.timer.set_interval(self.frame_interval)
+            self.timer.wake()
+
+    def get_line_count(self):
+        return len(self._lines) if self._lines is not None else len(self._content)
+
+    def get_strip_lines(self, start, count):
+        """Returns ``count`` lines starting from ``start``, each as a list of rows it takes on the screen."""
+        if self._lines is None:
+            return [[row] for row in self._content[start:start + count]]
+        lines = self._lines.get_lines(start, count)
+        if self.horizontal_scroll:
+            return [[line] for line in lines]
+        return [wrap(line, self._text_width) or [""] for line in lines]
+
+    def render_strip(self, start, count):
+        """Renders ``count`` lines starting from ``start`` onto an image as wide as the
+        longest of them. Returns the image and the position of each line on it."""
+        lines = self.get_strip_lines(start, count)
+        rows = [row for line in lines for row in line]
+        char_width, char_height = self.o.char_width, self.o.char_height
+        width = max([len(row) for row in rows] + [self.o.cols]) * char_width
+        height = max(len(rows), self.o.rows) * char_height
+        c = Canvas(MockOutput(width, height, device_mode=self.o.device_mode))
+        for i, row in enumerate(rows):
+            c.text(row, (0, i * char_height))
+        line_tops = [0]
+        for line in lines:
+            line_tops.append(line_tops[-1] + len(line) * char_height)
+        return c.get_image(), line_tops
+
+    def update_strip(self, force=False):
+        """Re-renders the strip if the lines that need to be shown aren't on it.
+        The new strip also has the lines currently shown, so that scrolling from them
+        can continue where it left off."""
+        target = self.h_scroll_index
+        strip_end = self.strip_start + len(self.line_tops) - 1
+        if self.strip is not None and not force and self.strip_start <= target \
+          and (target + self.o.rows <= strip_end or strip_end >= self.get_line_count()):
+            return
+        if self.strip is not None and self.smooth_scrolling:
+            # The line at the top of the screen at the moment, and how much of it is scrolled past
+            index = min(bisect_right(self.line_tops, self.y_offset), len(self.line_tops) - 1) - 1
+            current, scrolled_past = self.strip_start + max(index, 0), self.y_offset - self.line_tops[max(index, 0)]
+        else:
+            current, scrolled_past = target, 0
+        start = max(min(current, target) - self.o.rows, 0)
+        count = abs(target - current) + self.strip_screens * self.o.rows
+        self.strip, self.line_tops = self.render_strip(start, count)
+        self.strip_start = start
+        self.y_offset = self.line_tops[min(current - start, len(self.line_tops) - 1)] + scrolled_past
+
+    def step_animation(self):
+        """Moves the shown part of the strip towards the part that needs to be shown -
+        halfway there on each frame, or all the way if smooth scrolling is disabled."""
+        y_target = self.line_tops[min(self.h_scroll_index - self.strip_start, len(self.line_tops) - 1)]
+        x_target = self.v_scroll_index * self.o.char_width if self.horizontal_scroll else 0
+        if self.smooth_scrolling:
+            self.y_offset = approach(self.y_offset, y_target)
+            self.x_offset = approach(self.x_offset, x_target)
+        else:
+            self.y_offset, self.x_offset = y_target, x_target
+        self.animating = (self.y_offset, self.x_offset) != (y_target, x_target)
+
+    def check_for_new_lines(self):
+        """Checks the file for new lines, and scrolls to them if the end of the file was shown."""
+        was_at_end = self.h_scroll_index >= self.get_last_screen_start()
+        with self.render_lock:
+            changed = self._lines.update()
+        if not changed:
+            return
+        self._content_height = len(self._lines)
+        # The strip might not have the new lines, or might have the last line before it was finished
+        with self.render_lock:
+            self.update_strip(force=True)
+        if was_at_end:
+            self.h_scroll_index = self.get_last_screen_start()
+        self.after_move()
+
+    def get_last_screen_start(self):
+        """Returns the number of the first line shown when the text is scrolled to the end -
+        so that the last line is at the bottom of the screen."""
+        line_count = len(self._lines)
+        if self.horizontal_scroll:
+            return max(line_count - self.o.rows, 0)
+        start = max(line_count - self.o.rows, 0)
+        heights = [len(wrap(line, self._text_width) or [""]) for line in self._lines.get_lines(start, self.o.rows)]
+        # Wrapped lines take more than one row, so less lines fit on the screen
+        while sum(heights) > self.o.rows and len(heights) > 1:
+            heights.pop(0)
+            start += 1
+        return start
+
+    def get_displayed_lines(self):
+        """Returns the lines that are currently on the screen, reading and wrapping
+        them from the file (or iterator) if necessary."""
+        start = self.h_scroll_index
+        if self.horizontal_scroll:
+            lines = self._lines.get_lines(start, self.o.rows)
+        else:
+            lines = []
+            for line in self._lines.get_lines(start, self.o.rows):
+                lines += wrap(line, self._text_width) or [""]
+                if len(lines) >= self.o.rows:
+                    break
+            lines = lines[:self.o.rows]
+        self._content_width = max([self._content_width] + [len(line) for line in lines])
+        return lines
 
     def get_displayed_text(self):
         start = self.h_scroll_index
         end = start + self.o.rows
-        displayed_data = self._content[start:end]
+        if self._lines is not None:
+            displayed_data = self.get_displayed_lines()
+        else:
+            displayed_data = self._content[start:end]
         if self.horizontal_scroll:
             displayed_data = [line[self.v_scroll_index:self.o.cols + self.v_scroll_index] for line in displayed_data]
 
@@ -189,8 +502,6 @@ class TextReader(object):
 
     @to_be_foreground
     def set_keymap(self):
-        self.generate_keymap()
-        self.i.stop_listen()
         self.i.set_keymap(self.keymap)
         self.i.listen()
 
@@ -208,11 +519,32 @@ class TextReader(object):
     def to_foreground(self):
         logger.info("{0} enabled".format(self.name))
         self.in_foreground = True
+        if self._lines is not None:
+            self.open_lines()
         self.refresh()
+        self.timer.reset()
         self.set_keymap()
 
+    def open_lines(self):
+        """Opens the file (it's closed when the TextReader is deactivated) and indexes
+        its lines, scrolling to the end if the file is followed and the end was shown."""
+        with self.render_lock:
+            self._lines.update()
+            self._content_height = len(self._lines)
+            # The file might've changed while it was closed
+            self.strip = None
+        if self.show_end:
+            self.h_scroll_index = self.get_last_screen_start()
+        self.after_move()
+
     def deactivate(self):
         self.in_foreground = False
+        if self._lines is not None:
+            with self.render_lock:
+                # The index is gone once the file is closed, so it has to be checked now
+                self.show_end = self.follow and self.h_scroll_index >= self.get_last_screen_start()
+                self._lines.close()
+        self.timer.wake()
 
     def move_up(self):
         self.h_scroll_index -= self.scroll_speed
@@ -239,9 +571,16 @@ class TextReader(object):
         self.after_move()
 
     def after_move(self):
+        if self._lines is not None:
+            # Making sure the lines the user has scrolled to are read, if they're read from an iterator
+            self._lines.load(self.h_scroll_index + self.o.rows + 1)
+            self._content_height = max(len(self._lines), 1)
         self.v_scrollbar.size = self.o.rows / self._content_height
         self.h_scrollbar.size = self.o.cols / self._content_width
-        self.h_scroll_index = clamp(self.h_scroll_index, 0, self._content_height - self.o.rows + 1)
+        if self._lines is not None:
+            self.h_scroll_index = clamp(self.h_scroll_index, 0, self.get_last_screen_start())
+        else:
+            self.h_scroll_index = clamp(self.h_scroll_index, 0, self._content_height - self.o.rows + 1)
         self.v_scroll_index = clamp(self.v_scroll_index, 0, self._content_width - self.o.cols + 1)
         self.v_scrollbar.progress = self.h_scroll_index / self._content_height
         self.h_scrollbar.progress = self.v_scroll_index / self._content_width
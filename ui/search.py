@@ -0,0 +1,78 @@
+"""Contains the search index used for T9-style type-ahead search in list UI elements."""
+
+from bisect import bisect_left
+
+from numpad_input import NumpadCharInput
+
+
+def get_t9_table(mapping=None):
+    """
+    Returns a dictionary that maps characters to the numpad digits that they're
+    typed with - using the ``NumpadCharInput`` mapping by default.
+
+    >>> get_t9_table()["k"]
+    '5'
+    >>> get_t9_table()["K"]
+    '5'
+    """
+    mapping = mapping if mapping is not None else NumpadCharInput.default_mapping
+    table = {}
+    for digit, characters in mapping.items():
+        for character in characters:
+            table.setdefault(character, digit)
+    return table
+
+
+class T9SearchIndex(object):
+    """
+    An index of entry labels for searching them by the digits that the user
+    would type on a numpad - where "564" finds both "John" and "Linux kernel".
+    Matches start at the beginning of a label's word, and can span multiple words
+    (with "0" typed for a space).
+
+    The index is a sorted list of label suffixes (converted to digits) starting
+    at word boundaries, so a search is a binary search for the range of suffixes
+    starting with the typed digits. When the search is narrowed down by typing
+    one more digit, only the range found for the previous search is searched.
+
+    Args:
+
+        * ``labels``: a list of entry labels (strings)
+        * ``mapping``: numpad mapping, as used by ``NumpadCharInput``
+    """
+
+    def __init__(self, labels, mapping=None):
+        self.table = get_t9_table(mapping)
+        suffixes = []
+        for index, label in enumerate(labels):
+            digits = self.to_digits(label)
+            for position in self.get_word_starts(label):
+                suffixes.append((digits[position:], index))
+        suffixes.sort()
+        self.suffixes = [suffix for suffix, _ in suffixes]
+        self.indices = [index for _, index in suffixes]
+        self.last_search = ("", 0, len(self.suffixes))
+
+    def to_digits(self, label):
+        # Characters that can't be typed are replaced with something that no search will match
+        # (and that sorts before digits, see ``search()``)
+        return "".join([self.table.get(character, ".") for character in label])
+
+    def get_word_starts(self, label):
+        return [position for position, character in enumerate(label)
+                if character.isalnum() and (position == 0 or not label[position-1].isalnum())]
+
+    def search(self, digits):
+        """
+        Returns the indices of labels that have a word starting with the given
+        digit sequence, in the order the labels were given in.
+        """
+        last_digits, lo, hi = self.last_search
+        if not digits.startswith(last_digits):
+            # Not narrowing down the previous search, so searching the whole index
+            lo, hi = 0, len(self.suffixes)
+        lo = bisect_left(self.suffixes, digits, lo, hi)
+        # ":" comes right after "9", so it's past all the suffixes that start with the digits
+        hi = bisect_left(self.suffixes, digits + ":", lo, hi)
+        self.last_search = (digits, lo, hi)
+        return sorted(set(self.indices[lo:hi]))
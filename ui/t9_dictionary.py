@@ -0,0 +1,216 @@
+"""
+Contains the dictionary used for predictive (T9-style) text input - where
+each letter is typed with a single keypress, and the word is guessed from
+the sequence of digits typed.
+
+The dictionary file is a sorted list of lines, memory-mapped, so that it
+doesn't need to be loaded into memory - a lookup is a binary search for the
+lines that belong to the typed digit sequence. Each line is::
+
+    <digits>\\t<kind>\\t<word>\\t<frequency>
+
+where ``kind`` is ``=`` for whole words and ``+`` for beginnings of longer
+words - so that a word that's only partially typed can be shown, too. Only
+the most frequent word beginnings are stored for each digit sequence.
+
+Dictionary files are built with ``compile_dictionary()`` - or from the
+command line (in the ZPUI root directory), from a text file with a word
+and its frequency on each line::
+
+    python -m ui.t9_dictionary words.txt words.t9
+"""
+
+import os
+import re
+import mmap
+from collections import defaultdict
+
+try:
+    from search import get_t9_table
+except ImportError:
+    from ui.search import get_t9_table
+
+word_re = re.compile("[a-zA-Z]+")
+
+
+class T9Dictionary(object):
+    """
+    A dictionary for predictive text input, ranking words by frequency.
+    Words that the user typed are learned, and are suggested before the
+    words from the dictionary file.
+
+    Args:
+
+        * ``path``: path to a dictionary file built by ``compile_dictionary()``
+        * ``user_path``: path to a file that learned words are saved into (and loaded from)
+        * ``mapping``: numpad mapping, as used by ``NumpadCharInput``
+    """
+
+    mm = None
+
+    def __init__(self, path=None, user_path=None, mapping=None):
+        self.table = get_t9_table(mapping)
+        # Digits that letters are typed with - other keys aren't part of words
+        self.letter_keys = set([digit for character, digit in self.table.items() if character.isalpha()])
+        self.user_path = user_path
+        self.user_words = defaultdict(dict)
+        self.user_prefixes = defaultdict(dict)
+        if path is not None:
+            self.load(path)
+        if user_path is not None and os.path.exists(user_path):
+            self.load_user_words(user_path)
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def to_digits(self, word):
+        """
+        Returns the digits that the word is typed with, or None if the word can't be typed.
+
+        >>> T9Dictionary().to_digits("Hello")
+        '43556'
+        >>> T9Dictionary().to_digits("it's") is None
+        True
+        """
+        digits = [self.table.get(character) for character in word]
+        if not all([digit in self.letter_keys for digit in digits]):
+            return None
+        return "".join(digits)
+
+    def lookup(self, digits):
+        """
+        Returns the words that can be typed with the given digits, most likely first:
+        learned words, words from the dictionary file, and then beginnings of longer words.
+        """
+        words = self.rank(self.user_words.get(digits, {}))
+        prefixes = self.rank(self.user_prefixes.get(digits, {}))
+        file_words, file_prefixes = self.read_block(digits)
+        candidates = []
+        for word in words + file_words + prefixes + file_prefixes:
+            if word not in candidates:
+                candidates.append(word)
+        return candidates
+
+    def rank(self, counts):
+        return [word for word, count in sorted(counts.items(), key=lambda x: (-x[1], x[0]))]
+
+    def read_block(self, digits):
+        """
+        Reads the lines for the given digits from the dictionary file. Returns two lists,
+        one with words and one with word beginnings, as they're sorted in the file.
+        """
+        words, prefixes = [], []
+        if self.mm is None:
+            return words, prefixes
+        key = digits + "\t"
+        position = self.find_first_line(key)
+        while position < len(self.mm):
+            end = self.mm.find("\n", position)
+            if end == -1:
+                end = len(self.mm)
+            line = self.mm[position:end]
+            if not line.startswith(key):
+                break
+            _, kind, word, _ = line.split("\t")
+            (words if kind == "=" else prefixes).append(word)
+            position = end + 1
+        return words, prefixes
+
+    def find_first_line(self, key):
+        """Returns the position of the first line in the dictionary file that's not less than ``key``."""
+        lo, hi = 0, len(self.mm)
+        while lo < hi:
+            start = self.mm.rfind("\n", 0, (lo + hi) // 2) + 1
+            end = self.mm.find("\n", start)
+            if end == -1:
+                end = len(self.mm)
+            if self.mm[start:end] < key:
+                lo = end + 1
+            else:
+                hi = start
+        return lo
+
+    def learn(self, word, count=1):
+        """
+        Adds a word to the learned words (or makes it more likely
+        to be suggested if it's already there).
+        """
+        word = word.lower()
+        digits = self.to_digits(word)
+        if not digits:
+            return
+        words = self.user_words[digits]
+        words[word] = words.get(word, 0) + count
+        for length in range(1, len(word)):
+            prefixes = self.user_prefixes[digits[:length]]
+            prefixes[word[:length]] = prefixes.get(word[:length], 0) + count
+
+    def learn_text(self, text):
+        """
+        Learns all the words in a text - for seeding the learned words with,
+        say, names from the address book, or with the user's notes.
+        """
+        for word in word_re.findall(text):
+            self.learn(word)
+
+    def load_user_words(self, path):
+        with open(path, "r") as f:
+            for line in f:
+                word, count = line.split()
+                self.learn(word, int(count))
+
+    def save(self):
+        """Saves the learned words into the file at ``user_path``, if it's set."""
+        if self.user_path is None:
+            return
+        with open(self.user_path, "w") as f:
+            for words in self.user_words.values():
+                for word, count in words.items():
+                    f.write("{} {}\n".format(word, count))
+
+
+def compile_dictionary(words, path, mapping=None, prefix_count=3):
+    """
+    Builds a dictionary file from an iterable of ``(word, frequency)`` tuples.
+    Words that can't be typed with the mapping's letter keys are skipped.
+    For each digit sequence, ``prefix_count`` most likely word beginnings are stored.
+    """
+    dictionary = T9Dictionary(mapping=mapping)
+    frequencies = defaultdict(int)
+    for word, frequency in words:
+        frequencies[word.lower()] += frequency
+    lines = []
+    prefixes = defaultdict(lambda: defaultdict(int))
+    for word, frequency in frequencies.items():
+        digits = dictionary.to_digits(word)
+        if not digits:
+            continue
+        lines.append((digits, "=", -frequency, word))
+        for length in range(1, len(word)):
+            prefixes[digits[:length]][word[:length]] += frequency
+    for digits, counts in prefixes.items():
+        for prefix, frequency in sorted(counts.items(), key=lambda x: (-x[1], x[0]))[:prefix_count]:
+            lines.append((digits, "+", -frequency, prefix))
+    # Sorting by the line itself first, so that the binary search works on the file
+    lines.sort(key=lambda x: (x[0] + "\t" + x[1], x[2], x[3]))
+    with open(path, "w") as f:
+        for digits, kind, frequency, word in lines:
+            f.write("{}\t{}\t{}\t{}\n".format(digits, kind, word, -frequency))
+
+
+if __name__ == "__main__":
+    import sys
+    def read_words(path):
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if parts:
+                    yield parts[0], int(parts[1]) if len(parts) > 1 else 1
+    compile_dictionary(read_words(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,103 @@
+"""Benchmarks for Menu - measures how many times per second ``move_down``
+can be called on a long Menu, using the mock graphical output from the tests,
+how many images are allocated per keypress (with and without reusing canvases),
+and how long the type-ahead search takes on a huge list of entries.
+
+Run it from the ZPUI root directory: ``python ui/tests/benchmark_menu.py``
+"""
+import os
+import sys
+from timeit import default_timer as timer
+
+from mock import Mock, patch
+from PIL import Image, ImageDraw
+
+try:
+    from ui import Menu, Canvas
+    from ui.search import T9SearchIndex
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from ui import Menu, Canvas
+    from ui.search import T9SearchIndex
+
+
+def get_mock_graphical_output(width=128, height=64, mode="1", cw=6, ch=8):
+    m = Mock()
+    m.configure_mock(rows=width/cw, cols=height/ch, width=width, height=height, device_mode=mode,
+                     char_height=ch, char_width=cw, type=["b&w-pixel"])
+    return m
+
+
+def benchmark_move_down(view, entry_count=500, passes=3):
+    """Moves the cursor from the first to the last entry of a Menu, ``passes`` times,
+    and returns the number of ``move_down`` calls per second."""
+    contents = [["Entry {}".format(i), lambda: None] for i in range(entry_count)]
+    menu = Menu(contents, Mock(), get_mock_graphical_output(), name="Benchmark menu", config={"default": view})
+    menu.in_foreground = True
+    moves = 0
+    start = timer()
+    for _ in range(passes):
+        menu.pointer = 0
+        menu.view.fix_pointers_on_contents_update()
+        while menu.move_down():
+            moves += 1
+    return moves / (timer() - start)
+
+
+def benchmark_allocations(view, reuse_canvases=True, entry_count=500):
+    """Moves the cursor from the first to the last entry of a Menu and returns
+    the number of PIL images and ``ImageDraw`` objects created per ``move_down`` call.
+    The output keeps the image on the screen in ``current_image``, like the real one,
+    so that canvases can be reused - unless ``reuse_canvases`` is False."""
+    o = get_mock_graphical_output()
+    o.current_image = None
+    o.display_image.side_effect = lambda image: setattr(o, "current_image", image)
+    contents = [["Entry {}".format(i), lambda: None] for i in range(entry_count)]
+    menu = Menu(contents, Mock(), o, name="Benchmark menu", config={"default": view})
+    menu.in_foreground = True
+    counts = {"images": 0, "draws": 0}
+    def counting(cls, counter):
+        original_init = cls.__init__
+        def init(self, *args, **kwargs):
+            counts[counter] += 1
+            original_init(self, *args, **kwargs)
+        return patch.object(cls, "__init__", init)
+    canvas_patcher = patch("ui.base_list_ui.get_canvas", lambda o, base_image=None: Canvas(o, base_image=base_image))
+    if not reuse_canvases:
+        canvas_patcher.start()
+    try:
+        menu.view.refresh()
+        with counting(Image.Image, "images"), counting(ImageDraw.ImageDraw, "draws"):
+            moves = 0
+            while menu.move_down():
+                moves += 1
+    finally:
+        if not reuse_canvases:
+            canvas_patcher.stop()
+    return float(counts["images"]) / moves, float(counts["draws"]) / moves
+
+
+def benchmark_search(entry_count=10000, query="7378"):
+    """Builds a search index for ``entry_count`` labels, then types ``query`` digit
+    by digit. Returns the time it took to build the index and the average time
+    per keypress, in milliseconds."""
+    labels = ["service-{}.unit".format(i) for i in range(entry_count)]
+    start = timer()
+    index = T9SearchIndex(labels)
+    build_time = timer() - start
+    start = timer()
+    for i in range(len(query)):
+        index.search(query[:i+1])
+    return build_time * 1000, (timer() - start) * 1000 / len(query)
+
+
+if __name__ == "__main__":
+    entry_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    for view in ["EightPtView", "SixteenPtView"]:
+        print("{}: {:.0f} move_down calls per second on a {}-entry Menu".format(view, benchmark_move_down(view, entry_count), entry_count))
+    for view in ["EightPtView", "SixteenPtView"]:
+        for reuse_canvases in (False, True):
+            print("{}, {}: {:.2f} images and {:.2f} ImageDraw objects created per move_down".format(
+                  view, "reusing canvases" if reuse_canvases else "new canvas per frame",
+                  *benchmark_allocations(view, reuse_canvases, entry_count)))
+    print("Search: {:.1f}ms to index 10000 entries, {:.3f}ms per keypress".format(*benchmark_search()))
@@ -5,7 +5,7 @@ import unittest
 from mock import patch, Mock
 
 try:
-    from ui.base_list_ui import BaseListUIElement, BaseListBackgroundableUIElement, Canvas
+    from ui.base_list_ui import BaseListUIElement, BaseListBackgroundableUIElement, Canvas, LazyContents
     fonts_dir = "ui/fonts"
 except ImportError as e:
     print("Absolute imports failed, trying relative imports")
@@ -22,7 +22,7 @@ except ImportError as e:
         return orig_import(name, *args)
 
     with patch('__builtin__.__import__', side_effect=import_mock):
-        from base_list_ui import Canvas, BaseListUIElement, BaseListBackgroundableUIElement
+        from base_list_ui import Canvas, BaseListUIElement, BaseListBackgroundableUIElement, LazyContents
         fonts_dir = "../fonts"
 
 def get_mock_input():
@@ -170,5 +170,23 @@ class TestBaseListUIElement(unittest.TestCase):
         assert o.display_data.call_count == 1 #One in to_foreground
         assert o.display_data.call_args[0] == ('A0', 'A1', 'A2', 'Back')
 
+    def test_lazy_contents(self):
+        """Tests that only the entries that are shown are generated for LazyContents"""
+        num_elements = 10000
+        get_entry = Mock(side_effect=lambda index: ["A" + str(index), "a" + str(index)])
+        contents = LazyContents(num_elements, get_entry)
+        o = get_mock_output()
+        el = BaseListUIElement(contents, get_mock_input(), o, name=el_name, config={})
+        assert len(el.contents) == num_elements + 1
+        assert el.contents[-1] == el.exit_entry
+        assert not get_entry.called
+        el.in_foreground = True
+        el.view.refresh()
+        assert o.display_data.call_args[0] == tuple("A" + str(i) for i in range(o.rows))
+        el.pointer = num_elements
+        el.view.refresh()
+        assert o.display_data.call_args[0][-1] == "Back"
+        assert get_entry.call_count < 3 * o.rows
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,10 +3,11 @@ import os
 import unittest
 
 from mock import patch, Mock
-from PIL import Image, ImageFont, ImageChops
+from PIL import Image, ImageFont, ImageChops, ImageDraw
 
 try:
-    from ui import Canvas
+    from ui import Canvas, get_canvas
+    fonts_dir = "ui/fonts"
 except ImportError:
     print("Absolute imports failed, trying relative imports")
     os.sys.path.append(os.path.dirname(os.path.abspath('.')))
@@ -22,7 +23,8 @@ except ImportError:
         return orig_import(name, *args)
 
     with patch('__builtin__.__import__', side_effect=import_mock):
-        from canvas import Canvas
+        from canvas import Canvas, get_canvas
+        fonts_dir = "../fonts"
 
 
 def get_mock_output(width=128, height=64, mode="1"):
@@ -134,6 +136,96 @@ class TestCanvas(unittest.TestCase):
         c.invert_rect((35, 5, 80, 17))
         assert(imgs_are_equal(c.get_image(), test_image))
 
+    def test_text_cache(self):
+        """Tests that cached text is drawn the same way as text drawn by PIL"""
+        o = get_mock_output()
+        c1 = Canvas(o, name=c_name)
+        c2 = Canvas(o, name=c_name)
+        for c in (c1, c2):
+            c.text("Hello world", (5, 5))
+            c.text("Hello world", ("-60", 30))
+        c2.text("", (0, 0))
+        reference = Image.new("1", (128, 64))
+        draw = ImageDraw.Draw(reference)
+        draw.text((5, 5), "Hello world", fill="white", font=c1.default_font)
+        draw.text((68, 30), "Hello world", fill="white", font=c1.default_font)
+        assert(imgs_are_equal(c1.get_image(), reference))
+        assert(imgs_are_equal(c2.get_image(), reference))
+        assert(c1.get_text_bounds("Hello world") == draw.textsize("Hello world", font=c1.default_font))
+
+    def test_font_dir_listed_once(self):
+        """Tests that loading fonts doesn't list the font directory each time"""
+        c = Canvas(get_mock_output(), name=c_name)
+        c.fonts_dir = fonts_dir
+        font = c.load_font("Fixedsys62.ttf", 16)
+        with patch('os.listdir') as listdir:
+            assert(c.load_font("Fixedsys62.ttf", 16) is font)
+            c.load_font("Fixedsys62.ttf", 17)
+            assert(not listdir.called)
+
+    def test_scroll(self):
+        """Tests that scrolling moves the image and clears the uncovered part"""
+        o = get_mock_output()
+        c = Canvas(o, name=c_name)
+        c.rectangle((10, 10, 20, 20), fill="white")
+        c.scroll(dx=-5, dy=3)
+        reference = Canvas(o, name=c_name)
+        reference.rectangle((5, 13, 15, 23), fill="white")
+        assert(imgs_are_equal(c.get_image(), reference.get_image()))
+        c.scroll(dy=-200)
+        assert(c.get_image().getbbox() is None)
+
+    def test_invert(self):
+        """Tests that the whole canvas can be inverted"""
+        o = get_mock_output()
+        c = Canvas(o, name=c_name)
+        c.rectangle((10, 10, 20, 20), fill="white")
+        c.invert()
+        reference = Canvas(o, name=c_name)
+        reference.rectangle((10, 10, 20, 20), fill="white")
+        reference.invert_rect((0, 0, 128, 64))
+        assert(imgs_are_equal(c.get_image(), reference.get_image()))
+        assert(c.get_image().getpixel((0, 0)) == 255)
+        assert(c.get_image().getpixel((15, 15)) == 0)
+
+    def test_clear(self):
+        """Tests that clear() clears the same area that rectangle() would fill"""
+        o = get_mock_output()
+        c = Canvas(o, name=c_name)
+        c.rectangle((0, 0, 127, 63), fill="white")
+        c.clear((10, 10, 20, 20))
+        reference = Canvas(o, name=c_name)
+        reference.rectangle((0, 0, 127, 63), fill="white")
+        reference.rectangle((10, 10, 20, 20), fill="black", outline="black")
+        assert(imgs_are_equal(c.get_image(), reference.get_image()))
+        c.clear()
+        assert(c.get_image().getbbox() is None)
+
+    def test_get_canvas(self):
+        """Tests that get_canvas() reuses two canvases, never giving out the one on the screen"""
+        o = get_mock_output()
+        o.current_image = None
+        o.display_image.side_effect = lambda image: setattr(o, "current_image", image)
+        base_image = Image.new("1", (128, 64))
+        base_image.putpixel((3, 3), 255)
+        images = set()
+        for i in range(4):
+            c = get_canvas(o, base_image=base_image if i == 2 else None)
+            assert(c.get_image() is not o.current_image)
+            # Canvases are handed out cleared (or with the base image)
+            assert(imgs_are_equal(c.get_image(), base_image) if i == 2 else c.get_image().getbbox() is None)
+            c.rectangle((10, 10, 20, 20), fill="white")
+            c.display()
+            images.add(id(c.get_image()))
+        assert(len(images) == 2)
+        # Until a frame is displayed, the same canvas is given out again
+        assert(get_canvas(o) is get_canvas(o))
+
+    def test_get_canvas_mock_output(self):
+        """Tests that outputs without current_image get a new canvas each time"""
+        o = get_mock_output()
+        assert(get_canvas(o) is not get_canvas(o))
+
 
 def imgs_are_equal(i1, i2):
     return ImageChops.difference(i1, i2).getbbox() is None
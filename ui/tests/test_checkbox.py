@@ -160,6 +160,45 @@ class TestCheckbox(unittest.TestCase):
         assert o.display_data.called
         assert o.display_data.call_count == 1 #One in to_foreground
         assert o.display_data.call_args[0] == (' A0', ' A1', ' A2', ' Accept')
+    def test_selection(self):
+        """Tests toggling entries and changing the whole selection at once"""
+        num_elements = 20
+        contents = [["A" + str(i), "a" + str(i)] for i in range(num_elements)]
+        contents[3].append(True)
+        cb = Checkbox(contents, get_mock_input(), get_mock_output(), name=cb_name, config={})
+        cb.refresh = lambda *args, **kwargs: None
+        assert cb.get_selected() == ["a3"]
+
+        def scenario():
+            cb.select_entry()  # KEY_ENTER on the first entry
+            assert cb.get_selected() == ["a0", "a3"]
+            cb.invert_selection()
+            assert len(cb.get_selected()) == num_elements - 2
+            assert "a0" not in cb.get_selected()
+            cb.select_all()
+            cb.select_entry()
+            assert cb.get_selected() == ["a" + str(i) for i in range(1, num_elements)]
+            cb.pointer = num_elements  # The final button
+            cb.select_entry()
+
+        with patch.object(cb, 'idle_loop', side_effect=scenario) as p:
+            return_value = cb.activate()
+        assert return_value == {"a" + str(i): i != 0 for i in range(num_elements)}
+
+    def test_checkmarks(self):
+        """Tests that checkmarks are shown for checked entries, and not for the final button"""
+        contents = [["A0", "a0", True], ["A1", "a1"]]
+        o = get_mock_output()
+        cb = Checkbox(contents, get_mock_input(), o, name=cb_name, config={})
+        cb.select_all()
+
+        def scenario():
+            cb.deactivate()
+
+        with patch.object(cb, 'idle_loop', side_effect=scenario) as p:
+            cb.activate()
+        assert o.display_data.call_args[0] == ('*A0', '*A1', ' Accept')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,8 @@
-"""test for Checkbox"""
+"""tests for UIConfigManager"""
 import os
+import json
+import shutil
+import tempfile
 import unittest
 
 from mock import patch, Mock
@@ -53,6 +56,52 @@ class TestUIConfigManager(unittest.TestCase):
             'e': {'this': 'remains'}
         })
 
+    def write_config(self, path, name, config, mtime):
+        file_path = os.path.join(path, name)
+        with open(file_path, "w") as f:
+            json.dump(config, f)
+        os.utime(file_path, (mtime, mtime))
+
+    def test_global_config_snapshot(self):
+        path = tempfile.mkdtemp()
+        try:
+            self.write_config(path, "base_config.json", {"a": {"b": 1}}, 1000)
+            self.write_config(path, "config_user.json", {"a": {"c": 2}}, 1000)
+            cm = UIConfigManager()
+            cm.set_path(path)
+            config = cm.get_global_config()
+            assert config == {"a": {"b": 1, "c": 2}}
+            # Snapshot is shared, so it can't be changed
+            self.assertRaises(TypeError, config.__setitem__, "a", {})
+            self.assertRaises(TypeError, config["a"].update, {"b": 3})
+            # Unchanged files aren't loaded again
+            cm.check_interval = 0
+            with patch.object(cm, 'load_all_configs') as load:
+                assert cm.get_global_config() is config
+                assert not load.called
+        finally:
+            shutil.rmtree(path)
+
+    def test_global_config_reload(self):
+        path = tempfile.mkdtemp()
+        try:
+            self.write_config(path, "base_config.json", {"a": 1}, 1000)
+            cm = UIConfigManager()
+            cm.set_path(path)
+            config = cm.get_global_config()
+            assert config == {"a": 1}
+            self.write_config(path, "config.json", {"a": 2}, 1000)
+            # Files aren't checked again until check_interval passes
+            assert cm.get_global_config() is config
+            cm.check_interval = 0
+            assert cm.get_global_config() == {"a": 2}
+            self.write_config(path, "config.json", {"a": 3}, 2000)
+            assert cm.get_global_config() == {"a": 3}
+            # The old snapshot is left as it was
+            assert config == {"a": 1}
+        finally:
+            shutil.rmtree(path)
+
 
 if __name__ == '__main__':
     unittest.main()
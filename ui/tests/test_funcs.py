@@ -0,0 +1,78 @@
+"""tests for text formatting functions"""
+import os
+import unittest
+
+from mock import patch, Mock
+
+try:
+    from ui.funcs import format_for_screen, wrap_text, iter_pages, layout_cache
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args):
+        if name in ['helpers']:
+            return Mock()
+        elif name == 'ui.utils':
+            import utils
+            return utils
+        return orig_import(name, *args)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from funcs import format_for_screen, wrap_text, iter_pages, layout_cache
+
+
+class MockFont(object):
+    """A font where "i" is 2 pixels wide and every other character is 6 pixels wide"""
+    def getsize(self, text):
+        return (sum([2 if c == "i" else 6 for c in text]), 8)
+
+
+class TestFormatForScreen(unittest.TestCase):
+    """tests format_for_screen and related functions"""
+
+    def setUp(self):
+        layout_cache.clear()
+
+    def test_wrapping(self):
+        assert format_for_screen("", 10) == [""]
+        assert format_for_screen("Hello  and welcome", 10) == ["Hello and", "welcome"]
+        assert format_for_screen("One\n\nthree\n", 10) == ["One", "", "three", ""]
+        assert format_for_screen("One\ntwo", 10, linebreak="") == ["One", "", "two"]
+
+    def test_long_words(self):
+        assert format_for_screen("a abcdefghijklmnop b", 5) == ["a abc", "defgh", "ijklm", "nop b"]
+        assert format_for_screen("abcdefghij", 5) == ["abcde", "fghij"]
+        assert format_for_screen("abc defg", 5) == ["abc", "defg"]
+        assert format_for_screen("abc defg", 5, break_words=True) == ["abc d", "efg"]
+
+    def test_pixel_widths(self):
+        """Tests wrapping by pixel widths of the font"""
+        font = MockFont()
+        # "iiii iiii" is 4*2 + 6 + 4*2 = 22 pixels wide, "abc" is 18 pixels wide
+        assert format_for_screen("iiii iiii abc", 24, font=font) == ["iiii iiii", "abc"]
+        assert format_for_screen("abcdefiii", 24, font=font) == ["abcd", "efiii"]
+
+    def test_lazy_pages(self):
+        """Tests that only the shown pages are laid out, and that the layout is cached once it's all laid out"""
+        text = " ".join(["word{}".format(i) for i in range(100)])
+        pages = iter_pages(text, 10, 4)
+        assert next(pages) == ["word0", "word1", "word2", "word3"]
+        assert len(layout_cache) == 0
+        rest = list(pages)
+        assert len(rest) == 24
+        assert len(layout_cache) == 1
+        assert [row for page in [["word0", "word1", "word2", "word3"]] + rest for row in page] == format_for_screen(text, 10)
+        # Now, the cached layout is used
+        with patch("ui.funcs.wrap_text") as wrap_text:
+            assert len(list(iter_pages(text, 10, 4))) == 25
+            format_for_screen(text, 10)
+            assert not wrap_text.called
+        # A different width means a different layout
+        assert format_for_screen(text, 21)[0] == "word0 word1 word2"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""tests for loading indicators"""
+import os
+import unittest
+
+from mock import patch, Mock
+
+try:
+    from ui.loading_indicators import GraphicalProgressBar, CircularProgressBar, Throbber, frame_cache
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args):
+        if name in ['helpers']:
+            return Mock()
+        elif name == 'ui.utils':
+            import utils
+            return utils
+        return orig_import(name, *args)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from loading_indicators import GraphicalProgressBar, CircularProgressBar, Throbber, frame_cache
+
+
+def get_mock_input():
+    return Mock()
+
+
+def get_mock_graphical_output(width=128, height=64, mode="1", cw=6, ch=8):
+    m = Mock()
+    m.configure_mock(rows=width / cw, cols=height / ch, width=width, height=height, device_mode=mode, type=["b&w-pixel"])
+    return m
+
+
+class TestLoadingIndicators(unittest.TestCase):
+    """tests loading indicators' frame caching"""
+
+    def setUp(self):
+        frame_cache.clear()
+
+    def test_progress_bar_frames_cached(self):
+        """Tests that progress bar frames are rendered once, and only shown when the progress changes"""
+        for cls in (GraphicalProgressBar, CircularProgressBar):
+            o = get_mock_graphical_output()
+            pb = cls(get_mock_input(), o)
+            pb.in_foreground = True
+            pb.render_frame = Mock(side_effect=pb.render_frame)
+            pb.progress = 10
+            pb.refresh()
+            assert o.display_image.call_count == 1
+            pb.progress = 20
+            pb.progress = 10
+            assert o.display_image.call_count == 3
+            # Both frames were only rendered once
+            assert pb.render_frame.call_count == 2
+            # Another progress bar on the same display reuses the frames
+            pb2 = cls(get_mock_input(), o)
+            pb2.in_foreground = True
+            pb2.render_frame = Mock(side_effect=pb2.render_frame)
+            pb2.progress = 20
+            assert not pb2.render_frame.called
+            assert o.display_image.call_count == 4
+
+    def test_progress_bar_message(self):
+        o = get_mock_graphical_output()
+        pb = GraphicalProgressBar(get_mock_input(), o, message="Loading")
+        pb.in_foreground = True
+        pb.refresh()
+        image = o.display_image.call_args[0][0]
+        pb.set_message("Updating")
+        assert o.display_image.call_args[0][0].tobytes() != image.tobytes()
+
+    def test_throbber_frames(self):
+        """Tests that the throbber cycles through a fixed set of frames"""
+        o = get_mock_graphical_output()
+        th = Throbber(get_mock_input(), o, message="Test")
+        th.in_foreground = True
+        with patch("ui.loading_indicators.time") as time:
+            time.return_value = 0
+            th.refresh()
+            # Less than a frame later, the frame isn't shown again
+            time.return_value = th.cycle / float(th.frame_count) / 2
+            th.refresh()
+            assert o.display_image.call_count == 1
+            first_frame = o.display_image.call_args[0][0]
+            time.return_value = th.cycle / 2.0
+            th.refresh()
+            assert o.display_image.call_args[0][0].tobytes() != first_frame.tobytes()
+            # The animation repeats once a cycle
+            time.return_value = th.cycle * 3
+            th.refresh()
+            assert o.display_image.call_args[0][0] is first_frame
+
+    def test_frame_cache_size(self):
+        """Tests that frames take as much of the frame cache budget as they take bytes"""
+        o = get_mock_graphical_output()
+        pb = GraphicalProgressBar(get_mock_input(), o)
+        pb.in_foreground = True
+        pb.refresh()
+        # The frame itself and the background it's drawn on, 128x64 pixels at one bit per pixel
+        assert len(frame_cache) == 2
+        assert frame_cache.size == 2 * 128 * 64 / 8
+
+
+if __name__ == '__main__':
+    unittest.main()
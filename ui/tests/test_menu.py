@@ -131,6 +131,81 @@ class TestMenu(unittest.TestCase):
         assert o.display_image.called
         assert o.display_image.call_count == 1 #One in to_foreground
 
+    def test_graphical_frame_cache(self):
+        """
+        Tests that moving the cursor within the same screen of entries doesn't
+        re-render the text, and that changing contents invalidates the cached frame
+        """
+        num_elements = 20
+        o = get_mock_graphical_output()
+        contents = [["A" + str(i), "a" + str(i)] for i in range(num_elements)]
+        mu = Menu(contents, get_mock_input(), o, name=mu_name, config={"default": "EightPtView"})
+        Canvas.fonts_dir = fonts_dir
+        mu.in_foreground = True
+        first_image = mu.view.get_displayed_image()
+        with patch.object(mu.view, 'draw_menu_text') as p:
+            mu.move_down()
+            assert not p.called
+            second_image = o.display_image.call_args[0][0]
+            assert first_image.tobytes() != second_image.tobytes()
+            mu.move_up()
+            assert not p.called
+            assert o.display_image.call_args[0][0].tobytes() == first_image.tobytes()
+            mu.set_contents(contents)
+            mu.view.refresh()
+            assert p.called
+
+    def test_pixel_scrolling(self):
+        """Tests that long labels are scrolled pixel by pixel in graphical views"""
+        o = get_mock_graphical_output()
+        contents = [["A label that's way too long to fit on the screen", "a"]]
+        mu = Menu(contents, get_mock_input(), o, name=mu_name, config={})
+        mu.in_foreground = True
+        mu.view.refresh()
+        images = [o.display_image.call_args[0][0].tobytes()]
+        strips = set()
+        for _ in range(10):
+            mu.scroll()
+            strips.add(id(mu.view.label_strip))
+            image = o.display_image.call_args[0][0].tobytes()
+            if image != images[-1]:
+                images.append(image)
+        # Scrolled by one character over 10 ticks, one pixel at a time
+        assert mu.scrolling["pointer"] == 1
+        # The label was only rendered once
+        assert len(strips) == 1
+        assert mu.view.label_strip is not None
+        assert len(images) == mu.view.charwidth + 1
+        # The same as drawing the label without the first character
+        reference = Menu([[contents[0][0][1:], "a"]], get_mock_input(), get_mock_graphical_output(), name=mu_name, config={})
+        reference.in_foreground = True
+        assert reference.view.get_displayed_image().tobytes() == images[-1]
+
+    def test_search(self):
+        """Tests that typing digits narrows menu entries down, and that KEY_LEFT undoes that"""
+        contents = [["Entry " + str(i), "a" + str(i)] for i in range(100)]
+        mu = Menu(contents, get_mock_input(), get_mock_output(), name=mu_name, searchable=True, config={})
+        mu.in_foreground = True
+        mu.keymap["KEY_4"]()
+        mu.keymap["KEY_2"]()
+        assert [entry[0] for entry in mu.contents] == ["Entry 42"]
+        # No entries match, so the digit is ignored
+        mu.keymap["KEY_2"]()
+        assert mu.search_query == "42"
+        mu.keymap["KEY_LEFT"]()
+        assert len(mu.contents) == 11
+        mu.move_down()
+        mu.keymap["KEY_LEFT"]()
+        assert len(mu.contents) == 101
+        assert mu.contents[mu.pointer][0] == "Entry 40"
+        assert mu.in_foreground
+
+    def test_not_searchable(self):
+        """Tests that searching is disabled by default, leaving the digit keys free"""
+        mu = Menu([["Entry", "a"]], get_mock_input(), get_mock_output(), name=mu_name, config={})
+        assert not mu.searchable
+        assert "KEY_4" not in mu.keymap
+
     @unittest.skip("needs to check whether the callback is executed instead")
     def test_enter_on_last_returns_right(self):
         num_elements = 3
@@ -1,11 +1,14 @@
 """test for NumpadCharInput"""
 import os
 import unittest
+from threading import Timer
+from time import sleep
 
 from mock import patch, Mock
 
 try:
     from ui import NumpadCharInput
+    from ui.t9_dictionary import T9Dictionary
 except ImportError:
     print("Absolute imports failed, trying relative imports")
     os.sys.path.append(os.path.dirname(os.path.abspath('.')))
@@ -22,6 +25,7 @@ except ImportError:
 
     with patch('__builtin__.__import__', side_effect=import_mock):
         from numpad_input import NumpadCharInput
+        from t9_dictionary import T9Dictionary
 
 def get_mock_input():
     return Mock()
@@ -134,5 +138,87 @@ class TestNumpadCharInput(unittest.TestCase):
         assert o.display_data.call_count == 1 #One in to_foreground
         assert o.display_data.call_args[0] == ('Test:', '', '', '', '', '', '', ' Cancel   OK   Erase ')
 
+    def test_pending_character_timeout(self):
+        """Tests that a pending character is accepted by the timer, and that pressing the same key again restarts it"""
+        ni = NumpadCharInput(get_mock_input(), get_mock_output(), name=ni_name)
+        ni.in_foreground = True
+        ni.refresh = Mock()
+        ni.pending_timeout = 0.2
+        ni.process_streaming_keycode("KEY_2")
+        sleep(0.1)
+        ni.process_streaming_keycode("KEY_2")
+        sleep(0.15)
+        assert ni.pending_character == "2"
+        sleep(0.15)
+        assert ni.pending_character is None
+        assert ni.value == "b"
+        assert ni.position == 1
+        assert ni.pending_timer is None
+        ni.process_streaming_keycode("KEY_3")
+        assert ni.value == "bd"
+
+    def test_activate_returns_on_deactivate(self):
+        """Tests that activate() blocks until the element is deactivated from another thread"""
+        ni = NumpadCharInput(get_mock_input(), get_mock_output(), name=ni_name)
+        Timer(0.1, ni.accept_value).start()
+        assert ni.activate() == ""
+
+    def test_predictive_input(self):
+        """Tests typing words with one keypress per letter, cycling through guesses and mixing in multi-tap characters"""
+        d = T9Dictionary()
+        d.learn_text("home good good hello")
+        ni = NumpadCharInput(get_mock_input(), get_mock_output(), name=ni_name, dictionary=d)
+        ni.refresh = lambda *args, **kwargs: None
+
+        key_sequence = [4, 6, 6, 3, "*", 0, 4, 3, 5, 5, 6, 1, 1, "ENTER"]
+        def scenario():
+            for key in key_sequence:
+                ni.process_streaming_keycode("KEY_{}".format(key))
+            assert not ni.in_foreground
+
+        with patch.object(ni, 'idle_loop', side_effect=scenario) as p:
+            return_value = ni.activate()
+        assert return_value == "home hello!"
+        # The words typed are now more likely to be suggested
+        assert d.user_words["4663"] == {"home": 2, "good": 2}
+
+    def test_predictive_backspace_and_toggle(self):
+        """Tests that backspace removes letters of the word being typed, and that
+        unknown words aren't learned when switching to multi-tap mode"""
+        d = T9Dictionary()
+        d.learn_text("good")
+        ni = NumpadCharInput(get_mock_input(), get_mock_output(), name=ni_name, dictionary=d)
+        ni.refresh = lambda *args, **kwargs: None
+        for key in [4, 6, 6, 3, "F2", "F2"]:
+            ni.process_streaming_keycode("KEY_{}".format(key))
+        assert ni.value == "go"
+        # For unknown words, the guess so far is kept
+        ni.process_streaming_keycode("KEY_9")
+        assert ni.value == "gow"
+        # Switching to multi-tap
+        ni.process_streaming_keycode("KEY_F5")
+        for key in [9, 9, "RIGHT", 2, 2]:
+            ni.process_streaming_keycode("KEY_{}".format(key))
+        assert ni.value == "gowxb"
+        assert not ni.predictive
+        assert d.lookup("469") == []
+
+    def test_learning_multitap_words(self):
+        """Tests that words typed in multi-tap mode become predictive input candidates"""
+        d = T9Dictionary()
+        d.learn_text("good")
+        ni = NumpadCharInput(get_mock_input(), get_mock_output(), name=ni_name, dictionary=d)
+        ni.refresh = lambda *args, **kwargs: None
+        # Typing "hoof " in multi-tap mode
+        for key in ["F5", 4, 4, 6, 6, 6, "RIGHT", 6, 6, 6, 3, 3, 3, 0]:
+            ni.process_streaming_keycode("KEY_{}".format(key))
+        assert ni.value == "hoof "
+        assert "hoof" in d.lookup("4663")
+        # Now, it can be typed in predictive mode
+        ni.process_streaming_keycode("KEY_F5")
+        for key in [4, 6, 6, 3]:
+            ni.process_streaming_keycode("KEY_{}".format(key))
+        assert "hoof" in ni.candidates
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,11 +1,16 @@
 """test for PathPicker"""
 import os
+import shutil
+import tempfile
 import unittest
+from threading import Event
+from time import sleep
 
 from mock import patch, Mock
 
 try:
     from ui import PathPicker
+    from ui.path_picker import list_directory, get_cached_listing
 except ImportError:
     print("Absolute imports failed, trying relative imports")
     os.sys.path.append(os.path.dirname(os.path.abspath('.')))
@@ -21,7 +26,7 @@ except ImportError:
         return orig_import(name, *args)
 
     with patch('__builtin__.__import__', side_effect=import_mock):
-        from path_picker import PathPicker
+        from path_picker import PathPicker, list_directory, get_cached_listing
 
 def get_mock_input():
     return Mock()
@@ -76,5 +81,93 @@ class TestPathPicker(unittest.TestCase):
         assert return_value is None
 
 
+class TestDirectoryListing(unittest.TestCase):
+    """tests directory listing and the listing cache"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for i in range(100):
+            open(os.path.join(self.dir, "file{:03}".format(i)), "w").close()
+        os.mkdir(os.path.join(self.dir, "subdir"))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_listing_cache(self):
+        """Tests that listings are cached until the directory changes"""
+        updates = []
+        dirs, files = list_directory(self.dir, on_update=lambda d, f: updates.append(len(d) + len(f)))
+        assert dirs == ["subdir"]
+        assert files == ["file{:03}".format(i) for i in range(100)]
+        # Partial results are sent after 32 and 64 entries
+        assert updates == [32, 64]
+        assert get_cached_listing(self.dir) == (dirs, files)
+        # Changing the directory invalidates the cache (mtime has a 1s resolution on some filesystems)
+        os.utime(self.dir, (0, 0))
+        assert get_cached_listing(self.dir) is None
+        assert list_directory(self.dir) == (dirs, files)
+
+    def test_background_listing(self):
+        """Tests that PathPicker lists uncached directories in background, and cached ones immediately"""
+        pp = PathPicker(self.dir, get_mock_input(), get_mock_output(), name=pp_name, config={})
+        for _ in range(100):
+            if pp.listing_cancel_event is None:
+                break
+            sleep(0.01)
+        assert len(pp.contents) == 102  # "..", "subdir" and the files
+        assert pp.contents[1][0] == "subdir"
+        pp.goto_dir(os.path.join(self.dir, "subdir"))
+        sleep(0.1)
+        assert [entry[0] for entry in pp.contents] == [".."]
+        # Going back up uses the cached listing
+        pp.go_back()
+        assert pp.listing_cancel_event is None
+        assert len(pp.contents) == 102
+
+    def test_dirs_only(self):
+        """Tests that, in dirs_only mode, directories are checked for subdirectories in background,
+        and that the directories checked aren't put into the listing cache"""
+        os.mkdir(os.path.join(self.dir, "subdir", "nested"))
+        os.mkdir(os.path.join(self.dir, "leaf"))
+        pp = PathPicker(self.dir, get_mock_input(), get_mock_output(), name=pp_name, dirs_only=True, config={})
+        for _ in range(100):
+            if pp.listing_cancel_event is None:
+                break
+            sleep(0.01)
+        assert pp.has_subdirs == {os.path.join(self.dir, "subdir"): True, os.path.join(self.dir, "leaf"): False}
+        assert [entry[0] for entry in pp.contents] == ["..", "leaf", "subdir"]
+        # Only directories with subdirectories can be entered
+        assert len(pp.contents[1]) == 2
+        assert len(pp.contents[2]) == 3
+        assert get_cached_listing(os.path.join(self.dir, "subdir")) is None
+
+    def test_listing_update_keeps_search(self):
+        """Tests that updates from the listing thread keep the search in progress and the entry selected"""
+        for name in ("alpha", "beta", "gamma"):
+            os.mkdir(os.path.join(self.dir, name))
+        pp = PathPicker(self.dir, get_mock_input(), get_mock_output(), name=pp_name, config={})
+        for _ in range(100):
+            if pp.listing_cancel_event is None:
+                break
+            sleep(0.01)
+        pp.in_foreground = True
+        pp.refresh = lambda *args, **kwargs: None
+        # "2" is "a", "b" or "c"
+        pp.keymap["KEY_2"]()
+        pp.keymap["KEY_DOWN"]()
+        assert [entry[0] for entry in pp.contents] == ["alpha", "beta"]
+        assert pp.contents[pp.pointer][0] == "beta"
+        # A new directory is found, starting with one of the letters searched
+        os.mkdir(os.path.join(self.dir, "able"))
+        pp.on_listing_update(self.dir, pp.listing_cancel_event or Event(), list_directory(self.dir))
+        assert pp.search_query == "2"
+        assert [entry[0] for entry in pp.contents] == ["able", "alpha", "beta"]
+        assert pp.contents[pp.pointer][0] == "beta"
+        # Going back shows all the entries, with the same entry selected
+        pp.keymap["KEY_LEFT"]()
+        assert pp.contents[pp.pointer][0] == "beta"
+        assert len(pp.contents) == 106
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+"""tests for Printer"""
+import os
+import unittest
+
+from mock import patch, Mock
+
+try:
+    from ui import Printer, PrettyPrinter
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args):
+        if name in ['helpers']:
+            return Mock()
+        elif name == 'ui.utils':
+            import utils
+            return utils
+        return orig_import(name, *args)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from printer import Printer, PrettyPrinter
+
+
+def get_mock_output(rows=2, cols=16):
+    m = Mock()
+    m.configure_mock(rows=rows, cols=cols, type=["char"])
+    return m
+
+
+def get_mock_graphical_output(rows=2, cols=100, width=60):
+    m = Mock()
+    m.configure_mock(rows=rows, cols=cols, width=width, type=["b&w-pixel"])
+    return m
+
+
+class TestPrinter(unittest.TestCase):
+    """tests Printer"""
+
+    def test_string_wrapped_by_words(self):
+        o = get_mock_output()
+        Printer("Hello and welcome to Aperture Science", None, o, sleep_time=0)
+        assert [call[0] for call in o.display_data.call_args_list] == [("Hello and", "welcome to"), ("Aperture Science",)]
+
+    def test_string_wrapped_by_pixels(self):
+        """Tests that, on graphical displays, text is wrapped by its width in pixels"""
+        o = get_mock_graphical_output()
+        # The default font is 6 pixels wide, so 10 characters fit into 60 pixels
+        Printer("Hello and welcome to Aperture Science", None, o, sleep_time=0)
+        assert [call[0] for call in o.display_data.call_args_list] == [("Hello and", "welcome to"), ("Aperture", "Science")]
+        o = get_mock_graphical_output(rows=4)
+        PrettyPrinter("Hello and welcome to Aperture Science", None, o, sleep_time=0)
+        assert [call[0] for call in o.display_data.call_args_list] == [("Hello and", "welcome to", "Aperture", "Science")]
+
+    def test_list_split_into_screens(self):
+        o = get_mock_output()
+        Printer(["Line 1", "Line 2", "Line 3"], None, o, sleep_time=0)
+        assert [call[0] for call in o.display_data.call_args_list] == [("Line 1", "Line 2"), ("Line 3",)]
+        with self.assertRaises(ValueError):
+            Printer(["Line 1", 2], None, o, sleep_time=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
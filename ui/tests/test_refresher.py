@@ -1,12 +1,15 @@
 """tests for Refresher"""
 import os
+import threading
 import unittest
+from threading import Thread, Event
 
 from mock import patch, Mock
+from PIL import Image
 
 
 try:
-    from ui import Refresher, RefresherExitException
+    from ui import Refresher, RefresherExitException, DataSource, PollingDataSource
 except ImportError:
     print("Absolute imports failed, trying relative imports")
     os.sys.path.append(os.path.dirname(os.path.abspath('.')))
@@ -22,7 +25,7 @@ except ImportError:
         return orig_import(name, *args)
 
     with patch('__builtin__.__import__', side_effect=import_mock):
-        from refresher import Refresher, RefresherExitException
+        from refresher import Refresher, RefresherExitException, DataSource, PollingDataSource
 
 
 def get_mock_input():
@@ -105,18 +108,18 @@ class TestRefresher(unittest.TestCase):
             assert r.idle_loop.call_count == 1
 
         assert o.display_data.called
-        assert o.display_data.call_count == 2 #One in to_foreground, and one in patched idle_loop
+        #One in to_foreground - the one in patched idle_loop is skipped since the data didn't change
+        assert o.display_data.call_count == 1
         assert o.display_data.call_args_list[0][0] == ("Hello", )
-        assert o.display_data.call_args_list[1][0] == ("Hello", )
+        assert r.stats == {"calls": 2, "skips": 1}
 
     def test_pause_resume(self):
         """Tests whether the Refresher stops outputting data on the screen when it's paused,
         and resumes outputting data on the screen when resumed."""
         i = get_mock_input()
         o = get_mock_output()
-        r = Refresher(lambda: "Hello", i, o, name=r_name, refresh_interval=0.1)
-        #refresh_interval is 0.1 so that _counter always stays 0
-        #and idle_loop always refreshes
+        r = Refresher(lambda: "Hello", i, o, name=r_name, refresh_interval=0.1, skip_unchanged=False)
+        #each idle_loop call waits for one refresh_interval and refreshes
 
         #Doing what an activate() would do, but without a loop
         r.to_foreground()
@@ -177,23 +180,137 @@ class TestRefresher(unittest.TestCase):
         r = Refresher(lambda: "Hello", i, o, name=r_name, refresh_interval=1)
 
         assert(r.refresh_interval == 1)
-        assert(r.sleep_time == 0.1)
-        assert(r.iterations_before_refresh == 10)
-        # Refresh intervals up until 0.1 don't change the sleep time
+        assert(r.timer.interval == 1)
         r.set_refresh_interval(0.1)
         assert(r.refresh_interval == 0.1)
-        assert(r.sleep_time == 0.1)
-        assert(r.iterations_before_refresh == 1)
-        # Refresh intervals less than 0.1 change sleep_time to match refresh interval
-        r.set_refresh_interval(0.01)
-        assert(r.refresh_interval == 0.01)
-        assert(r.sleep_time == 0.01)
-        assert(r.iterations_before_refresh == 1)
-        # Now setting refresh_interval to a high value
+        assert(r.timer.interval == 0.1)
+        # Intervals that aren't multiples of 0.1 are kept as they are
+        r.set_refresh_interval(0.15)
+        assert(r.refresh_interval == 0.15)
+        assert(r.timer.interval == 0.15)
         r.set_refresh_interval(10)
         assert(r.refresh_interval == 10)
-        assert(r.sleep_time == 0.1) # Back to normal
-        assert(r.iterations_before_refresh == 100)
+        assert(r.timer.interval == 10)
+
+    def test_skips_unchanged_data(self):
+        """Tests whether the Refresher only updates the display when the data changes"""
+        i = get_mock_input()
+        o = get_mock_output()
+        data = ["Hello"]
+        r = Refresher(lambda: data, i, o, name=r_name, refresh_interval=0.1)
+        r.to_foreground()
+        assert o.display_data.call_count == 1
+        r.refresh()
+        assert o.display_data.call_count == 1 # Same data
+        data[0] = "World"
+        r.refresh()
+        assert o.display_data.call_count == 2
+        assert o.display_data.call_args[0] == ("World", )
+        r.pause()
+        r.resume()
+        assert o.display_data.call_count == 3 # Redrawn after resuming
+        assert r.stats == {"calls": 4, "skips": 1}
+
+    def test_skips_unchanged_images(self):
+        """Tests whether the Refresher compares images by their contents"""
+        i = get_mock_input()
+        o = get_mock_output()
+        o.configure_mock(type=["b&w-pixel"])
+        image = Image.new("1", (128, 64))
+        r = Refresher(lambda: image, i, o, name=r_name, refresh_interval=0.1)
+        r.to_foreground()
+        r.refresh()
+        assert o.display_image.call_count == 1
+        image.putpixel((1, 1), 1)
+        r.refresh()
+        assert o.display_image.call_count == 2
+
+    def test_adaptive_interval(self):
+        """Tests whether the adaptive Refresher backs off when the data doesn't change"""
+        i = get_mock_input()
+        o = get_mock_output()
+        data = ["Hello"]
+        r = Refresher(lambda: data, i, o, name=r_name, refresh_interval=0.1, adaptive=True, max_interval=0.5)
+        r.to_foreground()
+        assert r.current_interval == 0.1
+        r.refresh()
+        assert r.current_interval == 0.2
+        assert r.timer.interval == 0.2
+        r.refresh()
+        r.refresh()
+        assert r.current_interval == 0.5 # Limited by max_interval
+        assert r.timer.interval == 0.5
+        data[0] = "World"
+        r.refresh()
+        assert r.current_interval == 0.1
+        assert r.timer.interval == 0.1
+
+    def test_data_source(self):
+        """Tests whether the Refresher redraws the screen when its DataSource publishes data"""
+        i = get_mock_input()
+        o = get_mock_output()
+        source = DataSource()
+        r = Refresher(None, i, o, name=r_name, data_source=source)
+        displayed = Event()
+        o.display_data.side_effect = lambda *args: displayed.set()
+        t = Thread(target=r.activate)
+        t.daemon = True
+        t.start()
+        try:
+            displayed.wait(0.1)
+            # Nothing was published yet
+            assert not o.display_data.called
+            source.publish(["Hello"])
+            assert displayed.wait(1)
+            assert o.display_data.call_args[0] == ("Hello", )
+            displayed.clear()
+            source.publish(["World"])
+            assert displayed.wait(1)
+            assert o.display_data.call_args[0] == ("World", )
+        finally:
+            r.deactivate()
+            t.join(1)
+        assert not t.isAlive()
+        assert source.subscribers == []
+
+    def test_polling_data_source(self):
+        """Tests whether PollingDataSource only polls while it has subscribers"""
+        published = Event()
+        source = PollingDataSource(lambda: ["Hello"], 0.01)
+        source.subscribe(lambda data: published.set())
+        assert published.wait(1)
+        assert source.get() == ["Hello"]
+        stop_event = source.stop_event
+        source.unsubscribe(source.subscribers[0])
+        assert stop_event.isSet()
+
+    def test_polling_data_source_stop_wakes_up(self):
+        """Tests whether the PollingDataSource thread exits right away when stopped, even with a long interval"""
+        published = Event()
+        source = PollingDataSource(lambda: ["Hello"], 10, name="Test source")
+        callback = lambda data: published.set()
+        source.subscribe(callback)
+        assert published.wait(1)
+        threads = [t for t in threading.enumerate() if t.name == "Test source polling thread"]
+        assert len(threads) == 1
+        source.unsubscribe(callback)
+        threads[0].join(1)
+        assert not threads[0].is_alive()
+
+    def test_deactivate_wakes_up(self):
+        """Tests whether the Refresher exits right away when deactivated, even with a long refresh interval"""
+        i = get_mock_input()
+        o = get_mock_output()
+        r = Refresher(lambda: "Hello", i, o, name=r_name, refresh_interval=10)
+        displayed = Event()
+        o.display_data.side_effect = lambda *args: displayed.set()
+        t = Thread(target=r.activate)
+        t.daemon = True
+        t.start()
+        assert displayed.wait(1)
+        r.deactivate()
+        t.join(1)
+        assert not t.isAlive()
 
     def test_update_keymap(self):
         """Tests whether the Refresher updates the keymap correctly."""
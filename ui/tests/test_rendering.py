@@ -0,0 +1,84 @@
+"""tests for RenderScheduler"""
+import os
+import unittest
+
+from threading import Event
+from mock import patch, Mock
+
+try:
+    from ui.rendering import RenderScheduler
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args):
+        if name in ['helpers']:
+            return Mock()
+        return orig_import(name, *args)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from rendering import RenderScheduler
+
+
+class TestRenderScheduler(unittest.TestCase):
+    """tests RenderScheduler class"""
+
+    def test_renders_inline_when_not_running(self):
+        rs = RenderScheduler()
+        frames = []
+        rs.post("el", lambda: frames.append(1))
+        assert frames == [1]
+
+    def test_only_newest_frame_rendered(self):
+        """Tests that renders requested while the render thread is busy are merged"""
+        rs = RenderScheduler()
+        rs.start()
+        frames = []
+        rendering = Event()
+        can_finish = Event()
+        def slow_render():
+            rendering.set()
+            can_finish.wait()
+            frames.append("first")
+        try:
+            rs.post("el", slow_render)
+            assert rendering.wait(5)
+            for i in range(10):
+                rs.post("el", lambda x=i: frames.append(x))
+            rs.post("other", lambda: frames.append("other"))
+            can_finish.set()
+            assert rs.wait_idle(5)
+        finally:
+            rs.stop()
+        assert frames == ["first", 9, "other"]
+        assert rs.requested == 12
+        assert rs.rendered == 3
+
+    def test_cancel(self):
+        """Tests that cancelled renders are dropped, and that cancel() waits for a render in progress"""
+        rs = RenderScheduler()
+        rs.start()
+        frames = []
+        rendering = Event()
+        can_finish = Event()
+        def slow_render():
+            rendering.set()
+            can_finish.wait()
+            frames.append("first")
+        try:
+            rs.post("el", slow_render)
+            assert rendering.wait(5)
+            rs.post("el", lambda: frames.append("second"))
+            with patch.object(rs.render_done, 'wait', side_effect=lambda: can_finish.set()) as wait:
+                rs.cancel("el")
+                assert wait.called
+            assert rs.wait_idle(5)
+        finally:
+            rs.stop()
+        assert frames == ["first"]
+
+
+if __name__ == '__main__':
+    unittest.main()
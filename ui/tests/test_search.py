@@ -0,0 +1,57 @@
+"""tests for the T9 search index"""
+import os
+import unittest
+
+from mock import patch, Mock
+
+try:
+    from ui.search import T9SearchIndex
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args):
+        if name in ['helpers']:
+            return Mock()
+        elif name == 'ui.utils':
+            import utils
+            return utils
+        return orig_import(name, *args)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from search import T9SearchIndex
+
+
+class TestT9SearchIndex(unittest.TestCase):
+    """tests T9SearchIndex class"""
+
+    def test_word_starts(self):
+        """Tests that labels are matched at the start of each of their words"""
+        index = T9SearchIndex(["John Doe", "Linux kernel", "nginx.service", "ssh.service", "Back"])
+        assert index.search("5646") == [0]
+        assert index.search("363") == [0]
+        assert index.search("7") == [2, 3]
+        assert index.search("5") == [0, 1]
+        assert index.search("8") == []
+
+    def test_spaces(self):
+        """Tests that matches can span multiple words"""
+        index = T9SearchIndex(["John Doe", "John Smith"])
+        assert index.search("56460") == [0, 1]
+        assert index.search("564603") == [0]
+
+    def test_narrowing(self):
+        """Tests that narrowing the search down and starting over give correct results"""
+        labels = ["Entry {}".format(i) for i in range(1000)]
+        index = T9SearchIndex(labels)
+        assert index.search("1") == [1]+range(10, 20)+range(100, 200)
+        assert index.search("12") == [12]+range(120, 130)
+        assert index.search("123") == [123]
+        assert index.search("9") == [9]+range(90, 100)+range(900, 1000)
+        assert len(index.search("3")) == len(labels)
+
+
+if __name__ == '__main__':
+    unittest.main()
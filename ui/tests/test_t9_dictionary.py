@@ -0,0 +1,85 @@
+"""tests for the predictive input dictionary"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch, Mock
+
+try:
+    from ui.t9_dictionary import T9Dictionary, compile_dictionary
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args):
+        if name in ['helpers']:
+            return Mock()
+        elif name == 'ui.utils':
+            import utils
+            return utils
+        return orig_import(name, *args)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from t9_dictionary import T9Dictionary, compile_dictionary
+
+words = [("good", 50), ("home", 40), ("gone", 30), ("hood", 5), ("hello", 20), ("help", 60), ("he", 100), ("it's", 10)]
+
+
+class TestT9Dictionary(unittest.TestCase):
+    """tests T9Dictionary class"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "words.t9")
+        compile_dictionary(words, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_lookup(self):
+        """Tests that words are found by digits and ranked by frequency"""
+        d = T9Dictionary(self.path)
+        assert d.lookup("4663") == ["good", "home", "gone", "hood"]
+        assert d.lookup("43") == ["he"]
+        assert d.lookup("4357") == ["help"]
+        # Beginnings of longer words are suggested after whole words
+        assert d.lookup("4355") == ["hell"]
+        assert d.lookup("466") == ["goo", "hom", "gon"]
+        # Words that can't be typed with letter keys alone are left out
+        assert d.lookup("48") == []
+        d.close()
+
+    def test_lookup_every_word(self):
+        """Tests that the binary search finds every block in a bigger dictionary"""
+        many_words = [("".join([chr(ord("a") + (i * 7 + j * 3) % 26) for j in range(i % 6 + 1)]), i) for i in range(500)]
+        compile_dictionary(many_words, self.path)
+        d = T9Dictionary(self.path)
+        for word, _ in many_words:
+            assert word in d.lookup(d.to_digits(word))
+        d.close()
+
+    def test_empty_dictionary(self):
+        compile_dictionary([], self.path)
+        d = T9Dictionary(self.path)
+        assert d.lookup("4663") == []
+
+    def test_learning(self):
+        """Tests that learned words come first, and that they're saved and loaded"""
+        user_path = os.path.join(self.dir, "user_words")
+        d = T9Dictionary(self.path, user_path=user_path)
+        d.learn("hood")
+        assert d.lookup("4663")[0] == "hood"
+        d.learn_text("Call Ingo about the hoof")
+        assert d.lookup("4663")[:2] == ["hood", "hoof"]
+        assert d.lookup("4646") == ["ingo"]
+        d.save()
+        d = T9Dictionary(self.path, user_path=user_path)
+        assert d.lookup("4663")[:2] == ["hood", "hoof"]
+        assert d.lookup("464") == ["ing"]
+
+
+if __name__ == '__main__':
+    unittest.main()
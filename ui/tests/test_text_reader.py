@@ -0,0 +1,179 @@
+"""tests for TextReader"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch, Mock
+
+try:
+    from ui import TextReader
+    from ui.scrollable_element import FileLines, IteratorLines
+except ImportError:
+    print("Absolute imports failed, trying relative imports")
+    os.sys.path.append(os.path.dirname(os.path.abspath('.')))
+    # Store original __import__
+    orig_import = __import__
+
+    def import_mock(name, *args):
+        if name in ['helpers']:
+            return Mock()
+        elif name == 'ui.utils':
+            import utils
+            return utils
+        return orig_import(name, *args)
+
+    with patch('__builtin__.__import__', side_effect=import_mock):
+        from scrollable_element import TextReader, FileLines, IteratorLines
+
+
+def get_mock_input():
+    return Mock()
+
+
+def get_mock_graphical_output(width=128, height=64, mode="1", cw=6, ch=8):
+    m = Mock()
+    m.configure_mock(rows=height/ch, cols=width/cw, width=width, height=height, device_mode=mode,
+                     char_height=ch, char_width=cw, type=["b&w-pixel"])
+    return m
+
+
+tr_name = "Test TextReader"
+
+
+class TestTextReader(unittest.TestCase):
+    """Tests the TextReader class"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "test.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write_lines(self, lines, mode="w"):
+        with open(self.path, mode) as f:
+            f.write("".join(lines))
+
+    def test_constructor(self):
+        """tests constructor"""
+        tr = TextReader("Hello\nworld", get_mock_input(), get_mock_graphical_output(), name=tr_name)
+        self.assertIsNotNone(tr)
+        assert(tr.get_displayed_text() == ["Hello world"])
+
+    def test_file_lines(self):
+        """Tests that FileLines returns the same lines as reading the file would"""
+        lines = ["Line {}{}\n".format(i, "!"*(i % 7)) for i in range(1000)]
+        self.write_lines(lines)
+        fl = FileLines(self.path)
+        fl.update()
+        assert(len(fl) == 1000)
+        # Only every step-th line offset is stored
+        assert(len(fl.offsets) == 1000 // fl.step + 1)
+        for start in (0, 1, 63, 64, 65, 500, 998):
+            assert(fl.get_lines(start, 3) == [line.rstrip("\n") for line in lines[start:start+3]])
+        assert(fl.get_lines(1000, 3) == [])
+
+    def test_file_lines_update(self):
+        """Tests that FileLines picks up appended lines, and lines without a newline at the end"""
+        self.write_lines(["First\n", "Second"])
+        fl = FileLines(self.path)
+        fl.update()
+        assert(len(fl) == 2)
+        assert(fl.get_lines(0, 5) == ["First", "Second"])
+        assert(not fl.update())
+        self.write_lines([" line\n", "Third\n"], mode="a")
+        assert(fl.update())
+        assert(fl.get_lines(0, 5) == ["First", "Second line", "Third"])
+        # The file was truncated - i.e. the log was rotated
+        self.write_lines(["New\n"])
+        assert(fl.update())
+        assert(fl.get_lines(0, 5) == ["New"])
+
+    def test_empty_file(self):
+        """Tests that empty files can be opened"""
+        self.write_lines([])
+        fl = FileLines(self.path)
+        fl.update()
+        assert(len(fl) == 0)
+        assert(fl.get_lines(0, 5) == [])
+
+    def test_file_lines_close(self):
+        """Tests that FileLines closes the file, and opens it again once it's updated"""
+        self.write_lines(["First\n"])
+        fl = FileLines(self.path)
+        fl.update()
+        f, m = fl.file, fl.mmap
+        self.write_lines(["Second\n"], mode="a")
+        assert(fl.update())
+        # The file is mapped again, since it's grown, and the old mapping is closed
+        with self.assertRaises(ValueError):
+            m.size()
+        fl.close()
+        assert(f.closed)
+        assert(fl.file is None and fl.mmap is None)
+        assert(fl.update())
+        assert(fl.get_lines(0, 5) == ["First", "Second"])
+
+    def test_iterator_lines(self):
+        """Tests that lines are read from iterators only when they're needed"""
+        il = IteratorLines("Line {}\n".format(i) for i in range(100))
+        assert(len(il) == 0)
+        assert(il.get_lines(10, 2) == ["Line 10", "Line 11"])
+        assert(len(il) == 12)
+
+    def test_smooth_scrolling(self):
+        """Tests that smooth scrolling takes a few frames, and ends up showing the same image as without it"""
+        text = "\n".join(["Line number {} of the text".format(i) for i in range(40)])
+        images = []
+        for smooth_scrolling in (True, False):
+            o = get_mock_graphical_output()
+            tr = TextReader(text, get_mock_input(), o, name=tr_name, smooth_scrolling=smooth_scrolling)
+            tr.in_foreground = True
+            tr.refresh()
+            tr.move_down()
+            frames = 1
+            while tr.animating:
+                tr.refresh()
+                frames += 1
+            assert(frames > 1 if smooth_scrolling else frames == 1)
+            images.append(o.display_image.call_args[0][0].tobytes())
+        assert(images[0] == images[1])
+
+    def test_path_follow(self):
+        """Tests that the TextReader shows the end of the file when following it, and wraps only the shown lines"""
+        o = get_mock_graphical_output()
+        self.write_lines(["Line {}\n".format(i) for i in range(100)])
+        tr = TextReader(None, get_mock_input(), o, name=tr_name, path=self.path, follow=True)
+        # The file is only opened once the TextReader is activated
+        assert(tr._lines.file is None)
+        tr.to_foreground()
+        assert(tr.get_displayed_text() == ["Line {}".format(i) for i in range(92, 100)])
+        self.write_lines(["A very long line that doesn't fit on the screen\n"], mode="a")
+        tr.check_for_new_lines()
+        displayed_text = tr.get_displayed_text()
+        assert(len(displayed_text) == o.rows)
+        assert(displayed_text[:5] == ["Line {}".format(i) for i in range(95, 100)])
+        assert(" ".join(displayed_text[-3:]) == "A very long line that doesn't fit on the screen")
+        # The file is closed once the TextReader exits, and it's still followed once it's activated again
+        tr.deactivate()
+        assert(tr._lines.file is None)
+        self.write_lines(["Line 100\n"], mode="a")
+        tr.to_foreground()
+        assert(tr.get_displayed_text()[-1] == "Line 100")
+
+    def test_path_reactivate(self):
+        """Tests that the TextReader stays where it was scrolled to once it's activated again"""
+        o = get_mock_graphical_output()
+        self.write_lines(["Line {}\n".format(i) for i in range(1000)])
+        tr = TextReader(None, get_mock_input(), o, name=tr_name, path=self.path)
+        tr.to_foreground()
+        tr.move_down()
+        assert(tr.get_displayed_text()[0] == "Line 2")
+        tr.deactivate()
+        tr.to_foreground()
+        assert(tr.get_displayed_text()[0] == "Line 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
-from collections import namedtuple, Sequence
+from collections import namedtuple, Sequence, OrderedDict
 from functools import wraps
+from threading import Lock
 from time import time, sleep
 
 from PIL import ImageOps
@@ -209,4 +210,143 @@ class Ticker(object):
         return elapsed
 
 
+
+class LRUCache(object):
+    """
+    A thread-safe dictionary-like cache with a budget - once the total size of the
+    values stored exceeds ``max_size``, the least recently used values are dropped.
+    The size of each value is given when it's stored (for example, the number of bytes).
+    >>> cache = LRUCache(10)
+    >>> cache.set("a", "aaaa", 4)
+    >>> cache.set("b", "bbbb", 4)
+    >>> cache.get("a")
+    'aaaa'
+    >>> cache.set("c", "cccc", 4)
+    >>> cache.get("b") is None
+    True
+    >>> cache.get("a")
+    'aaaa'
+    >>> cache.size
+    8
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.values = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key, default=None):
+        """Returns the value stored for the key, marking it as recently used."""
+        with self.lock:
+            if key not in self.values:
+                return default
+            value, size = self.values.pop(key)
+            self.values[key] = (value, size)
+            return value
+
+    def set(self, key, value, size=1):
+        """Stores a value, dropping least recently used values if over budget."""
+        with self.lock:
+            if key in self.values:
+                self.size -= self.values.pop(key)[1]
+            self.values[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size and len(self.values) > 1:
+                _, (_, dropped_size) = self.values.popitem(last=False)
+                self.size -= dropped_size
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self.values)
+
+
+# Number of bits set in each possible byte value
+bit_counts = [bin(byte).count("1") for byte in range(256)]
+
+
+class Bitset(object):
+    """
+    A fixed-size list of boolean flags, stored as bits of a ``bytearray``.
+    Setting, toggling and checking a flag, as well as inverting all the flags,
+    take constant time - setting all the flags at once is a single fill.
+    >>> flags = Bitset(10)
+    >>> flags[3] = True
+    >>> flags.toggle(5)
+    >>> list(flags.indices())
+    [3, 5]
+    >>> flags.invert()
+    >>> flags[3], flags[4], flags.count()
+    (False, True, 8)
+    >>> flags.fill(False)
+    >>> flags.count()
+    0
+    """
+
+    def __init__(self, size, value=False):
+        self.size = size
+        self.fill(value)
+
+    def fill(self, value):
+        """Sets all the flags to ``value``."""
+        self.bits = bytearray(("\xff" if value else "\x00") * ((self.size + 7) // 8))
+        # Bits past the end are kept clear, so that they're not counted
+        if value and self.size % 8:
+            self.bits[-1] = (1 << (self.size % 8)) - 1
+        # Instead of flipping all the bits, inverting just flips the meaning of a bit being set
+        self.inverted = False
+
+    def invert(self):
+        self.inverted = not self.inverted
+
+    def check_index(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("Bitset index out of range")
+        return index
+
+    def __getitem__(self, index):
+        index = self.check_index(index)
+        return bool(self.bits[index >> 3] & (1 << (index & 7))) != self.inverted
+
+    def __setitem__(self, index, value):
+        index = self.check_index(index)
+        if bool(value) != self.inverted:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7))
+
+    def toggle(self, index):
+        index = self.check_index(index)
+        self.bits[index >> 3] ^= 1 << (index & 7)
+
+    def count(self):
+        """Returns the number of flags set."""
+        count = sum([bit_counts[byte] for byte in self.bits])
+        return self.size - count if self.inverted else count
+
+    def indices(self):
+        """Yields the indices of the flags that are set, skipping over bytes with no flags set."""
+        empty_byte = 0xff if self.inverted else 0
+        for byte_index, byte in enumerate(self.bits):
+            if byte == empty_byte:
+                continue
+            for bit in range(8):
+                index = (byte_index << 3) + bit
+                if index < self.size and bool(byte & (1 << bit)) != self.inverted:
+                    yield index
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self[index]
+
+
 Rect = namedtuple('Rect', ['left', 'top', 'right', 'bottom'])